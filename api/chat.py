@@ -6,6 +6,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from chatbot_vercel import FitnessChatbot
+from utils.response_templates import FORMATS
+from utils.state_token import get_state_signer
 
 def handler(request):
     # Handle CORS preflight requests
@@ -44,8 +46,18 @@ def handler(request):
                 'body': json.dumps({'error': 'Message is required'})
             }
         
-        # Initialize chatbot and generate response
-        chatbot = FitnessChatbot()
+        response_format = data.get('format', 'markdown')
+        if response_format not in FORMATS:
+            return {
+                'statusCode': 400,
+                'headers': {'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': f"format must be one of {', '.join(FORMATS)}"})
+            }
+        
+        # Initialize chatbot, restore the conversation from the client's state token and respond
+        signer = get_state_signer()
+        chatbot = FitnessChatbot(response_format)
+        chatbot.load_state(signer.decode(data.get('state')))
         response = chatbot.generate_response(user_message)
         
         return {
@@ -56,6 +68,7 @@ def handler(request):
             },
             'body': json.dumps({
                 'response': response,
+                'state': signer.encode(chatbot.export_state()),
                 'status': 'success'
             })
         }
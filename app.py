@@ -3,6 +3,7 @@ import os
 from datetime import datetime
 from dotenv import load_dotenv
 from chatbot_vercel import FitnessChatbot
+from utils.example_queries import EXAMPLE_QUERIES
 
 # Load environment variables
 load_dotenv()
@@ -188,23 +189,14 @@ def display_examples():
     
     with col1:
         st.subheader("💪 Workout Queries")
-        workout_examples = [
-            "Show me chest exercises",
-            "I want to build muscle",
-            "What are good cardio workouts?",
-            "Exercises for beginners"
-        ]
+        workout_examples = EXAMPLE_QUERIES['workout']
         for example in workout_examples:
             if st.button(f"💪 {example}", key=f"workout_{example}"):
                 process_example_input(example)
                 st.rerun()
         
         st.subheader("📊 BMI Queries")
-        bmi_examples = [
-            "Calculate my BMI",
-            "I weigh 70kg and I'm 1.75m tall",
-            "What is a healthy BMI range?"
-        ]
+        bmi_examples = EXAMPLE_QUERIES['bmi']
         for example in bmi_examples:
             if st.button(f"📊 {example}", key=f"bmi_{example}"):
                 process_example_input(example)
@@ -212,22 +204,14 @@ def display_examples():
     
     with col2:
         st.subheader("🍎 Nutrition Queries")
-        nutrition_examples = [
-            "Calories in chicken breast",
-            "Nutrition facts for apple",
-            "Protein content in eggs"
-        ]
+        nutrition_examples = EXAMPLE_QUERIES['nutrition']
         for example in nutrition_examples:
             if st.button(f"🍎 {example}", key=f"nutrition_{example}"):
                 process_example_input(example)
                 st.rerun()
         
         st.subheader("🌟 Motivation Queries")
-        motivation_examples = [
-            "I need motivation",
-            "I'm feeling lazy today",
-            "Inspire me to workout"
-        ]
+        motivation_examples = EXAMPLE_QUERIES['motivation']
         for example in motivation_examples:
             if st.button(f"🌟 {example}", key=f"motivation_{example}"):
                 process_example_input(example)
@@ -0,0 +1,222 @@
+"""
+Asyncio front end for the chat API.
+
+The event loop only handles sockets and HTTP parsing. Intent classification
+and entity extraction (TF-IDF phrase matching and the regex/keyword pass)
+run in a pool of worker processes that each build the bot's indexes once at
+start-up, fed in micro-batches so one IPC round trip covers many requests.
+The rest of a turn (upstream API calls and formatting) runs on a thread, so
+neither kind of work stalls network handling.
+
+Same /api/chat contract as server.py, including state tokens; /ready
+reports 503 until every worker is warm (and warm-up, with WARMUP=1, is done).
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from chatbot_vercel import FitnessChatbot
+from utils.micro_batcher import MicroBatcher
+from utils.response_templates import FORMATS
+from utils.state_token import get_state_signer
+from utils.warmup import WarmUp, get_query_log, warmup_queries
+
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', os.cpu_count() or 1))
+MAX_BATCH = int(os.environ.get('ANALYSIS_MAX_BATCH', 32))
+# Seconds the batcher waits for more requests before sending a small batch
+MAX_BATCH_DELAY = float(os.environ.get('ANALYSIS_MAX_DELAY', 0.002))
+MAX_BODY_BYTES = 64 * 1024
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type',
+}
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+# Worker processes ---------------------------------------------------------
+
+_worker_bot = None
+
+
+def init_worker():
+    """Build the bot (phrase index, keyword tables) once per worker process"""
+    global _worker_bot
+    _worker_bot = FitnessChatbot()
+    _worker_bot.analyze("warm up")
+
+
+def analyze_batch(items: List[Tuple[str, Optional[str]]]) -> List[Dict]:
+    """Intent and entities for (message, last intent) pairs"""
+    results = []
+    for message, last_intent in items:
+        _worker_bot.last_intent = last_intent
+        results.append(_worker_bot.analyze(message))
+    return results
+
+
+def ping(_):
+    return os.getpid()
+
+
+def new_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: never fork a process that already runs an event loop and threads
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=init_worker)
+
+
+# Serving ------------------------------------------------------------------
+
+# Set when the server starts with WARMUP=1; /ready reports 503 until it finishes
+warmup = None
+
+
+class ServerState:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.batcher = MicroBatcher(new_pool(workers), analyze_batch, MAX_BATCH, MAX_BATCH_DELAY,
+                                    max_in_flight=workers)
+        self.pool_ready = False
+
+    async def warm_pool(self):
+        """Start every worker (running its initializer) before reporting ready"""
+        loop = asyncio.get_running_loop()
+        pool = self.batcher.executor
+        await asyncio.gather(*(loop.run_in_executor(pool, ping, None) for _ in range(self.workers)))
+        self.pool_ready = True
+
+    async def analyze(self, message: str, last_intent: Optional[str]) -> Optional[Dict]:
+        pool = self.batcher.executor
+        try:
+            return await self.batcher.submit((message, last_intent))
+        except BrokenProcessPool:
+            # A worker died; let this turn analyse in-process. Every waiter on the
+            # pool sees the error, but only the first one replaces it
+            if self.batcher.executor is pool:
+                print("Analysis pool broken; restarting workers")
+                self.batcher.executor = new_pool(self.workers)
+                pool.shutdown(wait=False)
+            return None
+
+
+async def handle_chat(state: ServerState, data: Dict) -> Tuple[int, Dict]:
+    user_message = data.get('message', '')
+    if not user_message:
+        return 400, {'error': 'Message is required'}
+    response_format = data.get('format', 'markdown')
+    if response_format not in FORMATS:
+        return 400, {'error': f"format must be one of {', '.join(FORMATS)}"}
+    get_query_log().record(user_message)
+
+    signer = get_state_signer()
+    chatbot = FitnessChatbot(response_format)
+    chatbot.load_state(signer.decode(data.get('state')))
+
+    response = None
+    if not chatbot.awaiting_bmi_data:
+        response = chatbot.cached_response(user_message)
+    if response is None:
+        analysis = await state.analyze(user_message, chatbot.last_intent)
+        if analysis is None:
+            response = await asyncio.to_thread(chatbot.generate_response, user_message)
+        else:
+            response = await asyncio.to_thread(chatbot.generate_response, user_message, analysis)
+
+    return 200, {'response': response, 'state': signer.encode(chatbot.export_state()), 'status': 'success'}
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict, bytes]]:
+    """(method, path, headers, body) for the next request, or None at EOF"""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length') or 0)
+    if length > MAX_BODY_BYTES:
+        raise ValueError('payload too large')
+    body = await reader.readexactly(length) if length else b''
+    return method, path, headers, body
+
+
+def write_response(writer: asyncio.StreamWriter, status: int, payload: Optional[Dict], keep_alive: bool):
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    headers = {'Content-Type': 'application/json', 'Content-Length': str(len(body)),
+               'Connection': 'keep-alive' if keep_alive else 'close', **CORS_HEADERS}
+    head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+    head += ''.join(f"{name}: {value}\r\n" for name, value in headers.items())
+    writer.write(head.encode('latin-1') + b"\r\n" + body)
+
+
+async def route(state: ServerState, method: str, path: str, body: bytes) -> Tuple[int, Optional[Dict]]:
+    if method == 'OPTIONS':
+        return 200, None
+    if path == '/ready' and method == 'GET':
+        ready = state.pool_ready and (warmup is None or warmup.ready.is_set())
+        status = {'ready': ready, 'analysis': state.batcher.stats()}
+        if warmup is not None:
+            status['warmup'] = warmup.status()
+        return (200 if ready else 503), status
+    if path != '/api/chat':
+        return 404, {'error': 'Not found'}
+    if method != 'POST':
+        return 405, {'error': 'Method not allowed'}
+    try:
+        data = json.loads(body.decode('utf-8') or '{}')
+    except ValueError:
+        return 400, {'error': 'Invalid JSON'}
+    return await handle_chat(state, data)
+
+
+async def handle_connection(state: ServerState, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError):
+                write_response(writer, 400, {'error': 'Bad request'}, keep_alive=False)
+                break
+            if request is None:
+                break
+            method, path, headers, body = request
+            keep_alive = headers.get('connection', '').lower() != 'close'
+            try:
+                status, payload = await route(state, method, path, body)
+            except Exception as e:
+                status, payload = 500, {'error': f'Internal server error: {str(e)}', 'status': 'error'}
+            write_response(writer, status, payload, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def main():
+    global warmup
+    port = int(os.environ.get('PORT', 8000))
+    state = ServerState(ANALYSIS_WORKERS)
+    server = await asyncio.start_server(lambda r, w: handle_connection(state, r, w), '', port)
+    print(f"Async server running on port {port} with {ANALYSIS_WORKERS} analysis workers")
+    await state.warm_pool()
+    if os.environ.get('WARMUP') == '1':
+        warmup = WarmUp(lambda query: FitnessChatbot().generate_response(query), warmup_queries()).start()
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
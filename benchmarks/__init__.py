@@ -0,0 +1 @@
+# Benchmark scripts for fitness chatbot
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Bulk BMI benchmark.
+
+Generates a synthetic cohort with mixed metric/imperial units and compares
+the per-person BMICalculator path (calculate_bmi + classify_bmi in a loop,
+timed on a sample) against the vectorized batch API over every row.
+
+Usage:
+    python -m benchmarks.bmi_benchmark
+    python -m benchmarks.bmi_benchmark --rows 5000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.bmi_batch import calculate_bmi_batch
+from utils.bmi_calculator import BMICalculator
+
+
+def make_cohort(rows: int, seed: int = 0):
+    """Random weights/heights, half recorded in kg/m and half in lb/in"""
+    rng = np.random.default_rng(seed)
+    weight_kg = rng.normal(75, 15, rows).clip(35, 200)
+    height_m = rng.normal(1.72, 0.1, rows).clip(1.4, 2.1)
+    imperial = rng.random(rows) < 0.5
+
+    weights = np.where(imperial, weight_kg / 0.453592, weight_kg).round(1)
+    heights = np.where(imperial, height_m / 0.0254, height_m).round(2)
+    weight_units = np.where(imperial, 'lb', 'kg')
+    height_units = np.where(imperial, 'in', 'm')
+    return weights, heights, weight_units, height_units
+
+
+def scalar_rows_per_second(calculator: BMICalculator, weights, heights, weight_units) -> float:
+    """Throughput of the one-person-at-a-time API"""
+    weights, heights, weight_units = weights.tolist(), heights.tolist(), weight_units.tolist()
+    start = time.perf_counter()
+    for weight, height, unit in zip(weights, heights, weight_units):
+        if unit == 'kg':
+            bmi = calculator.calculate_bmi(weight, height)
+        else:
+            bmi = calculator.calculate_bmi_imperial(weight, height)
+        calculator.classify_bmi(bmi)
+    return len(weights) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-person and vectorized BMI computation")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--scalar-sample', type=int, default=100_000,
+                        help="rows timed on the per-person path")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    weights, heights, weight_units, height_units = make_cohort(args.rows)
+    calculator = BMICalculator()
+
+    sample = min(args.scalar_sample, args.rows)
+    scalar = scalar_rows_per_second(calculator, weights[:sample], heights[:sample], weight_units[:sample])
+
+    best = float('inf')
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        result = calculator.calculate_bmi_batch(weights, heights, weight_units, height_units)
+        best = min(best, time.perf_counter() - start)
+    vectorized = args.rows / best
+
+    # Spot-check the batch against the scalar path
+    for i in range(0, args.rows, max(args.rows // 1000, 1)):
+        expected = (calculator.calculate_bmi(weights[i], heights[i]) if weight_units[i] == 'kg'
+                    else calculator.calculate_bmi_imperial(weights[i], heights[i]))
+        assert result[i]['bmi'] == expected and result[i]['category'] == calculator.classify_bmi(expected), i
+
+    print(f"Rows:                 {args.rows:,}")
+    print(f"Per-person API:       {scalar:14,.0f} rows/s")
+    print(f"Vectorized batch:     {vectorized:14,.0f} rows/s ({best * 1000:.1f} ms)")
+    print(f"Speedup:              {vectorized / scalar:14.1f}x")
+    print(f"Batch memory:         {(result.bmi.nbytes + result.codes.nbytes) / 1e6:14.1f} MB")
+    print("Categories:           " + ", ".join(f"{name} {count:,}" for name, count in result.counts().items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Entity extraction microbenchmark.
+
+Compares the per-message cost of the old per-handler extraction (separate
+regex scans and repeated lowercasing, kept here verbatim as the baseline)
+against the single-pass extractor in utils/entity_extractor.py.
+
+Usage:
+    python -m benchmarks.entity_benchmark
+"""
+import argparse
+import re
+import time
+from typing import Callable, Dict, List, Optional
+
+from utils.entity_extractor import extract_entities, to_bmi_data
+
+SAMPLE_MESSAGES = [
+    "I weigh 70 kg and I'm 1.75 meters tall",
+    "I weigh 154 lbs and I'm 5 feet 9 inches tall",
+    "Calories in chicken breast",
+    "How much protein in greek yogurt?",
+    "Show me beginner chest exercises",
+    "I want a hiit workout for my legs",
+    "What are good stretching exercises for the back",
+    "i am 170 cm tall and weigh 70kg",
+]
+
+
+def legacy_extract_food_item(text: str) -> str:
+    nutrition_words = ['calories', 'nutrition', 'nutrients', 'protein', 'carbs', 'fat', 'in', 'for', 'of', 'how', 'much', 'many', 'what', 'about']
+    words = text.lower().split()
+    food_words = [word for word in words if word not in nutrition_words and len(word) > 2]
+    return ' '.join(food_words) if food_words else text
+
+
+def legacy_extract_exercise_keywords(text: str) -> Dict[str, str]:
+    text_lower = text.lower()
+    muscle_map = {
+        'chest': 'chest', 'pecs': 'chest',
+        'biceps': 'biceps', 'bicep': 'biceps', 'arms': 'biceps',
+        'triceps': 'triceps', 'tricep': 'triceps',
+        'shoulders': 'shoulders', 'shoulder': 'shoulders',
+        'back': 'lats', 'lats': 'lats',
+        'legs': 'quadriceps', 'quads': 'quadriceps', 'thighs': 'quadriceps',
+        'glutes': 'glutes', 'butt': 'glutes',
+        'calves': 'calves', 'calf': 'calves',
+        'abs': 'abdominals', 'core': 'abdominals', 'abdominals': 'abdominals'
+    }
+    type_map = {
+        'cardio': 'cardio', 'running': 'cardio', 'cycling': 'cardio',
+        'strength': 'strength', 'weights': 'strength', 'lifting': 'strength',
+        'stretching': 'stretching', 'flexibility': 'stretching',
+        'plyometrics': 'plyometrics', 'hiit': 'plyometrics'
+    }
+    muscle = None
+    exercise_type = None
+    for keyword, muscle_group in muscle_map.items():
+        if keyword in text_lower:
+            muscle = muscle_group
+            break
+    for keyword, ex_type in type_map.items():
+        if keyword in text_lower:
+            exercise_type = ex_type
+            break
+    return {'muscle': muscle, 'type': exercise_type}
+
+
+def legacy_extract_bmi_data(text: str) -> Optional[Dict]:
+    weight_pattern = r'(?:weight|weigh)\s*(\d+(?:\.\d+)?)\s*(?:kg|kilograms?|lbs?|pounds?)|(\d+(?:\.\d+)?)\s*(?:kg|kilograms?|lbs?|pounds?)'
+    height_pattern = r'(?:height|tall|i\'?m)\s*(\d+\.?\d*)\s*(?:m|meters?|cm|centimeters?|ft|feet|in|inches?|\'|\")?|(\d+\.?\d*)\s*(?:m|meters?|cm|centimeters?|ft|feet)'
+    weight_match = re.search(weight_pattern, text.lower())
+    height_match = re.search(height_pattern, text.lower())
+    if weight_match and height_match:
+        weight = float(weight_match.group(1) if weight_match.group(1) else weight_match.group(2))
+        height = float(height_match.group(1) if height_match.group(1) else height_match.group(2))
+        unit_system = "metric"
+        if "lbs" in text.lower() or "pounds" in text.lower():
+            unit_system = "imperial"
+        elif "feet" in text.lower() or "ft" in text.lower() or "inches" in text.lower() or "in" in text.lower():
+            unit_system = "imperial"
+        if unit_system == "metric" and height > 10:
+            height = height / 100
+        elif unit_system == "imperial" and height < 10:
+            height = height * 12
+        return {'weight': weight, 'height': height, 'unit_system': unit_system}
+    return None
+
+
+def legacy_all(text: str):
+    """Every extraction the old handlers could run for one message"""
+    return legacy_extract_bmi_data(text), legacy_extract_exercise_keywords(text), legacy_extract_food_item(text)
+
+
+def single_pass_all(text: str):
+    entities = extract_entities(text)
+    return to_bmi_data(entities['weight'], entities['height']), entities
+
+
+def time_per_message(extract: Callable[[str], object], messages: List[str], repeats: int) -> float:
+    """Mean microseconds per message"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for message in messages:
+            extract(message)
+    return (time.perf_counter() - start) / (repeats * len(messages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare legacy and single-pass entity extraction")
+    parser.add_argument('--repeats', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=5, help="interleaved rounds; the best of each is reported")
+    args = parser.parse_args()
+
+    # Interleave the two and keep the fastest round of each, so a noisy
+    # neighbour during one run doesn't decide the comparison
+    legacy = single = float('inf')
+    for _ in range(args.rounds):
+        legacy = min(legacy, time_per_message(legacy_all, SAMPLE_MESSAGES, args.repeats))
+        single = min(single, time_per_message(single_pass_all, SAMPLE_MESSAGES, args.repeats))
+
+    print(f"Legacy extraction:      {legacy:8.2f} us/message")
+    print(f"Single-pass extraction: {single:8.2f} us/message")
+    print(f"Speedup:                {legacy / single:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Intent classification benchmark.
+
+Runs each intent backend over a labelled corpus and reports accuracy,
+per-message p50/p99 latency, batch throughput and peak RSS. Each backend runs
+in its own process so memory numbers don't bleed into each other. Results are
+written as JSON, and --baseline compares them against an earlier run and exits
+non-zero on a regression. The baseline must be a separate file from --output,
+so a regressed run can't overwrite the results it is checked against.
+
+The default corpus, data/intent_eval.csv, is held out from the training data
+(rows that also appear in data/training_data.csv are dropped), so accuracy
+tracks generalisation. Runs on the training set itself are labelled as such.
+
+Usage:
+    python -m benchmarks.intent_benchmark --output reports/intent_baseline.json
+    python -m benchmarks.intent_benchmark --baseline reports/intent_baseline.json
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Map the Vercel bot's intent names onto the training labels
+VERCEL_LABELS = {
+    'exercise_recommendation': 'workout',
+    'nutrition_advice': 'nutrition',
+    'bmi_calculation': 'bmi',
+    'motivation': 'motivation',
+    'general_health': 'unknown',
+}
+
+
+def _chatbot_model() -> Callable[[str], str]:
+    from chatbot import FitnessChatbot
+    bot = FitnessChatbot()
+    return lambda text: bot.predict_intent(text)[0]
+
+
+def _chatbot_keywords() -> Callable[[str], str]:
+    from chatbot import FitnessChatbot
+    bot = FitnessChatbot()
+    return bot.keyword_based_intent
+
+
+def _vercel_keywords() -> Callable[[str], str]:
+    from chatbot_vercel import FitnessChatbot
+    bot = FitnessChatbot()
+    return lambda text: VERCEL_LABELS.get(bot.predict_intent(text)[0], 'unknown')
+
+
+BACKENDS = {
+    'chatbot.predict_intent': _chatbot_model,
+    'chatbot.keyword_based_intent': _chatbot_keywords,
+    'chatbot_vercel.predict_intent': _vercel_keywords,
+}
+
+
+TRAINING_CORPUS = 'data/training_data.csv'
+HELD_OUT_CORPUS = 'data/intent_eval.csv'
+
+
+def load_corpus(path: str) -> List[Tuple[str, str]]:
+    """Read (text, intent) pairs from a CSV file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        return [(row['text'], row['intent']) for row in csv.DictReader(f)]
+
+
+def hold_out(corpus: List[Tuple[str, str]], training: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Corpus rows whose text isn't also a training example"""
+    from utils.response_cache import normalize_message
+    seen = {normalize_message(text) for text, _ in training}
+    return [(text, label) for text, label in corpus if normalize_message(text) not in seen]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_backend(name: str, corpus: List[Tuple[str, str]], repeats: int) -> Dict:
+    """Benchmark one backend; meant to run in a fresh process"""
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    predict = BACKENDS[name]()
+    load_seconds = time.perf_counter() - start
+
+    texts = [text for text, _ in corpus]
+    for text in texts[:20]:
+        predict(text)
+
+    # Per-message latency and accuracy
+    latencies = []
+    correct = 0
+    for text, label in corpus:
+        start = time.perf_counter()
+        prediction = predict(text)
+        latencies.append(time.perf_counter() - start)
+        correct += prediction == label
+
+    # Batch throughput without per-call timing overhead
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for text in texts:
+            predict(text)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'backend': name,
+        'messages': len(corpus),
+        'accuracy': correct / len(corpus),
+        'load_seconds': load_seconds,
+        'latency_p50_ms': latencies[len(latencies) // 2] * 1000,
+        'latency_p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'latency_mean_ms': statistics.mean(latencies) * 1000,
+        'throughput_msgs_per_s': repeats * len(texts) / elapsed if elapsed else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_growth_mb': peak_rss_mb() - rss_before,
+    }
+
+
+def _run_in_child(args):
+    return run_backend(*args)
+
+
+def find_regressions(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Compare against a baseline run; latency may grow by `tolerance` (a fraction)"""
+    previous = {row['backend']: row for row in baseline}
+    problems = []
+    for row in results:
+        old = previous.get(row['backend'])
+        if not old:
+            continue
+        if row['accuracy'] < old['accuracy'] - 1e-9:
+            problems.append(f"{row['backend']}: accuracy {old['accuracy']:.3f} -> {row['accuracy']:.3f}")
+        for metric in ('latency_p50_ms', 'latency_p99_ms'):
+            if row[metric] > old[metric] * (1 + tolerance):
+                problems.append(f"{row['backend']}: {metric} {old[metric]:.3f} -> {row[metric]:.3f}")
+        if row['throughput_msgs_per_s'] < old['throughput_msgs_per_s'] * (1 - tolerance):
+            problems.append(f"{row['backend']}: throughput {old['throughput_msgs_per_s']:.0f} -> "
+                            f"{row['throughput_msgs_per_s']:.0f} msgs/s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the intent classification backends")
+    parser.add_argument('--corpus', default=HELD_OUT_CORPUS,
+                        help="CSV with 'text' and 'intent' columns (default: held-out evaluation set)")
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument('--repeats', type=int, default=20, help="passes over the corpus for throughput")
+    parser.add_argument('--output', default='reports/intent_benchmark.json')
+    parser.add_argument('--baseline', default=None, help="earlier results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative slowdown vs baseline")
+    args = parser.parse_args()
+    if args.baseline and os.path.abspath(args.baseline) == os.path.abspath(args.output):
+        parser.error("--baseline and --output must be different files")
+
+    corpus = load_corpus(args.corpus)
+    training_set = os.path.abspath(args.corpus) == os.path.abspath(TRAINING_CORPUS)
+    if not training_set and os.path.exists(TRAINING_CORPUS):
+        held_out = hold_out(corpus, load_corpus(TRAINING_CORPUS))
+        if len(held_out) < len(corpus):
+            print(f"Dropped {len(corpus) - len(held_out)} messages that are also training examples")
+        corpus = held_out
+    accuracy_label = 'training-set accuracy' if training_set else 'held-out accuracy'
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    # A fresh process per backend keeps peak RSS numbers independent
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for name in args.backends:
+        print(f"Benchmarking {name} on {len(corpus)} messages...")
+        with context.Pool(1) as pool:
+            results.append(pool.apply(_run_in_child, ((name, corpus, args.repeats),)))
+
+    print(f"\nAccuracy column: {accuracy_label}" + (" (not a regression signal)" if training_set else ""))
+    print(f"{'Backend':<32} {'Acc':>6} {'p50 ms':>8} {'p99 ms':>8} {'msgs/s':>10} {'RSS MB':>8}")
+    for row in results:
+        print(f"{row['backend']:<32} {row['accuracy']:>6.3f} {row['latency_p50_ms']:>8.3f} "
+              f"{row['latency_p99_ms']:>8.3f} {row['throughput_msgs_per_s']:>10.0f} {row['peak_rss_mb']:>8.1f}")
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'corpus': args.corpus,
+            'accuracy_kind': accuracy_label,
+            'results': results,
+        }, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if baseline is not None:
+        problems = find_regressions(results, baseline, args.tolerance)
+        if problems:
+            print("\nRegressions against baseline:")
+            for problem in problems:
+                print(f"  - {problem}")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
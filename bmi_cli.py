@@ -0,0 +1,170 @@
+"""
+Streaming BMI processor for large member exports.
+
+Reads a CSV in fixed-size chunks and appends `bmi` and `bmi_category` columns
+to each row, writing every chunk as soon as it is done, so memory use depends
+on the chunk size and not on the file size. Measurements are parsed with the
+chatbot's entity extractor, so cells like "154 lbs", "5'9\"", "175 cm" or a
+bare "70" (or a free-text column such as "I weigh 70 kg and I'm 1.75 m tall")
+follow the same rules as FitnessChatbot.extract_bmi_data. Rows that can't be
+parsed are kept with an empty BMI and the 'unknown' category.
+
+Usage:
+    python bmi_cli.py members.csv -o members_bmi.csv
+    python bmi_cli.py members.csv -o - --text-column notes
+    python bmi_cli.py members.csv -o members_bmi.csv --workers 4 --chunk-size 50000
+"""
+import argparse
+import csv
+import multiprocessing
+import sys
+import time
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+from utils.bmi_calculator import BMICalculator
+from utils.entity_extractor import extract_entities, to_bmi_data
+
+OUTPUT_COLUMNS = ['bmi', 'bmi_category']
+
+# (text column index) or (weight column index, height column index)
+Columns = Tuple[Optional[int], Optional[int], Optional[int]]
+
+
+def parse_measurements(text: Optional[str], weight: Optional[str], height: Optional[str]) -> Optional[dict]:
+    """BMICalculator inputs for one row, using the chatbot's extraction rules"""
+    if text is not None:
+        entities = extract_entities(text)
+        return to_bmi_data(entities['weight'], entities['height'])
+    # Prefix the cells with their cue words so bare numbers are read as the chatbot would
+    entities = extract_entities(f"weight {weight} height {height}")
+    return to_bmi_data(entities['weight'], entities['height'])
+
+
+def process_chunk(rows: List[List[str]], columns: Columns) -> List[List[str]]:
+    """Compute BMI for one chunk of CSV rows with a single vectorized call"""
+    text_index, weight_index, height_index = columns
+    weights, heights, systems = [], [], []
+    for row in rows:
+        try:
+            if text_index is not None:
+                data = parse_measurements(row[text_index], None, None)
+            else:
+                data = parse_measurements(None, row[weight_index], row[height_index])
+        except IndexError:
+            data = None
+        if data is None:
+            weights.append(0.0)
+            heights.append(0.0)
+            systems.append('metric')
+        else:
+            weights.append(data['weight'])
+            heights.append(data['height'])
+            systems.append(data['unit_system'])
+
+    # Invalid rows carry zeros and come back with the unknown category
+    result = BMICalculator().calculate_bmi_batch(weights, heights, systems, systems)
+    categories = result.categories()
+    output = []
+    for row, bmi, category in zip(rows, result.bmi.tolist(), categories.tolist()):
+        output.append(row + ['' if bmi != bmi else f"{bmi:.2f}", category])
+    return output
+
+
+def _process_chunk_args(args):
+    return process_chunk(*args)
+
+
+def iter_chunks(reader: Iterator[List[str]], chunk_size: int) -> Iterator[List[List[str]]]:
+    """Group CSV rows into lists of at most chunk_size rows"""
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def resolve_columns(header: List[str], text_column: Optional[str], weight_column: str,
+                    height_column: str) -> Columns:
+    """Locate the measurement columns in the CSV header (case-insensitive)"""
+    lookup = {name.strip().lower(): i for i, name in enumerate(header)}
+    if text_column:
+        if text_column.lower() not in lookup:
+            raise ValueError(f"Column '{text_column}' not found in header")
+        return lookup[text_column.lower()], None, None
+    missing = [name for name in (weight_column, height_column) if name.lower() not in lookup]
+    if missing:
+        raise ValueError(f"Column(s) {', '.join(missing)} not found in header; use --text-column for free text")
+    return None, lookup[weight_column.lower()], lookup[height_column.lower()]
+
+
+def process_file(source, sink, chunk_size: int = 10000, workers: int = 1, text_column: Optional[str] = None,
+                 weight_column: str = 'weight', height_column: str = 'height') -> int:
+    """Stream rows from source to sink; returns the number of rows processed"""
+    reader = csv.reader(source)
+    writer = csv.writer(sink)
+    header = next(reader, None)
+    if header is None:
+        return 0
+    columns = resolve_columns(header, text_column, weight_column, height_column)
+    writer.writerow(header + OUTPUT_COLUMNS)
+
+    rows = 0
+    chunks = iter_chunks(reader, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            writer.writerows(process_chunk(chunk, columns))
+            rows += len(chunk)
+        return rows
+
+    # Keep a bounded number of chunks in flight (Pool.imap would read the
+    # whole input ahead) and write results back in input order
+    with multiprocessing.Pool(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_process_chunk_args, ((chunk, columns),)))
+            if len(pending) >= 2 * workers:
+                done = pending.popleft().get()
+                writer.writerows(done)
+                rows += len(done)
+        while pending:
+            done = pending.popleft().get()
+            writer.writerows(done)
+            rows += len(done)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute BMI for every row of a large member CSV")
+    parser.add_argument('input', help="CSV file, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="output CSV file, or - for stdout")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="rows held in memory per chunk")
+    parser.add_argument('--workers', type=int, default=1, help="processes computing chunks in parallel")
+    parser.add_argument('--text-column', help="free-text column holding both measurements")
+    parser.add_argument('--weight-column', default='weight')
+    parser.add_argument('--height-column', default='height')
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    start = time.perf_counter()
+    try:
+        rows = process_file(source, sink, args.chunk_size, args.workers, args.text_column,
+                            args.weight_column, args.height_column)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Processed {rows:,} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,87 @@
 import pickle
 import re
 import os
+import secrets
 from typing import Dict, Tuple, Optional
 from dotenv import load_dotenv
 from utils.api_service import APIService
 from utils.bmi_calculator import BMICalculator
+from utils.tdee_calculator import TDEECalculator
 from utils.motivation_service import MotivationService
+from utils.phrase_index import get_phrase_index
+from utils.entity_extractor import extract_entities, to_bmi_data
+from utils.exercise_search import search_exercises
+from utils.exercise_neighbors import get_similar_exercises
+from utils import response_templates
+from utils.response_templates import render_error, render_message
+from utils.response_cache import get_response_cache
+from utils.prefetch import get_prefetcher
 
 # Load environment variables
 load_dotenv()
 
+# Follow-ups asking for alternatives to the exercises just shown. The first
+# pattern refers to them explicitly; the second is only a hint ("rice instead
+# of bread" is not about exercises) and needs a workout or unclear intent too.
+REFERENT = r"(it|this|that|these|those|them|(this|that|the) (one|exercise|move))"
+SIMILAR_REQUEST_RE = re.compile(
+    r"\b(something|anything|exercises?|ones?|moves?|workouts?) similar\b|\bsimilar (ones?|exercises?|moves?)\b"
+    r"|\b(similar|alternatives?) to " + REFERENT + r"\b|\balternative (exercises?|moves?)\b"
+    r"|\bmore like (this|that|these|those)\b|\b(swap|replace) " + REFERENT + r"\b|\binstead of " + REFERENT + r"\b",
+    re.IGNORECASE)
+SIMILAR_HINT_RE = re.compile(r"\b(similar|alternatives?|instead|swap)\b", re.IGNORECASE)
+NO_EQUIPMENT_RE = re.compile(r"\b(no|without( any)?) equipment\b|\bbody ?weight\b|\bat home\b", re.IGNORECASE)
+# Follow-ups asking for the next page of the exercises just shown
+MORE_REQUEST_RE = re.compile(r"\b(show|give|see)( me)? more\b|\bnext (page|ones?)\b|\bmore (exercises|results|options)\b|^\s*more\W*$", re.IGNORECASE)
+
+# "How many calories should I eat" style questions, answered with TDEE
+CALORIE_TARGET_RE = re.compile(
+    r"\b(tdee|bmr|maintenance calories|calorie (target|goal|needs?|intake)|daily calories"
+    r"|calories (should|do|must) i (eat|need|have|consume)|how many calories (should|do) i)\b",
+    re.IGNORECASE)
+
+# Constraints the muscle/type/difficulty keywords can't express (equipment,
+# pain or injury, a specific body area); such queries go to ranked search
+SEARCH_CONSTRAINT_RE = re.compile(
+    r"\b(no|without|any) equipment\b|\bequipment\b|\bbody ?weight\b|\bat home\b"
+    r"|\b(dumbbells?|barbells?|kettlebells?|bands?|machines?|pull ?up bar)\b"
+    r"|\b(pain|painful|injur(y|ies|ed)|sore|rehab|posture|knees?|joints?|lower back|neck)\b",
+    re.IGNORECASE)
+
+# Ranked search results kept for "show me more" pages
+SEARCH_RESULT_LIMIT = 20
+
 class FitnessChatbot:
-    def __init__(self):
+    def __init__(self, response_format: str = 'markdown'):
+        # markdown (default), plain or json for every answer
+        self.response_format = response_format
         self.api_service = APIService()
         self.bmi_calculator = BMICalculator()
+        self.tdee_calculator = TDEECalculator()
         self.motivation_service = MotivationService()
         self.model = None
         self.load_model()
+        self.phrase_index = get_phrase_index()
+        self.response_cache = get_response_cache()
+        self.prefetcher = get_prefetcher()
         
         # Conversation state
+        self.session_id = secrets.token_urlsafe(8)
         self.conversation_state = {}
         self.awaiting_bmi_data = False
+        self.awaiting_tdee_data = False
+        self.tdee_data = {}
         self.bmi_data = {}
+        self.last_exercises = []
+        self.exercise_cursor = None
+        # Last muscle / food looked up, for learning follow-up transitions
+        self.last_lookup = {}
         
     def load_model(self):
         """Load the trained ML model"""
         try:
-            model_path = 'models/logistic_regression_model.pkl'
+            # INTENT_MODEL_PATH can point at e.g. the streaming SGD model
+            model_path = os.getenv('INTENT_MODEL_PATH', 'models/logistic_regression_model.pkl')
             if os.path.exists(model_path):
                 with open(model_path, 'rb') as f:
                     self.model = pickle.load(f)
@@ -47,23 +102,31 @@ class FitnessChatbot:
     def predict_intent(self, text: str) -> Tuple[str, float]:
         """Predict the intent of user input with keyword fallback"""
         if not self.model:
-            return self.keyword_based_intent(text), 0.5
+            return self.fallback_intent(text)
         
         try:
             processed_text = self.preprocess_text(text)
             prediction = self.model.predict([processed_text])[0]
             confidence = max(self.model.predict_proba([processed_text])[0])
             
-            # If confidence is low, use keyword-based detection
+            # If confidence is low, use nearest-neighbour or keyword-based detection
             if confidence < 0.4:
-                keyword_intent = self.keyword_based_intent(text)
-                if keyword_intent != "unknown":
-                    return keyword_intent, 0.6
+                fallback_intent, fallback_confidence = self.fallback_intent(text)
+                if fallback_intent != "unknown":
+                    return fallback_intent, max(fallback_confidence, 0.6)
             
             return prediction, confidence
         except Exception as e:
             print(f"Error predicting intent: {e}")
-            return self.keyword_based_intent(text), 0.5
+            return self.fallback_intent(text)
+    
+    def fallback_intent(self, text: str) -> Tuple[str, float]:
+        """Nearest training phrase first, then keyword lists"""
+        if self.phrase_index:
+            intent, confidence = self.phrase_index.predict_intent(text)
+            if intent:
+                return intent, confidence
+        return self.keyword_based_intent(text), 0.5
     
     def keyword_based_intent(self, text: str) -> str:
         """Fallback intent detection using keywords"""
@@ -99,139 +162,209 @@ class FitnessChatbot:
     
     def extract_food_item(self, text: str) -> str:
         """Extract food item from nutrition query"""
-        # Remove common nutrition-related words
-        nutrition_words = ['calories', 'nutrition', 'nutrients', 'protein', 'carbs', 'fat', 'in', 'for', 'of', 'how', 'much', 'many', 'what', 'about']
-        words = text.lower().split()
-        food_words = [word for word in words if word not in nutrition_words and len(word) > 2]
-        return ' '.join(food_words) if food_words else text
+        return extract_entities(text)['food'] or text
     
     def extract_exercise_keywords(self, text: str) -> Dict[str, str]:
         """Extract exercise-related keywords from workout query"""
-        text_lower = text.lower()
-        
-        # Muscle groups
-        muscle_map = {
-            'chest': 'chest', 'pecs': 'chest',
-            'biceps': 'biceps', 'bicep': 'biceps', 'arms': 'biceps',
-            'triceps': 'triceps', 'tricep': 'triceps',
-            'shoulders': 'shoulders', 'shoulder': 'shoulders',
-            'back': 'lats', 'lats': 'lats',
-            'legs': 'quadriceps', 'quads': 'quadriceps', 'thighs': 'quadriceps',
-            'glutes': 'glutes', 'butt': 'glutes',
-            'calves': 'calves', 'calf': 'calves',
-            'abs': 'abdominals', 'core': 'abdominals', 'abdominals': 'abdominals'
-        }
-        
-        # Exercise types
-        type_map = {
-            'cardio': 'cardio', 'running': 'cardio', 'cycling': 'cardio',
-            'strength': 'strength', 'weights': 'strength', 'lifting': 'strength',
-            'stretching': 'stretching', 'flexibility': 'stretching',
-            'plyometrics': 'plyometrics', 'hiit': 'plyometrics'
-        }
-        
-        muscle = None
-        exercise_type = None
-        
-        for keyword, muscle_group in muscle_map.items():
-            if keyword in text_lower:
-                muscle = muscle_group
-                break
-        
-        for keyword, ex_type in type_map.items():
-            if keyword in text_lower:
-                exercise_type = ex_type
-                break
-        
-        return {'muscle': muscle, 'type': exercise_type}
+        entities = extract_entities(text)
+        return {'muscle': entities['muscle'], 'type': entities['type'], 'difficulty': entities['difficulty']}
     
     def extract_bmi_data(self, text: str) -> Optional[Dict]:
         """Extract BMI data from user input"""
-        # Look for weight and height patterns
-        weight_pattern = r'(?:weight|weigh)\s*(\d+(?:\.\d+)?)\s*(?:kg|kilograms?|lbs?|pounds?)|(\d+(?:\.\d+)?)\s*(?:kg|kilograms?|lbs?|pounds?)'
-        height_pattern = r'(?:height|tall|i\'?m)\s*(\d+\.?\d*)\s*(?:m|meters?|cm|centimeters?|ft|feet|in|inches?|\'|\")?|(\d+\.?\d*)\s*(?:m|meters?|cm|centimeters?|ft|feet)'
-        
-        weight_match = re.search(weight_pattern, text.lower())
-        height_match = re.search(height_pattern, text.lower())
-        
-        if weight_match and height_match:
-            # Extract weight (could be in group 1 or 2)
-            weight = float(weight_match.group(1) if weight_match.group(1) else weight_match.group(2))
-            # Extract height (could be in group 1 or 2)  
-            height = float(height_match.group(1) if height_match.group(1) else height_match.group(2))
-            
-            # Determine units based on context
-            unit_system = "metric"
-            if "lbs" in text.lower() or "pounds" in text.lower():
-                unit_system = "imperial"
-            elif "feet" in text.lower() or "ft" in text.lower() or "inches" in text.lower() or "in" in text.lower():
-                unit_system = "imperial"
-            
-            # Convert height if needed
-            if unit_system == "metric" and height > 10:  # Assume cm if > 10
-                height = height / 100  # Convert cm to m
-            elif unit_system == "imperial" and height < 10:  # Assume feet
-                height = height * 12  # Convert feet to inches
-            elif unit_system == "metric" and height < 3:  # Already in meters
-                height = height  # Keep as is
-            
-            return {
-                'weight': weight,
-                'height': height,
-                'unit_system': unit_system
-            }
-        
-        return None
+        entities = extract_entities(text)
+        return to_bmi_data(entities['weight'], entities['height'])
     
     def handle_bmi_intent(self, text: str) -> str:
         """Handle BMI-related queries"""
+        if CALORIE_TARGET_RE.search(text):
+            return self.handle_calorie_target(text)
+        
         # Try to extract BMI data from the text
         bmi_data = self.extract_bmi_data(text)
         
         if bmi_data:
             # Calculate BMI directly
-            return self.bmi_calculator.format_bmi_response(
-                bmi_data['weight'], 
-                bmi_data['height'], 
-                bmi_data['unit_system']
-            )
+            return self.format_bmi_with_tdee(text, bmi_data)
         else:
             # Ask for BMI data
             self.awaiting_bmi_data = True
-            return ("📊 **BMI Calculator**\n\n"
+            return self.reply("bmi_prompt",
+                   "📊 **BMI Calculator**\n\n"
                    "I'd be happy to calculate your BMI! Please provide your:\n"
                    "• Weight (in kg or lbs)\n"
                    "• Height (in meters, cm, feet, or inches)\n\n"
                    "Example: \"I weigh 70 kg and I'm 1.75 meters tall\"\n"
                    "or \"I weigh 154 lbs and I'm 5 feet 9 inches tall\"")
     
+    def reply(self, kind: str, text: str) -> str:
+        """A free-form (markdown) answer in the session's response format"""
+        return render_message(text, kind, self.response_format)
+    
+    def format_bmi_with_tdee(self, text: str, bmi_data: Dict) -> str:
+        """BMI answer, plus calorie needs when age and sex were given too"""
+        response = self.bmi_calculator.format_bmi_response(
+            bmi_data['weight'], 
+            bmi_data['height'], 
+            bmi_data['unit_system'],
+            fmt=self.response_format
+        )
+        entities = extract_entities(text)
+        if entities['age'] and entities['sex']:
+            response = self.append_note(response, "\n\n" + self.format_tdee_from_entities(entities, bmi_data), 'tdee')
+        return response
+    
+    def append_note(self, response: str, note: str, key: str = 'note') -> str:
+        """Add text to a templated answer (a `key` field in JSON output)"""
+        return response_templates.append_note(response, note, self.response_format, key)
+    
+    def format_tdee_from_entities(self, entities: Dict, bmi_data: Dict) -> str:
+        """Calorie needs from extracted entities and BMI-style measurements"""
+        if bmi_data['unit_system'] == 'imperial':
+            weight_kg, height_cm = bmi_data['weight'] * 0.453592, bmi_data['height'] * 2.54
+        else:
+            weight_kg, height_cm = bmi_data['weight'], bmi_data['height'] * 100
+        return self.tdee_calculator.format_tdee_response(
+            weight_kg, height_cm, entities['age'], entities['sex'],
+            entities['activity'], entities['goal'], fmt=self.response_format
+        )
+    
+    def handle_calorie_target(self, text: str) -> str:
+        """Answer "how many calories should I eat" with BMR/TDEE estimates"""
+        entities = extract_entities(text)
+        # Details can arrive over several messages; newer values win
+        if self.awaiting_tdee_data:
+            entities = {**self.tdee_data, **{key: value for key, value in entities.items() if value}}
+        
+        bmi_data = to_bmi_data(entities['weight'], entities['height'])
+        if bmi_data and entities['age'] and entities['sex']:
+            self.awaiting_tdee_data = False
+            self.tdee_data = {}
+            return self.format_tdee_from_entities(entities, bmi_data)
+        
+        self.awaiting_tdee_data = True
+        self.tdee_data = entities
+        return self.reply("tdee_prompt",
+               "🔥 **Calorie Calculator**\n\n"
+               "I can estimate your daily calorie needs! Please tell me your:\n"
+               "• Weight and height\n"
+               "• Age and sex\n"
+               "• Activity level and goal (optional)\n\n"
+               "Example: \"I'm a 30 year old male, 80 kg and 180 cm, moderately active, want to lose weight\"")
+    
     def handle_nutrition_intent(self, text: str) -> str:
         """Handle nutrition-related queries"""
+        if CALORIE_TARGET_RE.search(text):
+            return self.handle_calorie_target(text)
+        
         food_item = self.extract_food_item(text)
         if not food_item:
-            return ("🍎 **Nutrition Information**\n\n"
+            return self.reply("nutrition_prompt",
+                   "🍎 **Nutrition Information**\n\n"
                    "Please specify a food item you'd like to know about!\n"
                    "Example: \"nutrition facts for chicken breast\" or \"calories in apple\"")
         
         nutrition_data = self.api_service.get_nutrition_info(food_item)
-        return self.api_service.format_nutrition_response(nutrition_data)
+        if "error" not in nutrition_data:
+            self.prefetch_follow_ups('nutrition', food_item.lower().strip())
+        return self.api_service.format_nutrition_response(nutrition_data, fmt=self.response_format)
     
     def handle_workout_intent(self, text: str) -> str:
         """Handle workout-related queries"""
         keywords = self.extract_exercise_keywords(text)
-        exercises = self.api_service.get_exercise_info(
-            exercise_type=keywords.get('type', ''),
-            muscle=keywords.get('muscle', '')
+        if not any(keywords.values()) or SEARCH_CONSTRAINT_RE.search(text):
+            # Nothing to filter on, or constraints the API filters can't carry:
+            # rank the local catalog on the whole question instead
+            exercises = search_exercises(text, SEARCH_RESULT_LIMIT)
+            if exercises:
+                pager = self.api_service.pager
+                key = ('search', text.lower().strip())
+                result_id = pager.lookup(key) or pager.store(key, exercises)
+                return self.show_exercise_page(self.api_service.paginate(result_id))
+        
+        page = self.api_service.get_exercise_page(
+            exercise_type=keywords.get('type') or '',
+            muscle=keywords.get('muscle') or '',
+            difficulty=keywords.get('difficulty') or ''
         )
-        return self.api_service.format_exercise_response(exercises)
+        if keywords.get('muscle'):
+            self.prefetch_follow_ups('exercise', keywords['muscle'])
+        return self.show_exercise_page(page)
+    
+    def prefetch_follow_ups(self, kind: str, key: str):
+        """Learn which lookup followed the last one and warm the likely next ones"""
+        previous = self.last_lookup.get(kind)
+        self.last_lookup[kind] = key
+        if not self.api_service.api_key:
+            return
+        api = self.api_service
+        if kind == 'exercise':
+            self.prefetcher.after_lookup(kind, previous, key,
+                                         lambda muscle: api.get_exercise_page(muscle=muscle),
+                                         lambda muscle: api.has_exercises(muscle=muscle))
+        else:
+            self.prefetcher.after_lookup(kind, previous, key, api.get_nutrition_info, api.has_nutrition_info)
+    
+    def handle_more_exercises(self, text: str) -> str:
+        """Show the next page of the last exercise results"""
+        if not self.exercise_cursor:
+            return self.reply("exercises_done",
+                   "✅ That's every exercise I have for that request.\n"
+                   "Try another muscle group or exercise type for more ideas!")
+        return self.show_exercise_page(self.api_service.get_exercise_page(cursor=self.exercise_cursor))
+    
+    def show_exercise_page(self, page: Dict) -> str:
+        """Remember a page of exercises for follow-ups and format it"""
+        exercises = page['exercises']
+        self.exercise_cursor = page.get('next_cursor')
+        names = [exercise['name'] for exercise in exercises if 'name' in exercise]
+        if names:
+            self.last_exercises = names
+        
+        response = self.api_service.format_exercise_response(exercises, start=page.get('offset', 0) + 1,
+                                                             fmt=self.response_format)
+        if self.exercise_cursor:
+            response = self.append_note(response, "\n👉 Say \"show me more\" for more exercises.")
+        return response
+    
+    def handle_similar_exercises(self, text: str) -> str:
+        """Suggest alternatives to the exercises shown last, from the neighbour table"""
+        similar = get_similar_exercises()
+        no_equipment = bool(NO_EQUIPMENT_RE.search(text))
+        suggestions = []
+        seen = set(name.lower() for name in self.last_exercises)
+        
+        for name in self.last_exercises:
+            if similar is None:
+                break
+            # Exercises from the API may not be in the local catalog; anchor on the closest one
+            if similar.row_for_name(name) is None:
+                matches = search_exercises(name, 1)
+                if not matches:
+                    continue
+                name = matches[0]['name']
+            for exercise in similar.similar(name, 2, no_equipment=no_equipment, exclude=seen):
+                seen.add(exercise['name'].lower())
+                suggestions.append(exercise)
+            if len(suggestions) >= 5:
+                break
+        
+        if not suggestions:
+            return self.reply("no_alternatives",
+                   "🤔 I couldn't find close alternatives to those exercises.\n"
+                   "Try asking for a muscle group, like \"Show me back exercises\".")
+        
+        self.last_exercises = [exercise['name'] for exercise in suggestions[:5]]
+        self.exercise_cursor = None
+        return self.api_service.format_exercise_response(suggestions[:5], fmt=self.response_format)
     
     def handle_motivation_intent(self, text: str) -> str:
         """Handle motivation-related queries"""
-        return self.motivation_service.format_motivation_response(text)
+        return self.reply("motivation", self.motivation_service.format_motivation_response(text, session_id=self.session_id))
     
     def handle_greeting_intent(self, text: str) -> str:
         """Handle greeting queries"""
-        return ("👋 **Hello! Welcome to your AI Fitness Assistant!** 🏋️‍♀️\n\n"
+        return self.reply("greeting",
+               "👋 **Hello! Welcome to your AI Fitness Assistant!** 🏋️‍♀️\n\n"
                "I'm here to help you with:\n"
                "• 💪 **Workout advice** - Get exercise recommendations\n"
                "• 🍎 **Nutrition info** - Learn about food calories and nutrients\n"
@@ -241,7 +374,8 @@ class FitnessChatbot:
     
     def handle_unknown_intent(self, text: str) -> str:
         """Handle unknown or unclear queries"""
-        return ("🤔 **I'm not sure how to help with that.**\n\n"
+        return self.reply("unknown",
+               "🤔 **I'm not sure how to help with that.**\n\n"
                "I can assist you with:\n"
                "• **Workouts**: \"Show me chest exercises\" or \"I want to build muscle\"\n"
                "• **Nutrition**: \"Calories in chicken breast\" or \"nutrition facts for apple\"\n"
@@ -252,39 +386,71 @@ class FitnessChatbot:
     def process_message(self, user_input: str) -> str:
         """Process user input and generate response"""
         if not user_input.strip():
-            return "Please enter a message!"
+            return self.reply("prompt", "Please enter a message!")
         
         # Check if we're waiting for BMI data
         if self.awaiting_bmi_data:
             bmi_data = self.extract_bmi_data(user_input)
             if bmi_data:
                 self.awaiting_bmi_data = False
-                return self.bmi_calculator.format_bmi_response(
-                    bmi_data['weight'], 
-                    bmi_data['height'], 
-                    bmi_data['unit_system']
-                )
+                return self.format_bmi_with_tdee(user_input, bmi_data)
             else:
-                return ("❌ I couldn't understand your weight and height. Please try again with a format like:\n"
-                       "\"I weigh 70 kg and I'm 1.75 meters tall\" or\n"
-                       "\"I weigh 154 lbs and I'm 5 feet 9 inches tall\"")
+                return render_error("I couldn't understand your weight and height. Please try again with a format like:\n"
+                                    "\"I weigh 70 kg and I'm 1.75 meters tall\" or\n"
+                                    "\"I weigh 154 lbs and I'm 5 feet 9 inches tall\"", self.response_format)
+        
+        # Details for a pending calorie-needs question
+        if self.awaiting_tdee_data:
+            entities = extract_entities(user_input)
+            if entities['weight'] or entities['height'] or entities['age'] or entities['sex']:
+                return self.handle_calorie_target(user_input)
+            self.awaiting_tdee_data = False
+        
+        # "Something similar" / "an alternative without equipment" after a workout answer
+        intent = None
+        if self.last_exercises:
+            if SIMILAR_REQUEST_RE.search(user_input):
+                return self.handle_similar_exercises(user_input)
+            if SIMILAR_HINT_RE.search(user_input):
+                intent, confidence = self.predict_intent(user_input)
+                if intent in ("workout", "unknown"):
+                    return self.handle_similar_exercises(user_input)
+        
+        # "Show me more" pages through the last exercise results
+        if self.last_exercises and MORE_REQUEST_RE.search(user_input):
+            return self.handle_more_exercises(user_input)
+        
+        # Answers to stateless questions are shared across sessions
+        cache_namespace = f"chatbot:{self.response_format}"
+        cached = self.response_cache.get(cache_namespace, user_input)
+        if cached is not None:
+            return cached
         
         # Predict intent
-        intent, confidence = self.predict_intent(user_input)
+        if intent is None:
+            intent, confidence = self.predict_intent(user_input)
         
         # Handle based on intent
         if intent == "workout":
             return self.handle_workout_intent(user_input)
         elif intent == "nutrition":
-            return self.handle_nutrition_intent(user_input)
+            response = self.handle_nutrition_intent(user_input)
+            # Calorie-target questions start a multi-message exchange
+            if not CALORIE_TARGET_RE.search(user_input):
+                self.response_cache.put(cache_namespace, user_input, intent, response)
+            return response
         elif intent == "bmi":
             return self.handle_bmi_intent(user_input)
         elif intent == "motivation":
             return self.handle_motivation_intent(user_input)
         elif intent == "greeting":
-            return self.handle_greeting_intent(user_input)
+            response = self.handle_greeting_intent(user_input)
+            self.response_cache.put(cache_namespace, user_input, intent, response)
+            return response
         else:
-            return self.handle_unknown_intent(user_input)
+            response = self.handle_unknown_intent(user_input)
+            self.response_cache.put(cache_namespace, user_input, "unknown", response)
+            return response
 
 # Test function
 def test_chatbot():
@@ -1,16 +1,52 @@
 import re
+import json
 import random
+import secrets
 from typing import Dict, Tuple, Optional
 from dotenv import load_dotenv
 from utils.api_service import APIService
 from utils.bmi_calculator import BMICalculator
 from utils.motivation_service import MotivationService
+from utils.phrase_index import get_phrase_index
+from utils.exercise_search import search_exercises
+from utils.response_cache import get_response_cache
+from utils.entity_extractor import extract_entities, to_bmi_data
+from utils.response_templates import append_note, render_error, render_message
 
 # Load environment variables
 load_dotenv()
 
+# Coarse muscle groups recognised in messages
+MUSCLE_GROUPS = ['chest', 'back', 'shoulders', 'arms', 'legs', 'abs', 'cardio']
+
+# Coarse muscle groups understood here -> API Ninjas muscle names
+VERCEL_MUSCLE_MAP = {'arms': 'biceps', 'legs': 'quadriceps', 'abs': 'abdominals', 'back': 'lats'}
+
+# Intents a bare follow-up ("what about legs?") continues when nothing else matches
+FOLLOW_UP_INTENTS = ('exercise_recommendation', 'nutrition_advice')
+
+# Exercises per answer, and the longest question remembered for "show me more"
+EXERCISE_PAGE_SIZE = 3
+# Measured as the JSON the state token carries (non-ASCII is escaped to 6-12
+# bytes a character), leaving room for the rest of the state within MAX_TOKEN_LENGTH
+MAX_PAGED_QUERY_BYTES = 400
+# Follow-ups asking for the next page of the exercises just shown
+MORE_REQUEST_RE = re.compile(r"\b(show|give|see)( me)? more\b|\bnext (page|ones?)\b|\bmore (exercises|results|options)\b|^\s*more\W*$", re.IGNORECASE)
+MORE_HINT = "\n👉 Say \"show me more\" for more exercises."
+
+# Training-data intents mapped onto this bot's intent names
+PHRASE_INTENT_MAP = {
+    'workout': 'exercise_recommendation',
+    'nutrition': 'nutrition_advice',
+    'bmi': 'bmi_calculation',
+    'motivation': 'motivation',
+    'greeting': 'general_health',
+}
+
 class FitnessChatbot:
-    def __init__(self):
+    def __init__(self, response_format: str = 'markdown'):
+        # markdown (default), plain or json for every answer; see utils.response_templates
+        self.response_format = response_format
         self.api_service = APIService()
         self.bmi_calculator = BMICalculator()
         self.motivation_service = MotivationService()
@@ -19,6 +55,14 @@ class FitnessChatbot:
         self.conversation_state = {}
         self.awaiting_bmi_data = False
         self.bmi_data = {}
+        self.last_intent = None
+        self.intent_source = None
+        # {'query': question, 'offset': next offset} while more exercises remain
+        self.more_exercises = None
+        # Keeps motivation quotes from repeating across requests; created on first use
+        self.session_id = None
+        self.phrase_index = get_phrase_index()
+        self.response_cache = get_response_cache()
         
         # Intent keywords mapping (lightweight alternative to ML)
         self.intent_keywords = {
@@ -51,7 +95,11 @@ class FitnessChatbot:
         return text
     
     def predict_intent(self, text: str) -> Tuple[str, float]:
-        """Predict intent using keyword matching (lightweight alternative)"""
+        """Predict intent using keyword matching (lightweight alternative)
+        
+        Sets intent_source to how the intent was found: 'keywords',
+        'phrases', 'context' (carried over from last_intent) or 'default'.
+        """
         preprocessed_text = self.preprocess_text(text)
         words = preprocessed_text.split()
         
@@ -71,64 +119,228 @@ class FitnessChatbot:
         if intent_scores:
             best_intent = max(intent_scores, key=intent_scores.get)
             confidence = intent_scores[best_intent]
+            self.intent_source = 'keywords'
             return best_intent, confidence
-        else:
-            return 'general_health', 0.3
+        
+        # No keyword hit: fall back to the nearest training phrase
+        if self.phrase_index:
+            phrase_intent, similarity = self.phrase_index.predict_intent(text)
+            if phrase_intent in PHRASE_INTENT_MAP:
+                self.intent_source = 'phrases'
+                return PHRASE_INTENT_MAP[phrase_intent], similarity
+        
+        if self.last_intent in FOLLOW_UP_INTENTS:
+            self.intent_source = 'context'
+            return self.last_intent, 0.3
+        self.intent_source = 'default'
+        return 'general_health', 0.3
+    
+    def export_state(self) -> Dict:
+        """Pending-slot state and context to carry in a state token (utils.state_token)"""
+        state = {}
+        if self.awaiting_bmi_data:
+            state['pending'] = 'bmi'
+            if self.bmi_data:
+                state['bmi'] = self.bmi_data
+        if self.last_intent:
+            state['intent'] = self.last_intent
+        if self.more_exercises:
+            state['more'] = self.more_exercises
+        if self.session_id:
+            state['session'] = self.session_id
+        return state
+    
+    def load_state(self, state: Dict):
+        """Restore what export_state produced on a previous request"""
+        self.awaiting_bmi_data = state.get('pending') == 'bmi'
+        bmi_data = state.get('bmi')
+        self.bmi_data = {}
+        if isinstance(bmi_data, dict):
+            for slot in ('weight', 'height'):
+                value = bmi_data.get(slot)
+                if isinstance(value, list) and len(value) == 2:
+                    self.bmi_data[slot] = value
+        intent = state.get('intent')
+        self.last_intent = intent if intent in self.intent_keywords else None
+        more = state.get('more')
+        self.more_exercises = None
+        if isinstance(more, dict) and isinstance(more.get('query'), str) and isinstance(more.get('offset'), int):
+            self.more_exercises = {'query': more['query'], 'offset': more['offset']}
+        session_id = state.get('session')
+        self.session_id = session_id if isinstance(session_id, str) and len(session_id) <= 32 else None
+    
+    @property
+    def cache_namespace(self) -> str:
+        return f"vercel:{self.response_format}"
+    
+    def reply(self, kind: str, text: str) -> str:
+        """A free-form (markdown) answer in the requested response format"""
+        return render_message(text, kind, self.response_format)
+    
+    def offers_more(self, response: str) -> bool:
+        """Whether an exercise answer ends with the "show me more" offer"""
+        if self.response_format == 'json':
+            return response.startswith('{') and 'note' in json.loads(response)
+        return response.endswith(append_note('', MORE_HINT, self.response_format))
+    
+    def cached_response(self, user_input: str) -> Optional[str]:
+        """Shared cached answer for a message, restoring the paging state it implies"""
+        cached = self.response_cache.get(self.cache_namespace, user_input)
+        if cached is not None:
+            # A cached first page with more behind it: "show me more" must still work
+            more = self.offers_more(cached)
+            self.more_exercises = {'query': user_input, 'offset': EXERCISE_PAGE_SIZE} if more else None
+        return cached
+    
+    def classify(self, user_input: str) -> Dict:
+        """Intent, confidence and intent_source, without the entities"""
+        intent, confidence = self.predict_intent(user_input)
+        return {'intent': intent, 'confidence': confidence, 'source': self.intent_source}
+    
+    def analyze(self, user_input: str, classification: Optional[Dict] = None) -> Dict:
+        """The CPU-bound part of a turn: intent and entities
+        
+        async_server runs this in worker processes; the result can be passed
+        back to generate_response. A `classification` already made is reused.
+        """
+        return {**(classification or self.classify(user_input)), 'entities': extract_entities(user_input)}
     
-    def generate_response(self, user_input: str) -> str:
-        """Generate response based on predicted intent"""
+    def generate_response(self, user_input: str, analysis: Optional[Dict] = None) -> str:
+        """Generate response based on predicted intent
+        
+        With a precomputed `analysis` (see analyze) the intent and entities are
+        not recomputed, and the response cache is not consulted again: the
+        caller is expected to have checked it before analysing.
+        """
         try:
-            intent, confidence = self.predict_intent(user_input)
+            entities = analysis['entities'] if analysis else None
             
-            # Handle BMI calculation flow
+            # Handle BMI calculation flow, unless the message clearly asks something else
             if self.awaiting_bmi_data:
-                return self.handle_bmi_input(user_input)
+                entities = entities or extract_entities(user_input)
+                if entities['weight'] or entities['height'] or not self.leaves_bmi_flow(user_input, analysis):
+                    return self.handle_bmi_input(user_input, entities)
+                self.awaiting_bmi_data = False
+                self.bmi_data = {}
+            
+            more, self.more_exercises = self.more_exercises, None
+            if more and MORE_REQUEST_RE.search(user_input):
+                self.last_intent = 'exercise_recommendation'
+                return self.get_exercise_recommendation(more['query'], more['offset'])
+            
+            if analysis is None:
+                cached = self.cached_response(user_input)
+                if cached is not None:
+                    return cached
+                intent, confidence = self.predict_intent(user_input)
+                source = self.intent_source
+            else:
+                intent, confidence, source = analysis['intent'], analysis['confidence'], analysis.get('source')
+            self.last_intent = intent
+            # "What about legs?" means something else in another conversation: keep it out of the shared cache
+            cacheable = source != 'context'
             
             if intent == 'exercise_recommendation':
-                return self.get_exercise_recommendation(user_input)
+                response = self.get_exercise_recommendation(user_input)
+                if cacheable and not MORE_REQUEST_RE.search(user_input):
+                    self.response_cache.put(self.cache_namespace, user_input, intent, response)
+                return response
             elif intent == 'nutrition_advice':
-                return self.get_nutrition_advice(user_input)
+                nutrition = self.lookup_nutrition(user_input)
+                if nutrition is None:
+                    # Only food lookups are stable; the fallback is a random tip
+                    return self.reply('nutrition_tip', self.get_general_nutrition_advice())
+                response = self.api_service.format_nutrition_response(nutrition, fmt=self.response_format)
+                if cacheable:
+                    self.response_cache.put(self.cache_namespace, user_input, intent, response)
+                return response
             elif intent == 'bmi_calculation':
-                return self.initiate_bmi_calculation()
+                return self.initiate_bmi_calculation(user_input, entities)
             elif intent == 'motivation':
-                return self.motivation_service.get_motivational_quote()
+                self.session_id = self.session_id or secrets.token_urlsafe(8)
+                return self.reply('motivation', self.motivation_service.format_motivation_response(
+                    user_input, session_id=self.session_id))
             else:
-                return self.get_general_health_advice()
+                return self.reply('health_tip', self.get_general_health_advice())
                 
         except Exception as e:
-            return f"I'm sorry, I encountered an error. Please try asking your question differently. Error: {str(e)}"
+            return render_error("I'm sorry, I encountered an error. Please try asking your question differently. "
+                                f"Error: {str(e)}", self.response_format)
     
-    def get_exercise_recommendation(self, user_input: str) -> str:
-        """Get exercise recommendations"""
+    def leaves_bmi_flow(self, user_input: str, analysis: Optional[Dict] = None) -> bool:
+        """Whether a message without measurements is confidently about another intent"""
+        if analysis is None:
+            intent, _ = self.predict_intent(user_input)
+            source = self.intent_source
+        else:
+            intent, source = analysis['intent'], analysis.get('source')
+        return intent != 'bmi_calculation' and source in ('keywords', 'phrases')
+    
+    def get_exercise_recommendation(self, user_input: str, offset: int = 0) -> str:
+        """Get exercise recommendations, skipping the first `offset` (for "show me more" pages)"""
         try:
             # Extract muscle group or exercise type from input
-            muscle_groups = ['chest', 'back', 'shoulders', 'arms', 'legs', 'abs', 'cardio']
             detected_muscle = None
             
-            for muscle in muscle_groups:
+            for muscle in MUSCLE_GROUPS:
                 if muscle in user_input.lower():
                     detected_muscle = muscle
                     break
             
             if not detected_muscle:
+                # Rank the local catalog for free-text questions before defaulting
+                exercises = search_exercises(user_input, offset + EXERCISE_PAGE_SIZE + 1)
+                if exercises[offset:]:
+                    response = self.api_service.format_exercise_response(
+                        exercises[offset:offset + EXERCISE_PAGE_SIZE], offset + 1, fmt=self.response_format)
+                    if len(exercises) > offset + EXERCISE_PAGE_SIZE:
+                        response = self.offer_more(response, user_input, offset + EXERCISE_PAGE_SIZE)
+                    return response
+                if offset:
+                    return self.reply('exercises_done', "✅ That's every exercise I have for that request.")
                 detected_muscle = 'chest'  # default
             
-            exercises = self.api_service.get_exercises_by_muscle(detected_muscle)
+            # Map the coarse groups onto the API's muscle/type names
+            if detected_muscle == 'cardio':
+                page = self.api_service.get_exercise_page(exercise_type='cardio', page_size=EXERCISE_PAGE_SIZE,
+                                                          offset=offset)
+            else:
+                page = self.api_service.get_exercise_page(
+                    muscle=VERCEL_MUSCLE_MAP.get(detected_muscle, detected_muscle), page_size=EXERCISE_PAGE_SIZE,
+                    offset=offset)
+            exercises = [exercise for exercise in page['exercises'] if 'name' in exercise]
             if exercises:
-                response = f"Here are some great {detected_muscle} exercises for you:\n\n"
-                for i, exercise in enumerate(exercises[:3], 1):
-                    response += f"{i}. **{exercise.get('name', 'Unknown')}**\n"
-                    response += f"   Equipment: {exercise.get('equipment', 'None')}\n"
-                    response += f"   Instructions: {exercise.get('instructions', 'Follow proper form')}\n\n"
+                response = self.api_service.format_exercise_response(exercises, offset + 1, fmt=self.response_format)
+                if page.get('next_cursor'):
+                    response = self.offer_more(response, user_input, offset + len(exercises))
                 return response
+            elif offset:
+                return self.reply('exercises_done', "✅ That's every exercise I have for that request.")
             else:
-                return self.get_fallback_exercises(detected_muscle)
+                return self.reply('fallback_exercises', self.get_fallback_exercises(detected_muscle))
                 
         except Exception as e:
-            return f"I couldn't fetch exercises right now. Here's a basic {detected_muscle or 'general'} exercise: Push-ups are great for building upper body strength!"
+            # Error answers are never cached
+            return render_error(f"I couldn't fetch exercises right now. Here's a basic {detected_muscle or 'general'} "
+                                "exercise: Push-ups are great for building upper body strength!", self.response_format)
+    
+    def offer_more(self, response: str, user_input: str, offset: int) -> str:
+        """Remember where the next page starts (carried in the state token) and say so"""
+        if len(json.dumps(user_input)) > MAX_PAGED_QUERY_BYTES:
+            return response
+        self.more_exercises = {'query': user_input, 'offset': offset}
+        return append_note(response, MORE_HINT, self.response_format)
+    
+    def degraded_response(self, user_input: str, intent: str) -> str:
+        """Answer an upstream-bound intent from local data only (when the server sheds load)"""
+        note = "⚠️ I'm very busy right now, so here's a quick answer from my offline notes.\n\n"
+        if intent == 'exercise_recommendation':
+            muscle = next((muscle for muscle in MUSCLE_GROUPS if muscle in user_input.lower()), 'chest')
+            return self.reply('degraded', note + self.get_fallback_exercises(muscle))
+        return self.reply('degraded', note + self.get_general_nutrition_advice())
     
-    def get_nutrition_advice(self, user_input: str) -> str:
-        """Get nutrition advice"""
+    def lookup_nutrition(self, user_input: str) -> Optional[Dict]:
+        """Nutrition data for a food named in the message, or None"""
         try:
             # Extract food item from input
             words = user_input.lower().split()
@@ -145,48 +357,55 @@ class FitnessChatbot:
             
             if detected_food:
                 nutrition = self.api_service.get_nutrition_info(detected_food)
-                if nutrition:
-                    response = f"Nutrition information for {detected_food}:\n\n"
-                    for item in nutrition[:3]:
-                        response += f"**{item.get('name', detected_food)}** (per 100g):\n"
-                        response += f"• Calories: {item.get('calories', 'N/A')}\n"
-                        response += f"• Protein: {item.get('protein_g', 'N/A')}g\n"
-                        response += f"• Carbs: {item.get('carbohydrates_total_g', 'N/A')}g\n"
-                        response += f"• Fat: {item.get('fat_total_g', 'N/A')}g\n\n"
-                    return response
-            
-            return self.get_general_nutrition_advice()
+                if nutrition and "error" not in nutrition:
+                    return nutrition
+            return None
             
         except Exception as e:
-            return "Here's some general nutrition advice: Focus on a balanced diet with plenty of vegetables, lean proteins, whole grains, and adequate hydration!"
+            return None
     
-    def initiate_bmi_calculation(self) -> str:
+    def initiate_bmi_calculation(self, user_input: str = "", entities: Optional[Dict] = None) -> str:
         """Start BMI calculation process"""
         self.awaiting_bmi_data = True
         self.bmi_data = {}
-        return "I'd be happy to help you calculate your BMI! Please provide your height and weight. For example: 'I am 170 cm tall and weigh 70 kg' or 'I am 5'8\" and weigh 150 lbs'"
+        if user_input:
+            entities = entities or extract_entities(user_input)
+            if entities['weight'] or entities['height']:
+                return self.handle_bmi_input(user_input, entities)
+        return self.reply('bmi_prompt', "I'd be happy to help you calculate your BMI! Please provide your height and weight. For example: 'I am 170 cm tall and weigh 70 kg' or 'I am 5'8\" and weigh 150 lbs'")
     
-    def handle_bmi_input(self, user_input: str) -> str:
-        """Handle BMI calculation input"""
+    def handle_bmi_input(self, user_input: str, entities: Optional[Dict] = None) -> str:
+        """Handle BMI calculation input
+        
+        Weight and height may arrive in separate messages; whichever was
+        given is kept in bmi_data until both are known.
+        """
         try:
-            height, weight, height_unit, weight_unit = self.bmi_calculator.parse_measurements(user_input)
+            entities = entities or extract_entities(user_input)
+            for slot in ('weight', 'height'):
+                if entities[slot]:
+                    self.bmi_data[slot] = list(entities[slot])
             
-            if height and weight:
-                bmi, category = self.bmi_calculator.calculate_bmi(height, weight, height_unit, weight_unit)
+            weight, height = self.bmi_data.get('weight'), self.bmi_data.get('height')
+            bmi_data = to_bmi_data(tuple(weight) if weight else None, tuple(height) if height else None)
+            if bmi_data:
                 self.awaiting_bmi_data = False
-                
-                response = f"**BMI Calculation Results:**\n\n"
-                response += f"• Your BMI: **{bmi:.1f}**\n"
-                response += f"• Category: **{category}**\n\n"
-                response += self.bmi_calculator.get_bmi_advice(category)
-                
-                return response
+                self.bmi_data = {}
+                return self.bmi_calculator.format_bmi_response(bmi_data['weight'], bmi_data['height'],
+                                                               bmi_data['unit_system'], fmt=self.response_format)
+            elif weight:
+                return self.reply('bmi_prompt', "Got your weight. How tall are you? For example: '170 cm' or '5 feet 8 inches'")
+            elif height:
+                return self.reply('bmi_prompt', "Got your height. How much do you weigh? For example: '70 kg' or '150 lbs'")
             else:
-                return "I couldn't understand your measurements. Please try again with format like: 'I am 170 cm and 70 kg' or '5 feet 8 inches, 150 pounds'"
+                return render_error("I couldn't understand your measurements. Please try again with format like: "
+                                    "'I am 170 cm and 70 kg' or '5 feet 8 inches, 150 pounds'", self.response_format)
                 
         except Exception as e:
             self.awaiting_bmi_data = False
-            return "Sorry, I couldn't calculate your BMI. Please try again with your height and weight."
+            self.bmi_data = {}
+            return render_error("Sorry, I couldn't calculate your BMI. Please try again with your height and weight.",
+                                self.response_format)
     
     def get_general_health_advice(self) -> str:
         """Provide general health advice"""
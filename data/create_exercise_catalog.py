@@ -0,0 +1,72 @@
+"""
+Build the binary exercise catalog from exercise_catalog.json.
+
+The JSON file is the editable source; the app reads the compact
+exercise_catalog.bin written next to it (see utils/exercise_catalog.py),
+plus exercise_neighbors.bin, the precomputed "similar exercises" table
+(see utils/exercise_neighbors.py). Building the table needs scikit-learn.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.exercise_catalog import write_catalog
+from utils.exercise_neighbors import file_crc32, write_neighbor_table
+from utils.exercise_search import EQUIPMENT_TERMS, FIELD_WEIGHTS, tokenize
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+NEIGHBORS_K = 10
+
+def exercise_features(record):
+    """Weighted text tokens plus one token per categorical field"""
+    tokens = []
+    for field, weight in FIELD_WEIGHTS:
+        value = record[field]
+        if field == 'equipment':
+            value = f"{value} {EQUIPMENT_TERMS.get(value, '')}"
+        tokens.extend(tokenize(value) * weight)
+    for field in ('muscle', 'type', 'difficulty', 'equipment'):
+        tokens.extend([f"{field}={record[field]}"] * 2)
+    return tokens
+
+def build_neighbors(records, k=NEIGHBORS_K, batch_size=2048):
+    """Top-k cosine neighbours of every exercise, computed in row batches"""
+    vectorizer = TfidfVectorizer(analyzer=exercise_features, sublinear_tf=True, dtype=np.float32)
+    matrix = vectorizer.fit_transform(records)
+    k = min(k, len(records) - 1)
+
+    neighbors, scores = [], []
+    for start in range(0, len(records), batch_size):
+        similarities = (matrix[start:start + batch_size] @ matrix.T).toarray()
+        for offset, row in enumerate(similarities):
+            row[start + offset] = -1.0  # never your own neighbour
+            top = np.argpartition(-row, k)[:k] if k < len(row) else np.arange(len(row))
+            top = top[np.argsort(-row[top])]
+            top = top[row[top] > 0]
+            neighbors.append(top.tolist())
+            scores.append(row[top].tolist())
+    return neighbors, scores, k
+
+def main(source=os.path.join(DATA_DIR, 'exercise_catalog.json'),
+         target=os.path.join(DATA_DIR, 'exercise_catalog.bin'),
+         neighbors_target=os.path.join(DATA_DIR, 'exercise_neighbors.bin')):
+    with open(source, encoding='utf-8') as f:
+        records = json.load(f)
+
+    write_catalog(records, target)
+
+    print(f"Exercise catalog written with {len(records)} exercises ({os.path.getsize(target)} bytes)")
+
+    neighbors, scores, k = build_neighbors(records)
+    write_neighbor_table(neighbors_target, neighbors, scores, k, file_crc32(target))
+
+    print(f"Neighbour table written with top-{k} similar exercises per entry")
+
+if __name__ == "__main__":
+    main(*sys.argv[1:4])
@@ -1,7 +1,14 @@
+"""
+Intent training data, shared by train_model.py and this script.
+
+Running this file writes the data to training_data.csv next to it.
+"""
+import os
+
 import pandas as pd
 
 # Training data for intent classification
-training_data = [
+TRAINING_DATA = [
     # Workout/Exercise intents
     ("show me chest exercises", "workout"),
     ("what are good arm workouts", "workout"),
@@ -133,12 +140,16 @@ training_data = [
     ("nice to meet you", "greeting"),
 ]
 
-# Create DataFrame
-df = pd.DataFrame(training_data, columns=['text', 'intent'])
+def main():
+    # Create DataFrame
+    df = pd.DataFrame(TRAINING_DATA, columns=['text', 'intent'])
+
+    # Save to CSV
+    df.to_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'training_data.csv'), index=False)
 
-# Save to CSV
-df.to_csv('training_data.csv', index=False)
+    print(f"Training data created with {len(TRAINING_DATA)} samples")
+    print("Intent distribution:")
+    print(df['intent'].value_counts())
 
-print(f"Training data created with {len(training_data)} samples")
-print("Intent distribution:")
-print(df['intent'].value_counts())
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Parallel model selection for the intent classifier.
+
+Runs a grid of vectorizer and classifier settings with stratified
+cross-validation across all cores. Text is preprocessed once and every
+vectorized fold is cached (in memory and on disk through joblib.Memory), so
+classifier settings that share a vectorizer reuse the same matrices. The
+result is a leaderboard of accuracy against inference latency and model size.
+
+Usage:
+    python model_selection.py
+    python model_selection.py --min-accuracy 0.85 --save-best models/logistic_regression_model.pkl
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import pickle
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Memory, Parallel, delayed
+from sklearn.base import clone
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.model_selection import StratifiedKFold
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+from train_model import IntentClassifier
+
+VECTORIZER_GRID = [
+    {'ngram_range': ngram_range, 'max_features': max_features, 'sublinear_tf': sublinear_tf,
+     'lowercase': True, 'stop_words': 'english'}
+    for ngram_range, max_features, sublinear_tf in itertools.product(
+        [(1, 1), (1, 2)], [1000, 5000], [False, True]
+    )
+]
+
+CLASSIFIER_GRID = [
+    ('naive_bayes', MultinomialNB(), {'alpha': [0.1, 0.5, 1.0]}),
+    ('logistic', LogisticRegression(random_state=42, max_iter=1000), {'C': [1.0, 10.0]}),
+    ('sgd', SGDClassifier(loss='log_loss', random_state=42), {'alpha': [1e-4, 1e-5]}),
+]
+
+LATENCY_SAMPLES = [
+    "show me chest exercises",
+    "calories in chicken breast",
+    "calculate my bmi",
+    "i need motivation",
+    "hello there",
+]
+
+
+def expand_classifier_grid() -> List[Tuple[str, object]]:
+    """Turn CLASSIFIER_GRID into (label, unfitted estimator) pairs"""
+    configs = []
+    for name, estimator, grid in CLASSIFIER_GRID:
+        keys = sorted(grid)
+        for values in itertools.product(*(grid[key] for key in keys)):
+            params = dict(zip(keys, values))
+            label = name + '(' + ', '.join(f"{k}={v}" for k, v in params.items()) + ')'
+            configs.append((label, clone(estimator).set_params(**params)))
+    return configs
+
+
+def vectorize_fold(vectorizer_params: Dict, texts: List[str], train_idx: np.ndarray, test_idx: np.ndarray):
+    """Fit a vectorizer on one training fold and transform both halves"""
+    vectorizer = TfidfVectorizer(**vectorizer_params)
+    X_train = vectorizer.fit_transform([texts[i] for i in train_idx])
+    X_test = vectorizer.transform([texts[i] for i in test_idx])
+    return X_train, X_test
+
+
+def score_classifier(estimator, folds, labels: np.ndarray) -> List[float]:
+    """Cross-validate one classifier against the cached fold matrices"""
+    scores = []
+    for (X_train, X_test), (train_idx, test_idx) in folds:
+        model = clone(estimator).fit(X_train, labels[train_idx])
+        scores.append(float((model.predict(X_test) == labels[test_idx]).mean()))
+    return scores
+
+
+def measure_pipeline(pipeline: Pipeline, samples: List[str], repeats: int = 200) -> Dict[str, float]:
+    """Per-message latency and pickled size of a fitted pipeline"""
+    timings = []
+    for i in range(repeats):
+        text = samples[i % len(samples)]
+        start = time.perf_counter()
+        pipeline.predict_proba([text])
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'latency_p50_ms': float(np.percentile(timings, 50) * 1000),
+        'latency_p99_ms': float(np.percentile(timings, 99) * 1000),
+        'model_size_kb': len(pickle.dumps(pipeline)) / 1024,
+    }
+
+
+class ModelSelector:
+    def __init__(self, n_splits: int = 5, n_jobs: int = -1, cache_dir: str = '.cache/model_selection'):
+        self.n_splits = n_splits
+        self.n_jobs = n_jobs
+        self.preprocessor = IntentClassifier()
+        self.memory = Memory(cache_dir, verbose=0) if cache_dir else Memory(None)
+        self.text_cache = {}
+
+    def preprocess_all(self, texts: List[str]) -> List[str]:
+        """Preprocess each distinct text once, shared by every configuration"""
+        for text in set(texts) - self.text_cache.keys():
+            self.text_cache[text] = self.preprocessor.preprocess_text(text)
+        return [self.text_cache[text] for text in texts]
+
+    def run(self, df: pd.DataFrame) -> List[Dict]:
+        """Cross-validate the whole grid and return leaderboard rows"""
+        texts = self.preprocess_all(df['text'].tolist())
+        labels = df['intent'].to_numpy()
+
+        splitter = StratifiedKFold(n_splits=self.n_splits, shuffle=True, random_state=42)
+        splits = list(splitter.split(texts, labels))
+
+        # Vectorize every (vectorizer, fold) pair once; classifiers reuse these
+        cached_vectorize = self.memory.cache(vectorize_fold)
+        jobs = list(itertools.product(range(len(VECTORIZER_GRID)), range(len(splits))))
+        print(f"Vectorizing {len(jobs)} (vectorizer, fold) combinations...")
+        matrices = Parallel(n_jobs=self.n_jobs)(
+            delayed(cached_vectorize)(VECTORIZER_GRID[v], texts, *splits[f]) for v, f in jobs
+        )
+        fold_cache = {}
+        for (v, f), fold in zip(jobs, matrices):
+            fold_cache.setdefault(v, [None] * len(splits))[f] = (fold, splits[f])
+
+        classifiers = expand_classifier_grid()
+        configs = list(itertools.product(range(len(VECTORIZER_GRID)), classifiers))
+        print(f"Cross-validating {len(configs)} configurations on {self.n_splits} folds...")
+        all_scores = Parallel(n_jobs=self.n_jobs)(
+            delayed(score_classifier)(estimator, fold_cache[v], labels) for v, (_, estimator) in configs
+        )
+
+        # Latency is measured sequentially so parallel jobs don't skew it
+        print("Measuring inference latency and model size...")
+        leaderboard = []
+        for (v, (label, estimator)), scores in zip(configs, all_scores):
+            pipeline = Pipeline([
+                ('tfidf', TfidfVectorizer(**VECTORIZER_GRID[v])),
+                ('clf', clone(estimator))
+            ]).fit(texts, labels)
+            vectorizer_params = VECTORIZER_GRID[v]
+            leaderboard.append({
+                'vectorizer': (f"ngram={vectorizer_params['ngram_range']}, "
+                               f"max_features={vectorizer_params['max_features']}, "
+                               f"sublinear_tf={vectorizer_params['sublinear_tf']}"),
+                'classifier': label,
+                'accuracy_mean': float(np.mean(scores)),
+                'accuracy_std': float(np.std(scores)),
+                **measure_pipeline(pipeline, self.preprocess_all(LATENCY_SAMPLES)),
+                'pipeline': pipeline,
+            })
+
+        leaderboard.sort(key=lambda row: (-row['accuracy_mean'], row['latency_p50_ms']))
+        return leaderboard
+
+
+def pick_fastest_adequate(leaderboard: List[Dict], min_accuracy: float) -> Dict:
+    """Fastest configuration whose accuracy clears the threshold"""
+    adequate = [row for row in leaderboard if row['accuracy_mean'] >= min_accuracy]
+    return min(adequate or leaderboard[:1], key=lambda row: row['latency_p50_ms'])
+
+
+def write_leaderboard(leaderboard: List[Dict], output_dir: str = 'reports'):
+    """Write the leaderboard as CSV and JSON"""
+    os.makedirs(output_dir, exist_ok=True)
+    rows = [{k: v for k, v in row.items() if k != 'pipeline'} for row in leaderboard]
+
+    with open(os.path.join(output_dir, 'model_selection.json'), 'w') as f:
+        json.dump(rows, f, indent=2)
+
+    with open(os.path.join(output_dir, 'model_selection.csv'), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"Leaderboard written to {output_dir}/model_selection.json and .csv")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel grid search over intent classifier settings")
+    parser.add_argument('--data', default='data/training_data.csv')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=-1, help="parallel workers (-1 uses every core)")
+    parser.add_argument('--cache-dir', default='.cache/model_selection', help="'' disables the disk cache")
+    parser.add_argument('--min-accuracy', type=float, default=None,
+                        help="accuracy floor for the pick (default: best accuracy minus 0.02)")
+    parser.add_argument('--save-best', default=None, help="pickle the picked pipeline to this path")
+    parser.add_argument('--output-dir', default='reports')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    selector = ModelSelector(n_splits=args.folds, n_jobs=args.jobs, cache_dir=args.cache_dir)
+    leaderboard = selector.run(df)
+
+    print(f"\n{'Accuracy':>9} {'p50 ms':>8} {'Size KB':>8}  Configuration")
+    for row in leaderboard:
+        print(f"{row['accuracy_mean']:>9.3f} {row['latency_p50_ms']:>8.3f} {row['model_size_kb']:>8.1f}  "
+              f"{row['classifier']} | {row['vectorizer']}")
+
+    write_leaderboard(leaderboard, args.output_dir)
+
+    min_accuracy = args.min_accuracy
+    if min_accuracy is None:
+        min_accuracy = leaderboard[0]['accuracy_mean'] - 0.02
+    best = pick_fastest_adequate(leaderboard, min_accuracy)
+    print(f"\nFastest model with accuracy >= {min_accuracy:.3f}: {best['classifier']} | {best['vectorizer']} "
+          f"({best['accuracy_mean']:.3f} accuracy, {best['latency_p50_ms']:.3f} ms)")
+
+    if args.save_best:
+        os.makedirs(os.path.dirname(args.save_best) or '.', exist_ok=True)
+        with open(args.save_best, 'wb') as f:
+            pickle.dump(best['pipeline'], f)
+        print(f"Saved picked pipeline to {args.save_best}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 // Chat functionality
 let messages = [];
+// Signed conversation state from the last response, echoed back on the next request
+let stateToken = null;
 
 // API Configuration
 const API_BASE_URL = '/api/chat'; // This will be our Python backend endpoint
@@ -45,7 +47,7 @@ async function sendMessage() {
             },
             body: JSON.stringify({
                 message: message,
-                conversation_history: messages.slice(-10) // Send last 10 messages for context
+                state: stateToken
             })
         });
         
@@ -54,6 +56,7 @@ async function sendMessage() {
         }
         
         const data = await response.json();
+        stateToken = data.state || null;
         
         // Add bot response to chat
         addMessage('bot', data.response || 'Sorry, I encountered an error. Please try again.');
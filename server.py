@@ -1,14 +1,133 @@
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from collections import deque
+import gc
 import json
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
 import urllib.parse
 import os
 from chatbot_vercel import FitnessChatbot
+from utils.exercise_catalog import get_catalog
+from utils.exercise_search import get_exercise_search
+from utils.phrase_index import get_phrase_index
+from utils.admission import get_admission_controller, lane_for
+from utils.persistent_cache import get_persistent_cache
+from utils.response_cache import get_response_cache
+from utils.response_templates import FORMATS
+from utils.state_token import get_state_signer
+from utils.warmup import WarmUp, get_query_log, warmup_queries
+
+# Set when the server starts with WARMUP=1; /ready reports 503 until it finishes
+warmup = None
+
+# Worker processes sharing the listening socket (1 = serve in this process)
+WORKERS = int(os.environ.get('WORKERS', 1))
+# A worker that dies sooner than this after starting is restarted with a delay
+MIN_WORKER_UPTIME = 5
+RESTART_DELAY = 1
+# Seconds a shed client is asked to wait before retrying
+RETRY_AFTER = 2
+# Connections served at once per worker; more are refused before any work is done
+MAX_CONNECTIONS = int(os.environ.get('MAX_CONNECTIONS', 64))
+BUSY_BODY = json.dumps({'error': 'Server busy, please retry shortly', 'status': 'error'}).encode('utf-8')
+# Refused sockets kept half-open so clients still sending can read the 503
+MAX_LINGERING = 64
+BUSY_RESPONSE = (f"HTTP/1.0 503 Service Unavailable\r\nContent-Type: application/json\r\n"
+                 f"Retry-After: {RETRY_AFTER}\r\nContent-Length: {len(BUSY_BODY)}\r\n"
+                 f"Connection: close\r\n\r\n").encode('latin-1') + BUSY_BODY
+
+class BoundedHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with at most `max_connections` handler threads
+    
+    A connection over the limit gets an immediate 503 from the accept loop,
+    without a thread, a parsed request or any chatbot work.
+    """
+    def __init__(self, server_address, handler_class, max_connections: int = MAX_CONNECTIONS):
+        super().__init__(server_address, handler_class)
+        self.max_connections = max_connections
+        self.connection_slots = threading.BoundedSemaphore(max_connections)
+        self.active = 0
+        self.refused = 0
+        self._count_lock = threading.Lock()
+        self._lingering = deque()
+    
+    def process_request(self, request, client_address):
+        if not self.connection_slots.acquire(blocking=False):
+            self.refuse(request)
+            return
+        with self._count_lock:
+            self.active += 1
+        try:
+            super().process_request(request, client_address)
+        except BaseException:
+            self.release_slot()
+            raise
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.release_slot()
+    
+    def refuse(self, request):
+        """Answer 503 and half-close; the socket is closed once later refusals push it out"""
+        self.refused += 1
+        try:
+            request.sendall(BUSY_RESPONSE)
+            request.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        # Closing now would reset a client still writing its request before it reads the 503
+        self._lingering.append(request)
+        while len(self._lingering) > MAX_LINGERING:
+            self.close_request(self._lingering.popleft())
+    
+    def server_close(self):
+        super().server_close()
+        while self._lingering:
+            self.close_request(self._lingering.popleft())
+    
+    def release_slot(self):
+        with self._count_lock:
+            self.active -= 1
+        self.connection_slots.release()
+    
+    def stats(self) -> dict:
+        return {'max': self.max_connections, 'active': self.active, 'refused': self.refused}
 
 class ChatHandler(SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         self.chatbot = FitnessChatbot()
         super().__init__(*args, **kwargs)
     
+    def do_GET(self):
+        if self.path == '/ready':
+            self.handle_ready()
+        elif self.path == '/metrics':
+            self.send_json(200, {
+                'pid': os.getpid(),
+                'connections': self.server.stats(),
+                'admission': get_admission_controller().stats(),
+                'response_cache': get_response_cache().stats(),
+                'warmup': warmup.status() if warmup else None,
+            })
+        else:
+            super().do_GET()
+    
+    def handle_ready(self):
+        status = warmup.status() if warmup else {'ready': True}
+        self.send_json(200 if status['ready'] else 503, status)
+    
+    def send_json(self, code: int, payload: dict):
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode('utf-8'))
+    
     def do_POST(self):
         if self.path == '/api/chat':
             self.handle_chat()
@@ -24,11 +143,52 @@ class ChatHandler(SimpleHTTPRequestHandler):
             post_data = self.rfile.read(content_length)
             data = json.loads(post_data.decode('utf-8'))
             
-            # Get user message
+            # Get user message and the answer format (markdown, plain or json)
             user_message = data.get('message', '')
+            response_format = data.get('format', 'markdown')
+            if response_format not in FORMATS:
+                self.send_json(400, {'error': f"format must be one of {', '.join(FORMATS)}", 'status': 'error'})
+                return
+            get_query_log().record(user_message)
+            
+            # Generate response using chatbot, restoring the conversation from the client's state token
+            signer = get_state_signer()
+            self.chatbot.load_state(signer.decode(data.get('state')))
+            self.chatbot.response_format = response_format
+            response = None
+            degraded = False
+            if not self.chatbot.awaiting_bmi_data:
+                response = self.chatbot.cached_response(user_message)
+            
+            if response is None:
+                # Admit by lane: API-bound intents must not starve the local ones.
+                # Only the intent is needed to pick one; entities wait for admission
+                classification = self.chatbot.classify(user_message)
+                in_bmi_flow = (self.chatbot.awaiting_bmi_data
+                               and not self.chatbot.leaves_bmi_flow(user_message, classification))
+                lane = 'local' if in_bmi_flow else lane_for(classification['intent'])
+                admission = get_admission_controller()
+                if admission.acquire(lane):
+                    try:
+                        analysis = self.chatbot.analyze(user_message, classification)
+                        response = self.chatbot.generate_response(user_message, analysis)
+                    finally:
+                        admission.release(lane)
+                elif lane == 'upstream':
+                    response = self.chatbot.degraded_response(user_message, classification['intent'])
+                    degraded = True
+                else:
+                    self.send_response(503)
+                    self.send_header('Content-type', 'application/json')
+                    self.send_header('Access-Control-Allow-Origin', '*')
+                    self.send_header('Retry-After', str(RETRY_AFTER))
+                    self.end_headers()
+                    self.wfile.write(json.dumps({'error': 'Server busy, please retry shortly',
+                                                 'status': 'error'}).encode('utf-8'))
+                    return
             
-            # Generate response using chatbot
-            response = self.chatbot.generate_response(user_message)
+            # The token is made before any header goes out (None if the state can't be carried)
+            state_token = signer.encode(self.chatbot.export_state())
             
             # Send response
             self.send_response(200)
@@ -40,8 +200,11 @@ class ChatHandler(SimpleHTTPRequestHandler):
             
             response_data = {
                 'response': response,
+                'state': state_token,
                 'status': 'success'
             }
+            if degraded:
+                response_data['degraded'] = True
             
             self.wfile.write(json.dumps(response_data).encode('utf-8'))
             
@@ -56,9 +219,108 @@ class ChatHandler(SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
 
+def preload():
+    """Build the shared indexes once, before forking, so workers share the pages
+
+    With WARMUP=1 the warm-up also runs here, once, and the workers inherit
+    its filled caches and finished status.
+    """
+    global warmup
+    get_phrase_index()
+    get_exercise_search()
+    get_catalog()
+    FitnessChatbot()
+    # Without STATE_TOKEN_SECRET the signing key is random per process: make
+    # it here so every worker shares it and accepts the others' tokens
+    get_state_signer()
+    warmup = make_warmup()
+    if warmup is not None:
+        warmup.run(drain=True)
+    # Workers open their own SQLite connections; none may be inherited
+    cache = get_persistent_cache()
+    if cache is not None:
+        cache.close()
+    # Keep preloaded objects out of the collector so refcount-free GC passes
+    # in the workers don't touch (and copy) their pages
+    gc.freeze()
+
+def make_warmup():
+    """Warm-up over the logged and example queries, or None unless WARMUP=1"""
+    if os.environ.get('WARMUP') != '1':
+        return None
+    # A fresh bot per query so replayed prompts can't leave conversation state behind
+    return WarmUp(lambda query: FitnessChatbot().generate_response(query), warmup_queries())
+
+def start_warmup():
+    """Warm up in the background (single-process mode)"""
+    global warmup
+    warmup = make_warmup()
+    if warmup is not None:
+        warmup.start()
+
+def run_worker(server):
+    """Worker body: serve on the inherited socket until terminated"""
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 1
+    try:
+        server.serve_forever()
+    except SystemExit:
+        code = 0
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        # Never fall back into the parent's code path
+        os._exit(code)
+
+def spawn_worker(server) -> int:
+    pid = os.fork()
+    if pid == 0:
+        run_worker(server)
+    return pid
+
+def serve_prefork(server, workers: int):
+    """Fork `workers` processes onto one listening socket and restart any that die"""
+    children = {spawn_worker(server): time.monotonic() for _ in range(workers)}
+    stopping = False
+    
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"Worker {pid} exited with status {status}; restarting")
+        if time.monotonic() - started < MIN_WORKER_UPTIME:
+            time.sleep(RESTART_DELAY)
+        children[spawn_worker(server)] = time.monotonic()
+    server.server_close()
+
 # For local testing
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
-    server = HTTPServer(('', port), ChatHandler)
-    print(f"Server running on port {port}")
-    server.serve_forever()
\ No newline at end of file
+    server = BoundedHTTPServer(('', port), ChatHandler)
+    if WORKERS > 1 and hasattr(os, 'fork'):
+        preload()
+        print(f"Server running on port {port} with {WORKERS} workers")
+        serve_prefork(server, WORKERS)
+    else:
+        start_warmup()
+        print(f"Server running on port {port}")
+        server.serve_forever()
@@ -0,0 +1,43 @@
+"""Exercise paging carried through state tokens (chatbot_vercel + utils.state_token)"""
+import json
+
+from chatbot_vercel import FitnessChatbot, MAX_PAGED_QUERY_BYTES
+from utils.state_token import MAX_TOKEN_LENGTH, StateSigner
+
+QUERY = "exercises for bad knees without equipment"
+
+
+def round_trip(bot: FitnessChatbot, signer: StateSigner) -> FitnessChatbot:
+    token = signer.encode(bot.export_state())
+    assert token is None or len(token) <= MAX_TOKEN_LENGTH
+    restored = FitnessChatbot()
+    restored.load_state(signer.decode(token))
+    return restored
+
+
+def test_non_ascii_query_pages_through_a_token():
+    signer = StateSigner(b'test-secret')
+    query = QUERY + " 💪💪 éé"
+    bot = FitnessChatbot()
+    first = bot.generate_response(query)
+    assert bot.more_exercises == {'query': query, 'offset': 3}
+    assert "**1." in first
+
+    restored = round_trip(bot, signer)
+    assert restored.more_exercises == {'query': query, 'offset': 3}
+    assert "**4." in restored.generate_response("show me more")
+
+
+def test_query_too_large_for_a_token_is_not_offered_more():
+    signer = StateSigner(b'test-secret')
+    # Under 200 characters, but escaped to far more than the paging budget
+    query = QUERY + " " + "💪" * 60
+    assert len(json.dumps(query)) > MAX_PAGED_QUERY_BYTES
+    bot = FitnessChatbot()
+    response = bot.generate_response(query)
+    assert bot.more_exercises is None
+    assert "show me more" not in response
+
+    token = signer.encode(bot.export_state())
+    assert token is not None and len(token) <= MAX_TOKEN_LENGTH
+    assert signer.decode(token) == bot.export_state()
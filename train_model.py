@@ -9,6 +9,16 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.pipeline import Pipeline
 import os
+import argparse
+import filecmp
+import hashlib
+import json
+import shutil
+import tempfile
+import time
+import sklearn
+
+from data.create_training_data import TRAINING_DATA
 
 # Download required NLTK data
 try:
@@ -40,6 +50,24 @@ from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
 
+# Everything that affects the trained artifacts feeds the build hash
+PREPROCESSING_CONFIG = {
+    'version': 1,
+    'tokenizer': 'nltk.word_tokenize',
+    'lemmatizer': 'WordNetLemmatizer',
+    'filter': 'isalnum',
+}
+
+MODEL_PARAMS = {
+    'tfidf': {'max_features': 1000, 'lowercase': True, 'stop_words': 'english'},
+    'naive_bayes': {},
+    'logistic': {'random_state': 42, 'max_iter': 1000},
+    'split': {'test_size': 0.2, 'random_state': 42},
+}
+
+BUILD_CACHE_DIR = 'models/cache'
+MODEL_FILES = ['naive_bayes_model.pkl', 'logistic_regression_model.pkl']
+
 class IntentClassifier:
     def __init__(self):
         self.lemmatizer = WordNetLemmatizer()
@@ -64,149 +92,36 @@ class IntentClassifier:
         
         return ' '.join(tokens)
     
-    def create_training_data(self):
-        """Create and save training data"""
-        # Training data for intent classification
-        training_data = [
-            # Workout/Exercise intents
-            ("show me chest exercises", "workout"),
-            ("what are good arm workouts", "workout"),
-            ("I want to build muscle", "workout"),
-            ("exercises for legs", "workout"),
-            ("how to lose weight", "workout"),
-            ("cardio workouts", "workout"),
-            ("strength training", "workout"),
-            ("yoga poses", "workout"),
-            ("abs workout", "workout"),
-            ("back exercises", "workout"),
-            ("bicep workouts", "workout"),
-            ("tricep exercises", "workout"),
-            ("shoulder workout", "workout"),
-            ("glute exercises", "workout"),
-            ("calf workouts", "workout"),
-            ("full body workout", "workout"),
-            ("home workouts", "workout"),
-            ("gym exercises", "workout"),
-            ("push ups", "workout"),
-            ("squats", "workout"),
-            ("deadlifts", "workout"),
-            ("bench press", "workout"),
-            ("running exercises", "workout"),
-            ("swimming workout", "workout"),
-            ("cycling training", "workout"),
-            ("HIIT workout", "workout"),
-            ("beginner exercises", "workout"),
-            ("advanced workouts", "workout"),
-            ("morning workout", "workout"),
-            ("evening exercises", "workout"),
-            
-            # Nutrition intents
-            ("calories in apple", "nutrition"),
-            ("nutrition facts for chicken", "nutrition"),
-            ("how much protein in eggs", "nutrition"),
-            ("carbs in rice", "nutrition"),
-            ("healthy food options", "nutrition"),
-            ("diet plan", "nutrition"),
-            ("nutrition information", "nutrition"),
-            ("calories in banana", "nutrition"),
-            ("protein content", "nutrition"),
-            ("fat content in avocado", "nutrition"),
-            ("sugar in fruits", "nutrition"),
-            ("vitamins in vegetables", "nutrition"),
-            ("meal calories", "nutrition"),
-            ("food nutrition", "nutrition"),
-            ("healthy eating", "nutrition"),
-            ("calorie count", "nutrition"),
-            ("nutritional value", "nutrition"),
-            ("macro nutrients", "nutrition"),
-            ("micro nutrients", "nutrition"),
-            ("daily calorie intake", "nutrition"),
-            ("protein requirements", "nutrition"),
-            ("carbohydrate needs", "nutrition"),
-            ("fat intake", "nutrition"),
-            ("fiber content", "nutrition"),
-            ("calcium in milk", "nutrition"),
-            ("iron in spinach", "nutrition"),
-            ("sodium content", "nutrition"),
-            ("cholesterol levels", "nutrition"),
-            ("antioxidants in berries", "nutrition"),
-            ("omega 3 fatty acids", "nutrition"),
-            
-            # BMI intents
-            ("calculate my BMI", "bmi"),
-            ("what is BMI", "bmi"),
-            ("body mass index", "bmi"),
-            ("am I overweight", "bmi"),
-            ("healthy weight", "bmi"),
-            ("BMI calculator", "bmi"),
-            ("check my weight status", "bmi"),
-            ("ideal weight", "bmi"),
-            ("weight category", "bmi"),
-            ("underweight or overweight", "bmi"),
-            ("body weight analysis", "bmi"),
-            ("weight assessment", "bmi"),
-            ("height weight ratio", "bmi"),
-            ("weight classification", "bmi"),
-            ("obesity check", "bmi"),
-            ("normal weight range", "bmi"),
-            ("weight evaluation", "bmi"),
-            ("health weight status", "bmi"),
-            ("BMI range", "bmi"),
-            ("weight index", "bmi"),
-            
-            # Motivation intents
-            ("I need motivation", "motivation"),
-            ("encourage me", "motivation"),
-            ("fitness motivation", "motivation"),
-            ("I'm feeling lazy", "motivation"),
-            ("inspire me", "motivation"),
-            ("motivational quote", "motivation"),
-            ("keep me going", "motivation"),
-            ("I want to give up", "motivation"),
-            ("boost my confidence", "motivation"),
-            ("positive message", "motivation"),
-            ("cheer me up", "motivation"),
-            ("I'm tired", "motivation"),
-            ("struggling with fitness", "motivation"),
-            ("need encouragement", "motivation"),
-            ("feeling demotivated", "motivation"),
-            ("help me stay focused", "motivation"),
-            ("losing motivation", "motivation"),
-            ("fitness inspiration", "motivation"),
-            ("workout motivation", "motivation"),
-            ("diet motivation", "motivation"),
-            ("health inspiration", "motivation"),
-            ("success stories", "motivation"),
-            ("fitness goals", "motivation"),
-            ("stay committed", "motivation"),
-            ("overcome laziness", "motivation"),
-            ("push through", "motivation"),
-            ("don't quit", "motivation"),
-            ("believe in yourself", "motivation"),
-            ("you can do it", "motivation"),
-            ("never give up", "motivation"),
-            
-            # Greeting intents
-            ("hello", "greeting"),
-            ("hi", "greeting"),
-            ("hey", "greeting"),
-            ("good morning", "greeting"),
-            ("good evening", "greeting"),
-            ("howdy", "greeting"),
-            ("what's up", "greeting"),
-            ("how are you", "greeting"),
-            ("greetings", "greeting"),
-            ("nice to meet you", "greeting"),
-        ]
-        
+    def create_training_data(self, csv_path='data/training_data.csv'):
+        """Create training data and refresh the CSV copy only if it changed"""
         # Create DataFrame
-        df = pd.DataFrame(training_data, columns=['text', 'intent'])
+        df = pd.DataFrame(TRAINING_DATA, columns=['text', 'intent'])
+        
+        csv_text = df.to_csv(index=False)
+        existing_text = None
+        if os.path.exists(csv_path):
+            with open(csv_path, 'r', newline='') as f:
+                existing_text = f.read()
         
         # Save to CSV
-        df.to_csv('data/training_data.csv', index=False)
+        if existing_text != csv_text:
+            with open(csv_path, 'w', newline='') as f:
+                f.write(csv_text)
         
         return df
     
+    def compute_build_hash(self, df):
+        """Hash the dataset, preprocessing config and hyperparameters"""
+        payload = {
+            'data': df[['text', 'intent']].values.tolist(),
+            'preprocessing': PREPROCESSING_CONFIG,
+            'stop_words': sorted(self.stop_words),
+            'hyperparameters': MODEL_PARAMS,
+            'sklearn_version': sklearn.__version__,
+        }
+        encoded = json.dumps(payload, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+    
     def train_models(self, df):
         """Train both Naive Bayes and Logistic Regression models"""
         # Preprocess text data
@@ -214,18 +129,18 @@ class IntentClassifier:
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
-            df['processed_text'], df['intent'], test_size=0.2, random_state=42, stratify=df['intent']
+            df['processed_text'], df['intent'], stratify=df['intent'], **MODEL_PARAMS['split']
         )
         
         # Create pipelines
         self.nb_pipeline = Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=1000, lowercase=True, stop_words='english')),
-            ('nb', MultinomialNB())
+            ('tfidf', TfidfVectorizer(**MODEL_PARAMS['tfidf'])),
+            ('nb', MultinomialNB(**MODEL_PARAMS['naive_bayes']))
         ])
         
         self.lr_pipeline = Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=1000, lowercase=True, stop_words='english')),
-            ('lr', LogisticRegression(random_state=42, max_iter=1000))
+            ('tfidf', TfidfVectorizer(**MODEL_PARAMS['tfidf'])),
+            ('lr', LogisticRegression(**MODEL_PARAMS['logistic']))
         ])
         
         # Train models
@@ -250,25 +165,25 @@ class IntentClassifier:
         
         return X_test, y_test
     
-    def save_models(self):
+    def save_models(self, model_dir='models'):
         """Save trained models"""
-        os.makedirs('models', exist_ok=True)
+        os.makedirs(model_dir, exist_ok=True)
         
-        with open('models/naive_bayes_model.pkl', 'wb') as f:
+        with open(os.path.join(model_dir, 'naive_bayes_model.pkl'), 'wb') as f:
             pickle.dump(self.nb_pipeline, f)
             
-        with open('models/logistic_regression_model.pkl', 'wb') as f:
+        with open(os.path.join(model_dir, 'logistic_regression_model.pkl'), 'wb') as f:
             pickle.dump(self.lr_pipeline, f)
             
         print("Models saved successfully!")
     
-    def load_models(self):
+    def load_models(self, model_dir='models'):
         """Load trained models"""
         try:
-            with open('models/naive_bayes_model.pkl', 'rb') as f:
+            with open(os.path.join(model_dir, 'naive_bayes_model.pkl'), 'rb') as f:
                 self.nb_pipeline = pickle.load(f)
                 
-            with open('models/logistic_regression_model.pkl', 'rb') as f:
+            with open(os.path.join(model_dir, 'logistic_regression_model.pkl'), 'rb') as f:
                 self.lr_pipeline = pickle.load(f)
                 
             print("Models loaded successfully!")
@@ -277,6 +192,34 @@ class IntentClassifier:
             print("Model files not found. Please train the models first.")
             return False
     
+    def build_models(self, df, cache_dir=BUILD_CACHE_DIR, model_dir='models', force=False):
+        """Train and save models unless an artifact for this content hash exists"""
+        build_hash = self.compute_build_hash(df)
+        artifact_dir = os.path.join(cache_dir, build_hash)
+        
+        if not force and os.path.exists(os.path.join(artifact_dir, 'manifest.json')):
+            print(f"Build cache hit ({build_hash[:12]}), skipping training")
+            install_artifacts(artifact_dir, model_dir)
+            self.load_models(model_dir)
+            return build_hash, False
+        
+        self.train_models(df)
+        
+        # Build in a staging directory so a crash never leaves a partial artifact
+        os.makedirs(cache_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix='.build-', dir=cache_dir)
+        self.save_models(staging_dir)
+        with open(os.path.join(staging_dir, 'manifest.json'), 'w') as f:
+            json.dump({'build_hash': build_hash, 'samples': len(df),
+                       'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}, f, indent=2)
+        
+        if os.path.exists(artifact_dir):
+            shutil.rmtree(artifact_dir)
+        os.replace(staging_dir, artifact_dir)
+        
+        install_artifacts(artifact_dir, model_dir)
+        return build_hash, True
+    
     def predict_intent(self, text, model_type='logistic'):
         """Predict intent for given text"""
         processed_text = self.preprocess_text(text)
@@ -292,7 +235,24 @@ class IntentClassifier:
             
         return prediction, confidence
 
+def install_artifacts(artifact_dir, model_dir='models'):
+    """Copy cached model artifacts into the directory the chatbot loads from"""
+    os.makedirs(model_dir, exist_ok=True)
+    for name in MODEL_FILES:
+        source = os.path.join(artifact_dir, name)
+        target = os.path.join(model_dir, name)
+        if os.path.exists(target) and filecmp.cmp(source, target, shallow=False):
+            continue
+        # Copy then rename, so a running chatbot never reads a half-written pickle
+        shutil.copyfile(source, target + '.tmp')
+        os.replace(target + '.tmp', target)
+
 def main():
+    parser = argparse.ArgumentParser(description="Train intent models, reusing cached builds when nothing changed")
+    parser.add_argument('--force', action='store_true', help="retrain even if a cached build exists")
+    parser.add_argument('--cache-dir', default=BUILD_CACHE_DIR)
+    args = parser.parse_args()
+    
     classifier = IntentClassifier()
     
     # Create training data
@@ -302,12 +262,10 @@ def main():
     print("Intent distribution:")
     print(df['intent'].value_counts())
     
-    # Train models
-    print("\nTraining models...")
-    X_test, y_test = classifier.train_models(df)
-    
-    # Save models
-    classifier.save_models()
+    # Train and save models (skipped when the build hash is cached)
+    print("\nBuilding models...")
+    build_hash, trained = classifier.build_models(df, cache_dir=args.cache_dir, force=args.force)
+    print(f"Build {build_hash[:12]} {'trained' if trained else 'restored from cache'}")
     
     # Test predictions
     print("\nTesting predictions:")
@@ -0,0 +1,153 @@
+"""
+Out-of-core intent training for large message logs.
+
+Messages are streamed from CSV or JSONL files in fixed-size chunks, hashed
+into a fixed-width feature space and fed to an SGD classifier through
+partial_fit, so memory use depends on the chunk size and not on the size of
+the corpus. A saved model can be updated later with new logs.
+
+Usage:
+    python train_streaming.py logs/messages.jsonl data/training_data.csv
+    python train_streaming.py logs/new_messages.csv --update
+"""
+import argparse
+import os
+import pickle
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+
+from train_model import IntentClassifier
+
+INTENT_CLASSES = ['bmi', 'greeting', 'motivation', 'nutrition', 'workout']
+DEFAULT_MODEL_PATH = 'models/streaming_sgd_model.pkl'
+
+
+def iter_message_chunks(path: str, chunk_size: int = 10000, text_column: str = 'text',
+                        label_column: str = 'intent') -> Iterator[Tuple[List[str], List[str]]]:
+    """Yield (texts, labels) chunks from a CSV or JSONL file without loading it whole"""
+    if path.endswith(('.jsonl', '.ndjson')):
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_size, usecols=[text_column, label_column],
+                             dtype=str, keep_default_na=False)
+
+    for chunk in reader:
+        chunk = chunk[[text_column, label_column]].dropna()
+        yield chunk[text_column].astype(str).tolist(), chunk[label_column].astype(str).tolist()
+
+
+class StreamingIntentClassifier:
+    def __init__(self, n_features: int = 2 ** 18, classes: Optional[List[str]] = None):
+        self.classes = np.array(sorted(classes or INTENT_CLASSES))
+        self.preprocessor = IntentClassifier()
+        self.pipeline = Pipeline([
+            ('hashing', HashingVectorizer(n_features=n_features, ngram_range=(1, 2),
+                                          alternate_sign=False, norm='l2')),
+            ('sgd', SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42))
+        ])
+        self.rng = np.random.default_rng(42)
+        self.samples_seen = 0
+
+    def partial_fit_chunk(self, texts: List[str], labels: List[str]) -> Dict[str, float]:
+        """Evaluate on a chunk, then train on it (progressive validation)"""
+        known = np.isin(labels, self.classes)
+        texts = [self.preprocessor.preprocess_text(t) for t, k in zip(texts, known) if k]
+        labels = np.asarray(labels)[known]
+        if not len(labels):
+            return {'trained': 0, 'skipped': int((~known).sum()), 'correct': 0}
+
+        # Logs are often grouped by intent, so shuffle within the chunk
+        order = self.rng.permutation(len(labels))
+        texts = [texts[i] for i in order]
+        labels = labels[order]
+
+        features = self.pipeline.named_steps['hashing'].transform(texts)
+        classifier = self.pipeline.named_steps['sgd']
+
+        correct = 0
+        if self.samples_seen:
+            correct = int((classifier.predict(features) == labels).sum())
+
+        classifier.partial_fit(features, labels, classes=self.classes)
+        self.samples_seen += len(labels)
+
+        return {'trained': len(labels), 'skipped': int((~known).sum()), 'correct': correct}
+
+    def train_from_files(self, paths: List[str], chunk_size: int = 10000, epochs: int = 1) -> Dict[str, float]:
+        """Stream every file chunk by chunk, for the given number of passes"""
+        totals = {'trained': 0, 'skipped': 0, 'correct': 0, 'evaluated': 0}
+
+        for epoch in range(epochs):
+            for path in paths:
+                print(f"Epoch {epoch + 1}/{epochs}: streaming {path}...")
+                for texts, labels in iter_message_chunks(path, chunk_size):
+                    evaluated = self.samples_seen > 0
+                    stats = self.partial_fit_chunk(texts, labels)
+                    totals['trained'] += stats['trained']
+                    totals['skipped'] += stats['skipped']
+                    if evaluated:
+                        totals['correct'] += stats['correct']
+                        totals['evaluated'] += stats['trained']
+
+        totals['progressive_accuracy'] = (totals['correct'] / totals['evaluated']
+                                          if totals['evaluated'] else 0.0)
+        return totals
+
+    def predict_intent(self, text: str) -> Tuple[str, float]:
+        """Predict intent for given text"""
+        processed_text = self.preprocessor.preprocess_text(text)
+        probabilities = self.pipeline.predict_proba([processed_text])[0]
+        best = int(np.argmax(probabilities))
+        return str(self.pipeline.classes_[best]), float(probabilities[best])
+
+    def save(self, path: str = DEFAULT_MODEL_PATH):
+        """Save the pipeline so it can be loaded like the other intent models"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump(self.pipeline, f)
+        print(f"Streaming model saved to {path}")
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH) -> 'StreamingIntentClassifier':
+        """Load a saved pipeline to continue training on new logs"""
+        with open(path, 'rb') as f:
+            pipeline = pickle.load(f)
+
+        classifier = cls(n_features=pipeline.named_steps['hashing'].n_features,
+                         classes=list(pipeline.named_steps['sgd'].classes_))
+        classifier.pipeline = pipeline
+        classifier.samples_seen = int(getattr(pipeline.named_steps['sgd'], 't_', 1))
+        return classifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the intent model out-of-core on large message logs")
+    parser.add_argument('paths', nargs='+', help="CSV or JSONL files with 'text' and 'intent' columns")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="rows held in memory at once")
+    parser.add_argument('--epochs', type=int, default=1, help="passes over the input files")
+    parser.add_argument('--n-features', type=int, default=2 ** 18, help="width of the hashed feature space")
+    parser.add_argument('--model-path', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--update', action='store_true', help="continue training an existing model")
+    args = parser.parse_args()
+
+    if args.update and os.path.exists(args.model_path):
+        print(f"Updating existing model {args.model_path}...")
+        classifier = StreamingIntentClassifier.load(args.model_path)
+    else:
+        classifier = StreamingIntentClassifier(n_features=args.n_features)
+
+    stats = classifier.train_from_files(args.paths, chunk_size=args.chunk_size, epochs=args.epochs)
+
+    print(f"\nTrained on {stats['trained']} messages ({stats['skipped']} skipped with unknown intents)")
+    print(f"Progressive validation accuracy: {stats['progressive_accuracy']:.3f}")
+
+    classifier.save(args.model_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Admission control for the chat server.
+
+Requests are split into lanes: "upstream" for intents answered through the
+external API (exercises, nutrition) and "local" for everything computed
+in-process (BMI, greetings, motivation). Each lane has its own concurrency
+limit and a bounded wait queue; a request that finds the queue full, or
+waits longer than the queue timeout, is shed immediately instead of piling
+up behind the rest. Callers decide what shedding means (a 503, or a degraded
+answer that doesn't touch the API).
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# Intents whose answers need an upstream API call
+UPSTREAM_INTENTS = frozenset({'exercise_recommendation', 'nutrition_advice'})
+
+# Concurrent requests and queued requests allowed per lane
+LANE_LIMITS = {
+    'upstream': (int(os.getenv('UPSTREAM_CONCURRENCY', 8)), int(os.getenv('UPSTREAM_QUEUE', 16))),
+    'local': (int(os.getenv('LOCAL_CONCURRENCY', 16)), int(os.getenv('LOCAL_QUEUE', 32))),
+}
+# Seconds a queued request waits for a slot before it is shed
+QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 2.0))
+
+
+def lane_for(intent: str) -> str:
+    return 'upstream' if intent in UPSTREAM_INTENTS else 'local'
+
+
+class Lane:
+    def __init__(self, concurrency: int, max_queue: int):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed_full = 0
+        self.shed_timeout = 0
+        self.max_waiting = 0
+        self.condition = threading.Condition()
+
+    def stats(self) -> Dict:
+        return {
+            'concurrency': self.concurrency,
+            'max_queue': self.max_queue,
+            'active': self.active,
+            'queue_depth': self.waiting,
+            'max_queue_depth': self.max_waiting,
+            'admitted': self.admitted,
+            'shed': self.shed_full + self.shed_timeout,
+            'shed_queue_full': self.shed_full,
+            'shed_timeout': self.shed_timeout,
+        }
+
+
+class AdmissionController:
+    def __init__(self, limits: Optional[Dict] = None, queue_timeout: float = QUEUE_TIMEOUT):
+        self.lanes = {name: Lane(*limit) for name, limit in (limits or LANE_LIMITS).items()}
+        self.queue_timeout = queue_timeout
+
+    def acquire(self, lane_name: str) -> bool:
+        """Take a slot in a lane, waiting in its queue if needed; False means shed"""
+        lane = self.lanes[lane_name]
+        with lane.condition:
+            if lane.active < lane.concurrency and not lane.waiting:
+                lane.active += 1
+                lane.admitted += 1
+                return True
+            if lane.waiting >= lane.max_queue:
+                lane.shed_full += 1
+                return False
+
+            lane.waiting += 1
+            lane.max_waiting = max(lane.max_waiting, lane.waiting)
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while lane.active >= lane.concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not lane.condition.wait(remaining):
+                        if lane.active >= lane.concurrency:
+                            lane.shed_timeout += 1
+                            return False
+                lane.active += 1
+                lane.admitted += 1
+                return True
+            finally:
+                lane.waiting -= 1
+
+    def release(self, lane_name: str):
+        lane = self.lanes[lane_name]
+        with lane.condition:
+            lane.active -= 1
+            lane.condition.notify()
+
+    def stats(self) -> Dict:
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+
+_admission_controller = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Process-wide controller (one per server worker)"""
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController()
+    return _admission_controller
@@ -1,8 +1,42 @@
 import requests
 import os
-from typing import Dict, List, Optional
+import sqlite3
+from typing import Dict, List, Optional, Tuple
 import time
+from urllib.parse import urlencode
 from .exercise_fallback import get_fallback_exercises
+from .result_pager import get_result_pager
+from .response_templates import render_exercises, render_nutrition
+from .persistent_cache import get_persistent_cache
+
+# Fallback results cached per query for "show me more" pages
+FALLBACK_RESULT_LIMIT = 50
+
+# (fresh, stale) seconds for upstream responses in the persistent cache;
+# stale entries are still served while a background refresh runs
+NUTRITION_TTL = (7 * 24 * 3600, 30 * 24 * 3600)
+EXERCISE_TTL = (24 * 3600, 7 * 24 * 3600)
+
+def exercise_params(exercise_type: str = "", muscle: str = "", difficulty: str = "") -> Dict:
+    """Query parameters for the exercises endpoint"""
+    params = {}
+    
+    # API Ninjas uses 'type' for exercise type, 'muscle' for target muscle
+    if exercise_type:
+        params['type'] = exercise_type.lower()
+    if muscle:
+        params['muscle'] = muscle.lower()
+    if difficulty:
+        params['difficulty'] = difficulty.lower()
+        
+    # Add default limit to prevent too many results
+    if not params:
+        params['muscle'] = 'chest'  # Default to chest exercises
+    return params
+
+def cache_key(endpoint: str, params: Dict) -> str:
+    """Persistent-cache key for an API request"""
+    return f"{endpoint}?{urlencode(sorted((name, str(value).strip().lower()) for name, value in params.items()))}"
 
 class APIService:
     def __init__(self):
@@ -11,20 +45,52 @@ class APIService:
         self.headers = {
             'X-Api-Key': self.api_key
         }
+        self.pager = get_result_pager()
+        self.cache = get_persistent_cache()
+    
+    def _get_json(self, endpoint: str, params: Dict, ttl: Tuple[float, float]):
+        """GET an API endpoint through the persistent cache
+        
+        Request errors propagate; only successful (list) responses are cached.
+        """
+        def fetch():
+            response = requests.get(f"{self.base_url}/{endpoint}", headers=self.headers, params=params, timeout=10)
+            response.raise_for_status()
+            return response.json()
+        
+        if self.cache is None:
+            return fetch()
+        try:
+            return self.cache.get_or_fetch(cache_key(endpoint, params), fetch, *ttl, cacheable=lambda data: isinstance(data, list))
+        except sqlite3.Error as e:
+            print(f"API cache error, fetching directly: {str(e)}")
+            return fetch()
         
+    def _is_cached(self, endpoint: str, params: Dict) -> bool:
+        try:
+            return self.cache is not None and self.cache.get(cache_key(endpoint, params)) is not None
+        except sqlite3.Error:
+            return False
+    
+    def has_nutrition_info(self, food_item: str) -> bool:
+        """Whether a nutrition lookup would be answered without calling the API"""
+        return self._is_cached('nutrition', {'query': food_item})
+    
+    def has_exercises(self, exercise_type: str = "", muscle: str = "", difficulty: str = "") -> bool:
+        """Whether an exercise query would be answered without calling the API"""
+        key = ('exercises', exercise_type.lower(), muscle.lower(), difficulty.lower())
+        return (self.pager.lookup(key) is not None
+                or self._is_cached('exercises', exercise_params(exercise_type, muscle, difficulty)))
+    
     def get_nutrition_info(self, food_item: str) -> Optional[Dict]:
         """Get nutrition information for a food item"""
         if not self.api_key:
             return {"error": "API key not configured. Please add your API Ninjas key to the .env file."}
             
-        url = f"{self.base_url}/nutrition"
         params = {'query': food_item}
         
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._get_json('nutrition', params, NUTRITION_TTL)
             if data:
                 # Return formatted nutrition info
                 nutrition = data[0]  # Get first result
@@ -50,35 +116,19 @@ class APIService:
         except Exception as e:
             return {"error": f"Unexpected error: {str(e)}"}
     
-    def get_exercise_info(self, exercise_type: str = "", muscle: str = "", difficulty: str = "") -> Optional[List[Dict]]:
-        """Get exercise information"""
+    def _fetch_exercises(self, exercise_type: str = "", muscle: str = "", difficulty: str = "") -> List[Dict]:
+        """Fetch the full exercise list for a query (API, then fallback database)"""
         if not self.api_key:
             return [{"error": "API key not configured. Please add your API Ninjas key to the .env file."}]
             
-        url = f"{self.base_url}/exercises"
-        params = {}
-        
-        # API Ninjas uses 'type' for exercise type, 'muscle' for target muscle
-        if exercise_type:
-            params['type'] = exercise_type.lower()
-        if muscle:
-            params['muscle'] = muscle.lower()
-        if difficulty:
-            params['difficulty'] = difficulty.lower()
-            
-        # Add default limit to prevent too many results
-        if not params:
-            params['muscle'] = 'chest'  # Default to chest exercises
+        params = exercise_params(exercise_type, muscle, difficulty)
             
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._get_json('exercises', params, EXERCISE_TTL)
             if data:
                 # Format exercise data
                 exercises = []
-                for exercise in data[:5]:  # Limit to 5 exercises
+                for exercise in data:
                     exercises.append({
                         'name': exercise.get('name', 'Unknown Exercise'),
                         'type': exercise.get('type', 'N/A'),
@@ -90,13 +140,13 @@ class APIService:
                 return exercises
             else:
                 # Use fallback database if no API results
-                fallback_exercises = get_fallback_exercises(muscle, exercise_type, difficulty)
+                fallback_exercises = get_fallback_exercises(muscle, exercise_type, difficulty, limit=FALLBACK_RESULT_LIMIT)
                 return fallback_exercises if fallback_exercises else [{"error": "No exercises found for your criteria"}]
                 
         except requests.exceptions.RequestException as e:
             # Use fallback database when API fails
             print(f"API request failed, using fallback database: {str(e)}")
-            fallback_exercises = get_fallback_exercises(muscle, exercise_type, difficulty)
+            fallback_exercises = get_fallback_exercises(muscle, exercise_type, difficulty, limit=FALLBACK_RESULT_LIMIT)
             if fallback_exercises:
                 return fallback_exercises
             else:
@@ -104,77 +154,53 @@ class APIService:
         except Exception as e:
             # Use fallback database for other errors
             print(f"Unexpected error, using fallback database: {str(e)}")
-            fallback_exercises = get_fallback_exercises(muscle, exercise_type, difficulty)
+            fallback_exercises = get_fallback_exercises(muscle, exercise_type, difficulty, limit=FALLBACK_RESULT_LIMIT)
             if fallback_exercises:
                 return fallback_exercises
             else:
                 return [{"error": f"Exercise service temporarily unavailable"}]
     
-    def format_nutrition_response(self, nutrition_data: Dict) -> str:
-        """Format nutrition data into a readable response"""
-        if "error" in nutrition_data:
-            return f"❌ {nutrition_data['error']}"
-            
-        response = f"🍎 **Nutrition Information for {nutrition_data['name'].title()}**\n\n"
-        
-        # Handle both free and premium tier responses
-        serving_size = nutrition_data.get('serving_size_g', 'N/A')
-        if serving_size != 'Only available for premium subscribers.':
-            response += f"📊 **Per {serving_size}g serving:**\n"
-        else:
-            response += f"📊 **Nutritional Information:**\n"
+    def get_exercise_page(self, exercise_type: str = "", muscle: str = "", difficulty: str = "",
+                          cursor: Optional[str] = None, page_size: int = 5, offset: int = 0) -> Dict:
+        """Get one page of exercises plus an opaque cursor for the next page
         
-        # Display available data, handling premium restrictions
-        def format_value(value, unit="", fallback_info=""):
-            if isinstance(value, str) and "premium subscribers" in value:
-                return f"Available ⭐" + (f" ({fallback_info})" if fallback_info else "")
-            return f"{value}{unit}"
-        
-        response += f"• **Calories:** {format_value(nutrition_data.get('calories', 'N/A'), ' kcal', 'varies by preparation')}\n"
-        response += f"• **Protein:** {format_value(nutrition_data.get('protein_g', 'N/A'), 'g', 'typically high in lean meats')}\n"
-        response += f"• **Carbohydrates:** {format_value(nutrition_data.get('carbohydrates_total_g', 'N/A'), 'g')}\n"
-        
-        if nutrition_data.get('fiber_g') is not None:
-            response += f"  - Fiber: {format_value(nutrition_data['fiber_g'], 'g')}\n"
-        if nutrition_data.get('sugar_g') is not None:
-            response += f"  - Sugar: {format_value(nutrition_data['sugar_g'], 'g')}\n"
-            
-        response += f"• **Fat:** {format_value(nutrition_data.get('fat_total_g', 'N/A'), 'g')}\n"
-        
-        if nutrition_data.get('fat_saturated_g') is not None:
-            response += f"  - Saturated: {format_value(nutrition_data['fat_saturated_g'], 'g')}\n"
-            
-        response += f"• **Sodium:** {format_value(nutrition_data.get('sodium_mg', 'N/A'), 'mg')}\n"
-        response += f"• **Potassium:** {format_value(nutrition_data.get('potassium_mg', 'N/A'), 'mg')}\n"
-        response += f"• **Cholesterol:** {format_value(nutrition_data.get('cholesterol_mg', 'N/A'), 'mg')}\n"
+        With a cursor, the page is served from the cached result set without
+        another upstream call; without one, the page starts at `offset`.
+        Returns {'exercises': [...], 'next_cursor': str or None}.
+        """
+        if cursor:
+            page = self.pager.page_from_cursor(cursor, page_size)
+            if page is None:
+                return {'exercises': [{"error": "Those results have expired. Please ask for the exercises again."}],
+                        'next_cursor': None}
+            return {'exercises': page['results'], 'next_cursor': page['next_cursor'], 'offset': page['offset']}
         
-        # Add helpful tips instead of API limitations
-        response += "\n💡 **Nutrition Tips:**\n"
-        response += "• Choose lean protein sources for muscle building\n"
-        response += "• Include variety in your diet for balanced nutrition\n"
-        response += "• Stay hydrated and eat whole foods when possible\n"
+        key = ('exercises', exercise_type.lower(), muscle.lower(), difficulty.lower())
+        result_id = self.pager.lookup(key)
+        if result_id is None:
+            exercises = self._fetch_exercises(exercise_type, muscle, difficulty)
+            if exercises and "error" in exercises[0]:
+                return {'exercises': exercises, 'next_cursor': None}
+            result_id = self.pager.store(key, exercises)
         
-        return response
+        return self.paginate(result_id, offset, page_size)
     
-    def format_exercise_response(self, exercises: List[Dict]) -> str:
-        """Format exercise data into a readable response"""
-        if not exercises:
-            return "❌ No exercises found."
-            
-        if "error" in exercises[0]:
-            return f"❌ {exercises[0]['error']}"
-            
-        response = "💪 **Recommended Exercises:**\n\n"
-        
-        for i, exercise in enumerate(exercises, 1):
-            response += f"**{i}. {exercise['name'].title()}**\n"
-            response += f"• **Type:** {exercise['type'].title()}\n"
-            response += f"• **Target Muscle:** {exercise['muscle'].title()}\n"
-            response += f"• **Equipment:** {exercise['equipment'].title()}\n"
-            response += f"• **Difficulty:** {exercise['difficulty'].title()}\n"
-            response += f"• **Instructions:** {exercise['instructions']}\n\n"
-        
-        return response
+    def paginate(self, result_id: str, offset: int = 0, page_size: int = 5) -> Dict:
+        """First (or any) page of a result set already stored in the pager"""
+        page = self.pager.page(result_id, offset, page_size) or {'results': [], 'next_cursor': None, 'offset': offset}
+        return {'exercises': page['results'], 'next_cursor': page['next_cursor'], 'offset': page['offset']}
+    
+    def get_exercise_info(self, exercise_type: str = "", muscle: str = "", difficulty: str = "") -> Optional[List[Dict]]:
+        """Get exercise information"""
+        return self.get_exercise_page(exercise_type, muscle, difficulty)['exercises']
+    
+    def format_nutrition_response(self, nutrition_data: Dict, fmt: str = "markdown") -> str:
+        """Format nutrition data into a readable response (fmt: markdown, plain or json)"""
+        return render_nutrition(nutrition_data, fmt)
+    
+    def format_exercise_response(self, exercises: List[Dict], start: int = 1, fmt: str = "markdown") -> str:
+        """Format exercise data into a readable response (fmt: markdown, plain or json)"""
+        return render_exercises(exercises, start, fmt)
 
 # Test function
 def test_api():
@@ -0,0 +1,130 @@
+"""
+Vectorized BMI for whole cohorts.
+
+Weights and heights arrive as arrays with per-row (or shared) units; they are
+converted to kg/m with one lookup per distinct unit spelling, and categories come from
+np.digitize over the category boundaries instead of a per-row range scan.
+Rows with missing or non-positive measurements get a NaN BMI and the
+CATEGORY_UNKNOWN code rather than failing the whole batch.
+"""
+from typing import Dict, Iterable, Union
+
+import numpy as np
+
+# Category codes index this tuple; the boundaries match BMICalculator.bmi_categories
+CATEGORIES = ('underweight', 'normal', 'overweight', 'obese')
+CATEGORY_BOUNDS = np.array([18.5, 25.0, 30.0])
+CATEGORY_UNKNOWN = -1
+
+WEIGHT_TO_KG = {'kg': 1.0, 'lb': 0.453592}
+HEIGHT_TO_M = {'m': 1.0, 'cm': 0.01, 'in': 0.0254, 'ft': 0.3048}
+
+# Unit spellings accepted in addition to the canonical keys above
+UNIT_ALIASES = {
+    'kgs': 'kg', 'kilogram': 'kg', 'kilograms': 'kg',
+    'lbs': 'lb', 'pound': 'lb', 'pounds': 'lb',
+    'meter': 'm', 'meters': 'm', 'metre': 'm', 'metres': 'm',
+    'centimeter': 'cm', 'centimeters': 'cm',
+    'inch': 'in', 'inches': 'in',
+    'feet': 'ft', 'foot': 'ft',
+}
+
+# What 'metric'/'imperial' mean for each measurement (BMICalculator's conventions)
+UNIT_SYSTEMS = {
+    'weight': {'metric': 'kg', 'imperial': 'lb'},
+    'height': {'metric': 'm', 'imperial': 'in'},
+}
+
+Units = Union[str, Iterable[str]]
+
+
+class BMIBatch:
+    """BMI values and category codes for a batch, stored as two arrays"""
+    __slots__ = ('bmi', 'codes')
+
+    def __init__(self, bmi: np.ndarray, codes: np.ndarray):
+        self.bmi = bmi
+        self.codes = codes
+
+    def __len__(self) -> int:
+        return len(self.bmi)
+
+    def __getitem__(self, index: int) -> Dict:
+        code = int(self.codes[index])
+        return {
+            'bmi': float(self.bmi[index]),
+            'category': CATEGORIES[code] if code != CATEGORY_UNKNOWN else 'unknown',
+        }
+
+    def categories(self) -> np.ndarray:
+        """Category names per row ('unknown' for invalid rows)"""
+        names = np.array(CATEGORIES + ('unknown',))
+        return names[self.codes]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of rows in each category"""
+        counts = np.bincount(self.codes + 1, minlength=len(CATEGORIES) + 1)
+        result = {name: int(count) for name, count in zip(CATEGORIES, counts[1:])}
+        result['unknown'] = int(counts[0])
+        return result
+
+
+def _canonical_unit(unit: str, kind: str) -> str:
+    unit = unit.strip().lower()
+    return UNIT_SYSTEMS[kind].get(unit, UNIT_ALIASES.get(unit, unit))
+
+
+def unit_factors(units: Units, kind: str, size: int) -> Union[float, np.ndarray]:
+    """Conversion factors to kg (kind='weight') or m (kind='height')"""
+    table = WEIGHT_TO_KG if kind == 'weight' else HEIGHT_TO_M
+    if isinstance(units, str):
+        unit = _canonical_unit(units, kind)
+        if unit not in table:
+            raise ValueError(f"Unknown {kind} unit: {units}")
+        return table[unit]
+
+    units = np.asarray(units)
+    if units.shape != (size,):
+        raise ValueError(f"Expected {size} {kind} units, got {units.shape}")
+    # A column holds only a handful of spellings: resolve each distinct one
+    # once and assign it with a vectorized compare (cheaper than np.unique's sort)
+    factors = np.full(size, np.nan)
+    unresolved = np.ones(size, dtype=bool)
+    while unresolved.any():
+        unit = units[unresolved.argmax()]
+        canonical = _canonical_unit(str(unit), kind)
+        if canonical not in table:
+            raise ValueError(f"Unknown {kind} unit: {unit}")
+        matches = units == unit
+        factors[matches] = table[canonical]
+        unresolved &= ~matches
+    return factors
+
+
+def classify_bmi_codes(bmi: np.ndarray) -> np.ndarray:
+    """Category codes for BMI values (CATEGORY_UNKNOWN for NaN)"""
+    codes = np.digitize(bmi, CATEGORY_BOUNDS).astype(np.int8)
+    codes[np.isnan(bmi)] = CATEGORY_UNKNOWN
+    return codes
+
+
+def calculate_bmi_batch(weights, heights, weight_units: Units = 'kg', height_units: Units = 'm') -> BMIBatch:
+    """BMI and category codes for arrays of weights and heights
+
+    Units are either one string for the whole batch or one per row: kg/lb for
+    weight, m/cm/in/ft for height ('metric'/'imperial' also work).
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    heights = np.asarray(heights, dtype=np.float64)
+    if weights.shape != heights.shape or weights.ndim != 1:
+        raise ValueError("Weights and heights must be 1-D arrays of the same length")
+
+    weight_kg = weights * unit_factors(weight_units, 'weight', len(weights))
+    height_m = heights * unit_factors(height_units, 'height', len(heights))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bmi = weight_kg / (height_m * height_m)
+    bmi[~((weight_kg > 0) & (height_m > 0))] = np.nan
+    bmi = np.round(bmi, 2)
+
+    return BMIBatch(bmi, classify_bmi_codes(bmi))
@@ -1,5 +1,57 @@
 from typing import Tuple
 
+from .response_templates import ResponseTemplate, escape, render_error
+
+CATEGORY_DESCRIPTIONS = {
+    "underweight": "Below normal weight",
+    "normal": "Normal weight range",
+    "overweight": "Above normal weight",
+    "obese": "Significantly above normal weight"
+}
+
+HEALTH_RISKS = {
+    "underweight": "May indicate malnutrition, eating disorders, or other health issues",
+    "normal": "Lowest risk of weight-related health problems",
+    "overweight": "Increased risk of heart disease, diabetes, and high blood pressure",
+    "obese": "High risk of heart disease, diabetes, stroke, and other health issues"
+}
+
+RECOMMENDATIONS = {
+    "underweight": "Consider consulting a healthcare provider. Focus on healthy weight gain through balanced nutrition and strength training.",
+    "normal": "Maintain your current weight through regular exercise and balanced nutrition.",
+    "overweight": "Consider gradual weight loss through increased physical activity and calorie reduction.",
+    "obese": "Consult a healthcare provider. Focus on sustainable weight loss through diet and exercise."
+}
+
+BMI_NOTE = ("Note: BMI is a general indicator and may not account for muscle mass, bone density, and other "
+            "factors. Consult a healthcare provider for personalized advice.")
+
+
+def _bmi_template(category: str) -> ResponseTemplate:
+    """Response for one category with its static text already filled in"""
+    description = CATEGORY_DESCRIPTIONS.get(category, "Unknown category")
+    risks = HEALTH_RISKS.get(category, "Unknown risks")
+    recommendations = RECOMMENDATIONS.get(category, "Consult a healthcare provider")
+
+    text = f"📊 **BMI Calculation Results**\n\n"
+    text += "• **Weight:** {weight} {weight_unit}\n"
+    text += "• **Height:** {height} {height_unit}\n"
+    text += "• **BMI:** {bmi}\n"
+    text += f"• **Category:** {escape(category.title())}\n"
+    text += f"• **Description:** {escape(description)}\n\n"
+    text += f"**Health Information:**\n"
+    text += f"• **Risks:** {escape(risks)}\n\n"
+    text += f"**Recommendations:**\n"
+    text += f"• {escape(recommendations)}\n\n"
+    text += f"*{escape(BMI_NOTE)}*"
+    return ResponseTemplate(text, {"type": "bmi", "category": category, "description": description,
+                                   "health_risks": risks, "recommendations": recommendations,
+                                   "note": BMI_NOTE})
+
+
+BMI_TEMPLATES = {category: _bmi_template(category)
+                 for category in list(CATEGORY_DESCRIPTIONS) + ["unknown"]}
+
 class BMICalculator:
     def __init__(self):
         self.bmi_categories = {
@@ -28,6 +80,15 @@ class BMICalculator:
         
         return self.calculate_bmi(weight_kg, height_m)
     
+    def calculate_bmi_batch(self, weights, heights, weight_units='kg', height_units='m'):
+        """Vectorized BMI for arrays of measurements (see utils.bmi_batch)
+        
+        Returns a BMIBatch with `bmi` and category `codes` arrays. Needs NumPy,
+        so it is imported on first use only.
+        """
+        from .bmi_batch import calculate_bmi_batch
+        return calculate_bmi_batch(weights, heights, weight_units, height_units)
+    
     def classify_bmi(self, bmi: float) -> str:
         """Classify BMI into categories"""
         for category, (min_bmi, max_bmi) in self.bmi_categories.items():
@@ -51,36 +112,19 @@ class BMICalculator:
     
     def _get_category_description(self, category: str) -> str:
         """Get description for BMI category"""
-        descriptions = {
-            "underweight": "Below normal weight",
-            "normal": "Normal weight range",
-            "overweight": "Above normal weight",
-            "obese": "Significantly above normal weight"
-        }
-        return descriptions.get(category, "Unknown category")
+        return CATEGORY_DESCRIPTIONS.get(category, "Unknown category")
     
     def _get_health_risks(self, category: str) -> str:
         """Get health risks for BMI category"""
-        risks = {
-            "underweight": "May indicate malnutrition, eating disorders, or other health issues",
-            "normal": "Lowest risk of weight-related health problems",
-            "overweight": "Increased risk of heart disease, diabetes, and high blood pressure",
-            "obese": "High risk of heart disease, diabetes, stroke, and other health issues"
-        }
-        return risks.get(category, "Unknown risks")
+        return HEALTH_RISKS.get(category, "Unknown risks")
     
     def _get_recommendations(self, category: str) -> str:
         """Get recommendations for BMI category"""
-        recommendations = {
-            "underweight": "Consider consulting a healthcare provider. Focus on healthy weight gain through balanced nutrition and strength training.",
-            "normal": "Maintain your current weight through regular exercise and balanced nutrition.",
-            "overweight": "Consider gradual weight loss through increased physical activity and calorie reduction.",
-            "obese": "Consult a healthcare provider. Focus on sustainable weight loss through diet and exercise."
-        }
-        return recommendations.get(category, "Consult a healthcare provider")
+        return RECOMMENDATIONS.get(category, "Consult a healthcare provider")
     
-    def format_bmi_response(self, weight: float, height: float, unit_system: str = "metric") -> str:
-        """Format BMI calculation response"""
+    def format_bmi_response(self, weight: float, height: float, unit_system: str = "metric",
+                            fmt: str = "markdown") -> str:
+        """Format BMI calculation response (fmt: markdown, plain or json)"""
         try:
             if unit_system.lower() == "metric":
                 bmi = self.calculate_bmi(weight, height)
@@ -91,26 +135,14 @@ class BMICalculator:
                 weight_unit = "lbs"
                 height_unit = "inches"
             
-            info = self.get_bmi_info(bmi)
-            
-            response = f"📊 **BMI Calculation Results**\n\n"
-            response += f"• **Weight:** {weight} {weight_unit}\n"
-            response += f"• **Height:** {height} {height_unit}\n"
-            response += f"• **BMI:** {info['bmi']}\n"
-            response += f"• **Category:** {info['category'].title()}\n"
-            response += f"• **Description:** {info['description']}\n\n"
-            response += f"**Health Information:**\n"
-            response += f"• **Risks:** {info['health_risks']}\n\n"
-            response += f"**Recommendations:**\n"
-            response += f"• {info['recommendations']}\n\n"
-            response += f"*Note: BMI is a general indicator and may not account for muscle mass, bone density, and other factors. Consult a healthcare provider for personalized advice.*"
-            
-            return response
+            return BMI_TEMPLATES[self.classify_bmi(bmi)].render(
+                fmt, weight=weight, weight_unit=weight_unit, height=height, height_unit=height_unit, bmi=bmi
+            )
             
         except ValueError as e:
-            return f"❌ Error calculating BMI: {str(e)}"
+            return render_error(f"Error calculating BMI: {str(e)}", fmt)
         except Exception as e:
-            return f"❌ Unexpected error: {str(e)}"
+            return render_error(f"Unexpected error: {str(e)}", fmt)
 
 # Test function
 def test_bmi_calculator():
@@ -0,0 +1,214 @@
+"""
+Single-pass entity extraction for chat messages.
+
+The message is lowercased once and tokenized with one precompiled regex.
+A single walk over the tokens picks up weight and height (with units), age,
+sex, activity level, goal, muscle group, exercise type, difficulty and food
+spans together, so handlers don't each rescan the text.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Words (keeping apostrophes as in "i'm"), numbers and the ' / " height marks
+TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?|\d+(?:\.\d+)?|['\"’”]")
+
+WEIGHT_UNITS = {
+    'kg': 'kg', 'kgs': 'kg', 'kilo': 'kg', 'kilos': 'kg', 'kilogram': 'kg', 'kilograms': 'kg',
+    'lb': 'lb', 'lbs': 'lb', 'pound': 'lb', 'pounds': 'lb',
+}
+
+HEIGHT_UNITS = {
+    'm': 'm', 'meter': 'm', 'meters': 'm', 'metre': 'm', 'metres': 'm',
+    'cm': 'cm', 'centimeter': 'cm', 'centimeters': 'cm', 'centimetre': 'cm', 'centimetres': 'cm',
+    'ft': 'ft', 'foot': 'ft', 'feet': 'ft', "'": 'ft', '’': 'ft',
+    'in': 'in', 'inch': 'in', 'inches': 'in', '"': 'in', '”': 'in',
+}
+
+METRES_PER_UNIT = {'m': 1.0, 'cm': 0.01, 'ft': 0.3048, 'in': 0.0254}
+# Heights outside this range (metres) are misreadings, e.g. the age in "I'm 30"
+HEIGHT_RANGE_M = (0.5, 2.75)
+
+WEIGHT_CUES = {'weigh', 'weight', 'weighs', 'weighing'}
+HEIGHT_CUES = {'height', 'tall', "i'm", 'im'}
+AGE_CUES = {'age', 'aged'}
+AGE_UNITS = {'years', 'year', 'yrs', 'yr', 'yo'}
+
+MUSCLE_MAP = {
+    'chest': 'chest', 'pecs': 'chest', 'pec': 'chest',
+    'biceps': 'biceps', 'bicep': 'biceps', 'arms': 'biceps', 'arm': 'biceps',
+    'triceps': 'triceps', 'tricep': 'triceps',
+    'shoulders': 'shoulders', 'shoulder': 'shoulders',
+    'back': 'lats', 'lats': 'lats', 'lat': 'lats',
+    'legs': 'quadriceps', 'leg': 'quadriceps', 'quads': 'quadriceps', 'quad': 'quadriceps',
+    'thighs': 'quadriceps', 'thigh': 'quadriceps',
+    'glutes': 'glutes', 'glute': 'glutes', 'butt': 'glutes',
+    'calves': 'calves', 'calf': 'calves',
+    'abs': 'abdominals', 'core': 'abdominals', 'abdominals': 'abdominals',
+}
+
+TYPE_MAP = {
+    'cardio': 'cardio', 'running': 'cardio', 'cycling': 'cardio',
+    'strength': 'strength', 'weights': 'strength', 'lifting': 'strength',
+    'stretching': 'stretching', 'flexibility': 'stretching',
+    'plyometrics': 'plyometrics', 'hiit': 'plyometrics',
+}
+
+DIFFICULTY_MAP = {
+    'beginner': 'beginner', 'beginners': 'beginner', 'easy': 'beginner',
+    'intermediate': 'intermediate',
+    'advanced': 'expert', 'expert': 'expert', 'hard': 'expert',
+}
+
+SEX_MAP = {
+    'male': 'male', 'man': 'male', 'guy': 'male', 'boy': 'male',
+    'female': 'female', 'woman': 'female', 'girl': 'female', 'lady': 'female',
+}
+
+ACTIVITY_MAP = {
+    'sedentary': 'sedentary', 'inactive': 'sedentary',
+    'light': 'light', 'lightly': 'light',
+    'moderate': 'moderate', 'moderately': 'moderate',
+    'active': 'active',
+    'athlete': 'very_active', 'athletic': 'very_active',
+}
+
+GOAL_MAP = {
+    'lose': 'lose', 'losing': 'lose', 'loss': 'lose', 'cut': 'lose', 'cutting': 'lose',
+    'maintain': 'maintain', 'maintaining': 'maintain', 'maintenance': 'maintain',
+    'gain': 'gain', 'gaining': 'gain', 'bulk': 'gain', 'bulking': 'gain',
+}
+
+# One dict lookup per word instead of one per table
+KEYWORD_SLOTS = {}
+for _slot, _table in (('difficulty', DIFFICULTY_MAP), ('type', TYPE_MAP), ('muscle', MUSCLE_MAP),
+                      ('sex', SEX_MAP), ('activity', ACTIVITY_MAP), ('goal', GOAL_MAP)):
+    for _word, _value in _table.items():
+        KEYWORD_SLOTS[_word] = (_slot, _value)
+
+# Words that never belong to a food name in a nutrition query
+NUTRITION_WORDS = {
+    'calories', 'nutrition', 'nutrients', 'protein', 'carbs', 'fat', 'in', 'for', 'of',
+    'how', 'much', 'many', 'what', 'about', 'the', 'are', 'there', 'does', 'facts', 'content',
+}
+
+
+def _unitless_height(value: float, imperial: bool) -> Tuple[float, str]:
+    """Guess the unit of a bare height number"""
+    if value < 3:
+        return value, 'm'
+    if value < 10:
+        return value, 'ft'
+    return value, 'in' if imperial and value < 100 else 'cm'
+
+
+def extract_entities(text: str) -> Dict:
+    """Walk the message once and return every entity the handlers need"""
+    lowered = text.lower()
+    tokens = TOKEN_RE.findall(lowered)
+
+    weight = None
+    age = None
+    height_parts = []
+    bare_height = None
+    keywords = {'muscle': None, 'type': None, 'difficulty': None, 'sex': None, 'activity': None, 'goal': None}
+    food_spans: List[Tuple[int, int]] = []
+    food_words = []
+
+    position = 0
+    count = len(tokens)
+    i = 0
+    while i < count:
+        token = tokens[i]
+        next_token = tokens[i + 1] if i + 1 < count else None
+
+        previous = tokens[i - 1] if i else None
+
+        if token[0].isdigit():
+            value = float(token)
+            if age is None and (next_token in AGE_UNITS or previous in AGE_CUES):
+                age = value
+                i += 2 if next_token in AGE_UNITS else 1
+                continue
+            if weight is None and next_token in WEIGHT_UNITS:
+                weight = (value, WEIGHT_UNITS[next_token])
+                i += 2
+                continue
+            if next_token in HEIGHT_UNITS:
+                height_parts.append((value, HEIGHT_UNITS[next_token]))
+                i += 2
+                continue
+            if weight is None and previous in WEIGHT_CUES:
+                weight = (value, None)
+            elif previous in HEIGHT_CUES or next_token == 'tall':
+                bare_height = value
+            elif height_parts and height_parts[-1][1] == 'ft':
+                # "5 feet 9" - trailing inches without a unit
+                height_parts.append((value, 'in'))
+        elif token[0].isalpha():
+            slot = KEYWORD_SLOTS.get(token)
+            if slot and keywords[slot[0]] is None:
+                # "very active" / "extremely active"
+                if token == 'active' and previous in ('very', 'extremely'):
+                    keywords['activity'] = 'very_active'
+                else:
+                    keywords[slot[0]] = slot[1]
+
+            if len(token) > 2 and token not in NUTRITION_WORDS:
+                start = lowered.find(token, position)
+                position = start + len(token)
+                food_words.append(token)
+                if food_spans and food_spans[-1][1] + 1 >= start:
+                    food_spans[-1] = (food_spans[-1][0], position)
+                else:
+                    food_spans.append((start, position))
+        i += 1
+
+    imperial = (weight is not None and weight[1] == 'lb') or any(unit in ('ft', 'in') for _, unit in height_parts)
+
+    height = None
+    if height_parts:
+        units = {unit for _, unit in height_parts}
+        if units <= {'ft', 'in'}:
+            height = (sum(v * 12 if unit == 'ft' else v for v, unit in height_parts), 'in')
+        else:
+            height = height_parts[0]
+    elif bare_height is not None:
+        height = _unitless_height(bare_height, imperial)
+    if height is not None and not HEIGHT_RANGE_M[0] <= height[0] * METRES_PER_UNIT[height[1]] <= HEIGHT_RANGE_M[1]:
+        height = None
+
+    return {
+        'weight': weight,
+        'height': height,
+        'muscle': keywords['muscle'],
+        'type': keywords['type'],
+        'difficulty': keywords['difficulty'],
+        'age': age,
+        'sex': keywords['sex'],
+        'activity': keywords['activity'],
+        'goal': keywords['goal'],
+        'food': ' '.join(food_words),
+        'food_spans': food_spans,
+    }
+
+
+def to_bmi_data(weight: Optional[Tuple[float, Optional[str]]],
+                height: Optional[Tuple[float, str]]) -> Optional[Dict]:
+    """Convert extracted measurements into BMICalculator inputs
+
+    Weight in pounds selects the imperial system (lbs and inches); otherwise
+    metric (kg and metres). Height is converted to match the weight's system.
+    """
+    if weight is None or height is None:
+        return None
+
+    weight_value, weight_unit = weight
+    height_value, height_unit = height
+    if weight_unit is None:
+        weight_unit = 'lb' if height_unit in ('ft', 'in') else 'kg'
+
+    height_m = height_value * METRES_PER_UNIT[height_unit]
+
+    if weight_unit == 'lb':
+        return {'weight': weight_value, 'height': round(height_m / 0.0254, 2), 'unit_system': 'imperial'}
+    return {'weight': weight_value, 'height': round(height_m, 4), 'unit_system': 'metric'}
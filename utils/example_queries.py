@@ -0,0 +1,35 @@
+"""
+Example prompts shown by the apps, grouped by topic.
+
+The Streamlit app renders these as buttons and the server replays them at
+start-up to warm the caches (see utils.warmup).
+"""
+
+EXAMPLE_QUERIES = {
+    'workout': [
+        "Show me chest exercises",
+        "I want to build muscle",
+        "What are good cardio workouts?",
+        "Exercises for beginners",
+    ],
+    'bmi': [
+        "Calculate my BMI",
+        "I weigh 70kg and I'm 1.75m tall",
+        "What is a healthy BMI range?",
+    ],
+    'nutrition': [
+        "Calories in chicken breast",
+        "Nutrition facts for apple",
+        "Protein content in eggs",
+    ],
+    'motivation': [
+        "I need motivation",
+        "I'm feeling lazy today",
+        "Inspire me to workout",
+    ],
+}
+
+
+def all_example_queries():
+    """Every example prompt, in display order"""
+    return [query for queries in EXAMPLE_QUERIES.values() for query in queries]
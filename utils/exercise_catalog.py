@@ -0,0 +1,164 @@
+"""
+Compact binary exercise catalog, memory-mapped and loaded on first use.
+
+File layout (little-endian):
+
+    header   magic b'EXCAT001', then uint32 row_count, symbol_count,
+             symbols_offset, columns_offset, texts_offset
+    symbols  uint32 offsets[symbol_count + 1] followed by a UTF-8 blob; every
+             distinct category/muscle/type/difficulty/equipment string once
+    columns  one uint16 symbol id per row for each SYMBOL_FIELDS column
+    texts    uint32 offsets[2 * row_count + 1] followed by a UTF-8 blob of
+             name, instructions for each row
+
+Symbol fields are decoded once and interned; columns are zero-copy views over
+the mapped file; names and instructions are decoded only for rows that are
+actually returned. Worker processes share the mapped pages through the OS
+page cache.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterator, List
+
+MAGIC = b'EXCAT001'
+HEADER = struct.Struct('<8s5I')
+SYMBOL_FIELDS = ('category', 'muscle', 'type', 'difficulty', 'equipment')
+TEXT_FIELDS = ('name', 'instructions')
+
+DEFAULT_CATALOG_PATH = os.getenv(
+    'EXERCISE_CATALOG_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'exercise_catalog.bin')
+)
+
+
+def _uint32_array(values) -> bytes:
+    data = array('I', values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tobytes()
+
+
+def write_catalog(records: List[Dict], path: str):
+    """Serialize exercise records into the binary catalog format"""
+    symbols = []
+    symbol_ids = {}
+    columns = {field: array('H') for field in SYMBOL_FIELDS}
+    for record in records:
+        for field in SYMBOL_FIELDS:
+            value = record[field]
+            if value not in symbol_ids:
+                symbol_ids[value] = len(symbols)
+                symbols.append(value)
+            columns[field].append(symbol_ids[value])
+    if len(symbols) > 0xFFFF:
+        raise ValueError("Too many distinct symbol values for uint16 columns")
+
+    def blob_section(strings):
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = [0]
+        for item in encoded:
+            offsets.append(offsets[-1] + len(item))
+        return _uint32_array(offsets) + b''.join(encoded)
+
+    symbols_section = blob_section(symbols)
+    columns_section = b''
+    for field in SYMBOL_FIELDS:
+        column = columns[field]
+        if sys.byteorder != 'little':
+            column.byteswap()
+        columns_section += column.tobytes()
+    texts_section = blob_section([record[field] for record in records for field in TEXT_FIELDS])
+
+    symbols_offset = HEADER.size
+    columns_offset = symbols_offset + len(symbols_section)
+    # Keep the uint32 text offsets 4-byte aligned
+    padding = (-(columns_offset + len(columns_section))) % 4
+    texts_offset = columns_offset + len(columns_section) + padding
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(records), len(symbols), symbols_offset, columns_offset, texts_offset))
+        f.write(symbols_section)
+        f.write(columns_section)
+        f.write(b'\0' * padding)
+        f.write(texts_section)
+    os.replace(path + '.tmp', path)
+
+
+class ExerciseCatalog:
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        magic, rows, symbol_count, symbols_offset, columns_offset, texts_offset = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an exercise catalog")
+        if sys.byteorder != 'little':
+            raise RuntimeError("Memory-mapped catalogs require a little-endian platform")
+
+        self.row_count = rows
+        offsets = view[symbols_offset:symbols_offset + 4 * (symbol_count + 1)].cast('I')
+        blob = symbols_offset + 4 * (symbol_count + 1)
+        self.symbols = [sys.intern(bytes(view[blob + offsets[i]:blob + offsets[i + 1]]).decode('utf-8'))
+                        for i in range(symbol_count)]
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        self.columns = {}
+        for n, field in enumerate(SYMBOL_FIELDS):
+            start = columns_offset + n * 2 * rows
+            self.columns[field] = view[start:start + 2 * rows].cast('H')
+
+        self._text_offsets = view[texts_offset:texts_offset + 4 * (2 * rows + 1)].cast('I')
+        self._text_blob = texts_offset + 4 * (2 * rows + 1)
+        self._view = view
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def text(self, row: int, field: str) -> str:
+        """Decode one name or instructions string"""
+        i = 2 * row + TEXT_FIELDS.index(field)
+        start = self._text_blob + self._text_offsets[i]
+        end = self._text_blob + self._text_offsets[i + 1]
+        return bytes(self._view[start:end]).decode('utf-8')
+
+    def value(self, row: int, field: str) -> str:
+        """Interned value of a symbol field"""
+        return self.symbols[self.columns[field][row]]
+
+    def record(self, row: int) -> Dict:
+        """Materialize one exercise as the dict shape the rest of the app uses"""
+        return {
+            'name': self.text(row, 'name'),
+            'type': self.value(row, 'type'),
+            'muscle': self.value(row, 'muscle'),
+            'equipment': self.value(row, 'equipment'),
+            'difficulty': self.value(row, 'difficulty'),
+            'instructions': self.text(row, 'instructions'),
+        }
+
+    def rows_by_symbol(self, field: str) -> Dict[str, List[int]]:
+        """Row numbers grouped by each value of a symbol field"""
+        groups = {}
+        for row, code in enumerate(self.columns[field]):
+            groups.setdefault(self.symbols[code], []).append(row)
+        return groups
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in range(self.row_count):
+            yield self.record(row)
+
+
+_catalog = None
+
+
+def get_catalog() -> ExerciseCatalog:
+    """Shared catalog, mapped on first use"""
+    global _catalog
+    if _catalog is None:
+        _catalog = ExerciseCatalog()
+    return _catalog
@@ -0,0 +1,133 @@
+"""
+Precomputed "similar exercises" table.
+
+data/create_exercise_catalog.py vectorizes every catalog exercise offline and
+stores its top-k most similar rows in data/exercise_neighbors.bin:
+
+    header   magic b'EXNBR001', then uint32 row_count, k, catalog_crc32
+    rows     uint32 neighbour row ids, row_count * k (0xFFFFFFFF pads)
+    scores   float32 cosine similarities, row_count * k
+
+At runtime a similarity query is a slice of the memory-mapped table. The CRC
+of the catalog file it was built from is checked so a stale table is ignored.
+"""
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, List, Optional
+
+from .exercise_catalog import DEFAULT_CATALOG_PATH, get_catalog
+
+MAGIC = b'EXNBR001'
+HEADER = struct.Struct('<8s3I')
+NO_NEIGHBOR = 0xFFFFFFFF
+
+DEFAULT_NEIGHBORS_PATH = os.getenv(
+    'EXERCISE_NEIGHBORS_PATH',
+    os.path.join(os.path.dirname(DEFAULT_CATALOG_PATH), 'exercise_neighbors.bin')
+)
+
+# Equipment values that count as "no equipment"
+NO_EQUIPMENT = {'body_only'}
+
+
+def file_crc32(path: str) -> int:
+    """CRC32 of a file, used to tie the table to one catalog build"""
+    crc = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def write_neighbor_table(path: str, neighbors: List[List[int]], scores: List[List[float]], k: int,
+                         catalog_crc: int):
+    """Write a neighbour table; shorter rows are padded"""
+    ids = array('I')
+    values = array('f')
+    for row_neighbors, row_scores in zip(neighbors, scores):
+        padding = k - len(row_neighbors)
+        ids.extend(list(row_neighbors[:k]) + [NO_NEIGHBOR] * padding)
+        values.extend(list(row_scores[:k]) + [0.0] * padding)
+    if sys.byteorder != 'little':
+        ids.byteswap()
+        values.byteswap()
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(neighbors), k, catalog_crc))
+        f.write(ids.tobytes())
+        f.write(values.tobytes())
+    os.replace(path + '.tmp', path)
+
+
+class NeighborTable:
+    def __init__(self, path: str = DEFAULT_NEIGHBORS_PATH):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        magic, self.row_count, self.k, self.catalog_crc = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an exercise neighbour table")
+
+        size = self.row_count * self.k
+        self.ids = view[HEADER.size:HEADER.size + 4 * size].cast('I')
+        self.scores = view[HEADER.size + 4 * size:HEADER.size + 8 * size].cast('f')
+
+    def neighbors(self, row: int) -> List[int]:
+        """Neighbour rows of one exercise, most similar first"""
+        start = row * self.k
+        return [n for n in self.ids[start:start + self.k] if n != NO_NEIGHBOR]
+
+
+class SimilarExercises:
+    def __init__(self, catalog, table: NeighborTable):
+        self.catalog = catalog
+        self.table = table
+        self._rows_by_name = None
+
+    def row_for_name(self, name: str) -> Optional[int]:
+        """Catalog row of an exercise name (the lookup dict is built once)"""
+        if self._rows_by_name is None:
+            self._rows_by_name = {self.catalog.text(row, 'name').lower(): row for row in range(len(self.catalog))}
+        return self._rows_by_name.get(name.lower())
+
+    def similar(self, name: str, k: int = 3, no_equipment: bool = False, exclude: Optional[set] = None) -> List[Dict]:
+        """Up to k exercises similar to `name`, optionally bodyweight only"""
+        row = self.row_for_name(name)
+        if row is None:
+            return []
+
+        exclude = {n.lower() for n in (exclude or ())}
+        results = []
+        for neighbor in self.table.neighbors(row):
+            if no_equipment and self.catalog.value(neighbor, 'equipment') not in NO_EQUIPMENT:
+                continue
+            record = self.catalog.record(neighbor)
+            if record['name'].lower() in exclude:
+                continue
+            results.append(record)
+            if len(results) == k:
+                break
+        return results
+
+
+_similar = None
+
+
+def get_similar_exercises() -> Optional[SimilarExercises]:
+    """Shared lookup over the neighbour table, or None if it is missing or stale"""
+    global _similar
+    if _similar is None:
+        _similar = False
+        if os.path.exists(DEFAULT_NEIGHBORS_PATH):
+            table = NeighborTable(DEFAULT_NEIGHBORS_PATH)
+            catalog = get_catalog()
+            if table.row_count == len(catalog) and table.catalog_crc == file_crc32(catalog.path):
+                _similar = SimilarExercises(catalog, table)
+            else:
+                print("Exercise neighbour table is stale; run data/create_exercise_catalog.py")
+    return _similar or None
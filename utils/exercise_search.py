@@ -0,0 +1,124 @@
+"""
+Ranked free-text search over the exercise catalog (BM25).
+
+Names, instructions, equipment, muscle and type are tokenized into an
+inverted index the first time a search runs. Postings are compact arrays and
+per-term IDF is precomputed, so a query only scores the documents that share
+a term with it and keeps the top k with a heap.
+"""
+import heapq
+import math
+import re
+from array import array
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from .exercise_catalog import get_catalog
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'for', 'from', 'how', 'i', 'in', 'into',
+    'is', 'it', 'me', 'my', 'of', 'on', 'or', 'so', 'some', 'that', 'the', 'then', 'this', 'to', 'up',
+    'what', 'with',
+    'exercise', 'exercises', 'workout', 'workouts', 'show', 'give', 'good', 'best', 'want', 'need',
+}
+
+# Extra words indexed with each equipment value
+EQUIPMENT_TERMS = {
+    'body_only': 'bodyweight no equipment home',
+    'dumbbells': 'dumbbell weights',
+    'pull_up_bar': 'bar pullup',
+    'resistance_bands': 'band bands',
+}
+
+# Query phrases rewritten before tokenizing
+QUERY_SYNONYMS = [
+    (re.compile(r"\b(without|no) (any )?equipment\b"), 'bodyweight'),
+    (re.compile(r"\bbody ?weight\b"), 'bodyweight'),
+    (re.compile(r"\babs?\b|\bcore\b"), 'abdominals core'),
+]
+
+# Fields repeated to weight them more heavily (a simple BM25F)
+FIELD_WEIGHTS = (('name', 3), ('muscle', 2), ('type', 1), ('equipment', 1), ('instructions', 1))
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split, drop stop words and strip a plural 's'"""
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower().replace('_', ' ')):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class ExerciseSearch:
+    def __init__(self, catalog, k1: float = 1.2, b: float = 0.75):
+        self.catalog = catalog
+        self.k1 = k1
+        self.b = b
+
+        postings: Dict[str, Tuple[array, array]] = {}
+        self.doc_lengths = array('I')
+        for row in range(len(catalog)):
+            record = catalog.record(row)
+            terms = Counter()
+            for field, weight in FIELD_WEIGHTS:
+                value = record[field]
+                if field == 'equipment':
+                    value = f"{value} {EQUIPMENT_TERMS.get(value, '')}"
+                for token in tokenize(value):
+                    terms[token] += weight
+            self.doc_lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                rows, frequencies = postings.setdefault(term, (array('I'), array('H')))
+                rows.append(row)
+                frequencies.append(min(frequency, 0xFFFF))
+
+        self.postings = postings
+        count = max(len(self.doc_lengths), 1)
+        self.average_length = sum(self.doc_lengths) / count
+        self.idf = {term: math.log(1 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+                    for term, (rows, _) in postings.items()}
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """Top-k (catalog row, BM25 score) pairs for a free-text query"""
+        query = query.lower()
+        for pattern, replacement in QUERY_SYNONYMS:
+            query = pattern.sub(replacement, query)
+
+        scores: Dict[int, float] = {}
+        k1, b, average_length, doc_lengths = self.k1, self.b, self.average_length, self.doc_lengths
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            idf = self.idf[term]
+            rows, frequencies = self.postings[term]
+            for row, frequency in zip(rows, frequencies):
+                norm = k1 * (1 - b + b * doc_lengths[row] / average_length)
+                scores[row] = scores.get(row, 0.0) + idf * frequency * (k1 + 1) / (frequency + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def search_records(self, query: str, k: int = 5) -> List[Dict]:
+        """Top-k exercises as the usual exercise dicts"""
+        return [self.catalog.record(row) for row, _ in self.search(query, k)]
+
+
+_search = None
+
+
+def get_exercise_search() -> ExerciseSearch:
+    """Shared search index, built on first use"""
+    global _search
+    if _search is None:
+        _search = ExerciseSearch(get_catalog())
+    return _search
+
+
+def search_exercises(query: str, k: int = 5) -> List[Dict]:
+    """Ranked exercises for a free-text workout question"""
+    return get_exercise_search().search_records(query, k)
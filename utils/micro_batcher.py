@@ -0,0 +1,91 @@
+"""
+Micro-batching of CPU-bound work from an asyncio event loop.
+
+Coroutines submit single items; a collector task groups whatever is queued
+(up to `max_batch`, waiting at most `max_delay` seconds for more) and sends
+each group to an executor - usually a process pool - as one call, so IPC is
+paid per batch rather than per item. At most `max_in_flight` batches run at
+once; while they are busy, new items queue up and the next batch is larger.
+"""
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional
+
+
+class MicroBatcher:
+    def __init__(self, executor: Executor, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch: int = 32, max_delay: float = 0.002, max_in_flight: int = 2):
+        """`batch_fn` must be picklable for process pools and return one result per item"""
+        self.executor = executor
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_in_flight = max_in_flight
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Result of `batch_fn` for one item"""
+        if self._collector is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._collector = asyncio.get_running_loop().create_task(self._collect())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for a free executor slot first, so items pile up while workers are busy
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: List):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.batch_fn, [item for item, _ in batch])
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'queued': self._queue.qsize() if self._queue else 0,
+        }
+
+    async def close(self):
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
@@ -1,144 +1,339 @@
+"""
+Motivational quotes, encouragements and tips, retrieved by context.
+
+Every entry carries a few tags (fatigue, quitting, diet, confidence,
+consistency, ...). Each collection keeps an inverted index from tag to entry
+ids, and the user's message is matched against CONTEXT_TERMS in one pass over
+its words, so picking a relevant entry is a dict lookup plus random.choice
+however large the bank grows.
+
+With a session id, entries are dealt from a per-session shuffled deck
+instead, so nothing repeats until the whole collection has been served. A
+deck is stored as an affine permutation i -> (a * i + b) mod n, a cursor and
+a bitmask of served ids: four integers per collection and session, not a
+copied list; all of a session's decks share one flat list.
+"""
+import math
 import random
-from typing import List
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# (text, space-separated tags)
+QUOTES = [
+    # Fitness and Exercise Motivation
+    ("💪 The only bad workout is the one that didn't happen!", "laziness consistency"),
+    ("🏃‍♀️ Your body can do it. It's your mind you need to convince.", "mindset fatigue"),
+    ("⚡ Strength doesn't come from what you can do. It comes from overcoming the things you once thought you couldn't.", "strength confidence"),
+    ("🔥 Don't stop when you're tired. Stop when you're done!", "fatigue quitting"),
+    ("🌟 The pain you feel today will be the strength you feel tomorrow.", "fatigue strength"),
+    ("🎯 Success isn't given. It's earned in the gym, on the field, and in every training session.", "consistency goals"),
+    ("💥 Push yourself because no one else is going to do it for you.", "laziness"),
+    ("🏆 Champions train, losers complain.", "laziness"),
+    ("✨ The only person you are destined to become is the person you decide to be.", "confidence goals"),
+    ("🚀 Believe in yourself and all that you are. Know that there is something inside you that is greater than any obstacle.", "confidence discouraged"),
+    
+    # Health and Wellness Motivation
+    ("🌱 Take care of your body. It's the only place you have to live.", "health"),
+    ("💚 Health is not about the weight you lose, but about the life you gain.", "health weight"),
+    ("🧘‍♀️ A healthy outside starts from the inside.", "health diet"),
+    ("🌈 You don't have to be perfect, you just have to be better than you were yesterday.", "discouraged progress"),
+    ("🦋 Progress, not perfection.", "progress discouraged"),
+    ("🌸 Your health is an investment, not an expense.", "health"),
+    ("💎 You are stronger than you think and more capable than you imagine.", "confidence strength"),
+    ("🌟 Small changes can make a big difference.", "progress laziness"),
+    ("🌊 Consistency is key to achieving your health goals.", "consistency"),
+    ("🌞 Every day is a new opportunity to improve your health.", "health consistency"),
+    
+    # Diet and Nutrition Motivation
+    ("🥗 You are what you eat, so don't be fast, cheap, easy or fake.", "diet"),
+    ("🍎 Eat clean, train hard, stay healthy.", "diet"),
+    ("🥑 Fuel your body with the right foods and watch it transform.", "diet"),
+    ("🌾 Good nutrition is the foundation of a healthy lifestyle.", "diet health"),
+    ("🥕 Every meal is a chance to nourish your body.", "diet"),
+    ("🍓 Eat the rainbow - colorful foods are full of nutrients!", "diet"),
+    ("🥪 A balanced diet is a cookie in each hand... just kidding! Balance is key.", "diet"),
+    ("🥤 Hydrate, nourish, and energize your body.", "diet fatigue"),
+    ("🍌 Food is fuel, not therapy.", "diet"),
+    ("🥒 Make healthy choices today for a healthier tomorrow.", "diet consistency"),
+    
+    # Mental Strength and Mindset
+    ("🧠 Your mind is your most powerful tool. Use it wisely.", "mindset"),
+    ("💭 Positive thoughts lead to positive actions.", "mindset discouraged"),
+    ("🎯 Focus on progress, not perfection.", "progress"),
+    ("🔄 Fall seven times, stand up eight.", "quitting discouraged"),
+    ("🌅 Every morning is a fresh start to become the best version of yourself.", "discouraged consistency"),
+    ("🎪 Life begins at the end of your comfort zone.", "laziness"),
+    ("🔋 You have the power to change your life one healthy choice at a time.", "consistency confidence"),
+    ("🎭 Be yourself, everyone else is taken.", "confidence"),
+    ("🌠 Dream big, work hard, stay focused.", "goals"),
+    ("⭐ You are capable of amazing things!", "confidence"),
+    
+    # Goal Achievement
+    ("🎯 Goals are dreams with deadlines.", "goals"),
+    ("📈 Success is the sum of small efforts repeated day in and day out.", "consistency progress"),
+    ("🏅 Winners never quit, and quitters never win.", "quitting"),
+    ("🎖️ The difference between ordinary and extraordinary is that little extra.", "goals"),
+    ("🚧 Obstacles are those frightful things you see when you take your eyes off your goals.", "goals quitting"),
+    ("📊 Track your progress, celebrate your wins, learn from your setbacks.", "progress discouraged"),
+    ("🔥 Discipline is choosing between what you want now and what you want most.", "consistency diet"),
+    ("⏰ The best time to plant a tree was 20 years ago. The second best time is now.", "laziness"),
+    ("🎨 Create the life you want, one healthy choice at a time.", "consistency"),
+    ("🏃‍♂️ It's not about being perfect, it's about being consistent.", "consistency"),
+    
+    # Self-Love and Confidence
+    ("💖 Love yourself enough to live a healthy lifestyle.", "confidence"),
+    ("👑 You are worth the effort it takes to be healthy.", "confidence"),
+    ("🌟 Believe in yourself, even when others don't.", "confidence"),
+    ("💝 Self-care is not selfish, it's essential.", "fatigue confidence"),
+    ("🦸‍♀️ You are your own superhero.", "confidence"),
+    ("💪 Strong is beautiful, healthy is beautiful, you are beautiful.", "confidence strength"),
+    ("🌈 Embrace your journey, celebrate your progress.", "progress"),
+    ("✨ You are enough, just as you are, and you deserve to be healthy and happy.", "confidence discouraged"),
+    ("🦋 Transform yourself from the inside out.", "weight"),
+    ("🎯 You have everything within you to succeed.", "confidence")
+]
+
+ENCOURAGEMENTS = [
+    ("🌟 You've got this! Every step forward is progress.", "progress"),
+    ("💪 Keep going! Your future self will thank you.", "quitting"),
+    ("🔥 Don't give up now! You're closer than you think.", "quitting"),
+    ("⚡ Stay strong! Champions are made in moments of doubt.", "confidence discouraged"),
+    ("🚀 Push through! Great things never come from comfort zones.", "laziness fatigue"),
+    ("🏆 Keep fighting! Your dedication will pay off.", "quitting consistency"),
+    ("💎 Stay focused! Diamonds are formed under pressure.", "stress"),
+    ("🌅 New day, new opportunities! You can do this.", "discouraged"),
+    ("🎯 Stay on track! Every healthy choice matters.", "diet consistency"),
+    ("💥 Power through! You're stronger than your excuses.", "laziness")
+]
+
+SUCCESS_TIPS = [
+    ("🎯 Set small, achievable goals and celebrate each victory!", "goals"),
+    ("📅 Create a routine and stick to it - consistency is key!", "consistency"),
+    ("📝 Track your progress - what gets measured gets managed!", "progress weight"),
+    ("🤝 Find a workout buddy for accountability and motivation!", "laziness consistency"),
+    ("🎵 Create an energizing playlist to pump you up!", "laziness fatigue"),
+    ("📚 Educate yourself about fitness and nutrition!", "diet"),
+    ("🧘‍♀️ Practice mindfulness and listen to your body!", "stress fatigue"),
+    ("💤 Prioritize sleep - recovery is part of the process!", "fatigue"),
+    ("🥗 Meal prep to set yourself up for success!", "diet"),
+    ("🏅 Reward yourself for reaching milestones (non-food rewards)!", "goals diet")
+]
+
+# Message words (and "give up"-style bigrams) that signal a tag
+CONTEXT_TERMS = {
+    'tired': 'fatigue', 'exhausted': 'fatigue', 'fatigue': 'fatigue', 'fatigued': 'fatigue', 'sore': 'fatigue',
+    'sleepy': 'fatigue', 'drained': 'fatigue', 'burnt': 'fatigue', 'burned': 'fatigue',
+    'lazy': 'laziness', 'unmotivated': 'laziness', 'procrastinating': 'laziness', 'bored': 'laziness',
+    'be bothered': 'laziness', 'no energy': 'fatigue',
+    'quit': 'quitting', 'quitting': 'quitting', 'give up': 'quitting', 'giving up': 'quitting', 'stop': 'quitting',
+    'discouraged': 'discouraged', 'sad': 'discouraged', 'depressed': 'discouraged', 'failed': 'discouraged',
+    'failing': 'discouraged', 'plateau': 'discouraged', 'stuck': 'discouraged', 'setback': 'discouraged',
+    'diet': 'diet', 'eating': 'diet', 'eat': 'diet', 'food': 'diet', 'cravings': 'diet', 'junk': 'diet',
+    'sugar': 'diet', 'nutrition': 'diet', 'meal': 'diet', 'meals': 'diet',
+    'confidence': 'confidence', 'confident': 'confidence', 'insecure': 'confidence', 'ugly': 'confidence',
+    'doubt': 'confidence', 'believe': 'confidence', 'ashamed': 'confidence', 'embarrassed': 'confidence',
+    'consistent': 'consistency', 'consistency': 'consistency', 'routine': 'consistency', 'habit': 'consistency',
+    'habits': 'consistency', 'skipping': 'consistency', 'skipped': 'consistency', 'discipline': 'consistency',
+    'goal': 'goals', 'goals': 'goals', 'target': 'goals',
+    'progress': 'progress', 'slow': 'progress', 'results': 'progress',
+    'weight': 'weight', 'fat': 'weight', 'pounds': 'weight', 'kilos': 'weight',
+    'stressed': 'stress', 'stress': 'stress', 'anxious': 'stress', 'overwhelmed': 'stress',
+    'strong': 'strength', 'stronger': 'strength', 'strength': 'strength', 'weak': 'strength',
+}
+
+# Extra line added to a quote for the strongest tag in the message
+CONTEXT_NOTES = {
+    'fatigue': "🌙 Remember: Rest is part of the journey. Listen to your body and take care of yourself!",
+    'laziness': "⚡ Start small today! Even 5 minutes of movement is better than none. You've got this!",
+    'quitting': "🔥 Don't quit! Remember why you started. Every champion was once a beginner who refused to give up!",
+    'discouraged': "💖 Be patient with yourself. Progress isn't always linear, but every step counts!",
+}
+
+WORD_RE = re.compile(r"[a-z']+")
+
+
+def context_tags(text: str) -> List[str]:
+    """Tags signalled by a message, most frequent first, in one pass over its words"""
+    words = WORD_RE.findall(text.lower())
+    counts = Counter()
+    previous = None
+    for word in words:
+        tag = CONTEXT_TERMS.get(word)
+        if tag is None and previous is not None:
+            tag = CONTEXT_TERMS.get(f"{previous} {word}")
+        if tag is not None:
+            counts[tag] += 1
+        previous = word
+    return [tag for tag, _ in counts.most_common()]
+
+
+class TagIndex:
+    """Texts plus an inverted index from tag to text ids"""
+
+    def __init__(self, entries: Sequence[Tuple[str, str]]):
+        self.texts = [text for text, _ in entries]
+        self.ids_by_tag: Dict[str, List[int]] = {}
+        for entry_id, (_, tags) in enumerate(entries):
+            for tag in tags.split():
+                self.ids_by_tag.setdefault(tag, []).append(entry_id)
+
+    def choose_id(self, tags: Sequence[str] = ()) -> int:
+        """Random entry for the first tag that has any, else any entry"""
+        for tag in tags:
+            ids = self.ids_by_tag.get(tag)
+            if ids:
+                return random.choice(ids)
+        return random.randrange(len(self.texts))
+
+    def choose(self, tags: Sequence[str] = ()) -> str:
+        return self.texts[self.choose_id(tags)]
+
+    def deal_id(self, decks: List[int], offset: int, tags: Sequence[str] = ()) -> int:
+        """Next unserved entry from the deck [a, b, cursor, served] at decks[offset:offset + 4]
+
+        The deck is updated in place. A matching tag is preferred; otherwise
+        the deck order is followed. Once every entry has been served the deck
+        is reshuffled.
+        """
+        size = len(self.texts)
+        if decks[offset + 3] == (1 << size) - 1:
+            decks[offset:offset + 4] = new_deck(size)
+        a, b, cursor, served = decks[offset:offset + 4]
+
+        for tag in tags:
+            ids = self.ids_by_tag.get(tag)
+            if not ids:
+                continue
+            start = random.randrange(len(ids))
+            for k in range(len(ids)):
+                entry_id = ids[(start + k) % len(ids)]
+                if not served >> entry_id & 1:
+                    decks[offset + 3] = served | 1 << entry_id
+                    return entry_id
+
+        # Every position before the cursor is served, so an unserved id lies ahead
+        while True:
+            entry_id = (a * cursor + b) % size
+            cursor += 1
+            if not served >> entry_id & 1:
+                decks[offset + 2] = cursor
+                decks[offset + 3] = served | 1 << entry_id
+                return entry_id
+
+
+def new_deck(size: int) -> List[int]:
+    """A fresh shuffled deck: a random affine permutation of range(size)"""
+    a = 1
+    if size > 2:
+        a = random.randrange(1, size)
+        while math.gcd(a, size) != 1:
+            a = random.randrange(1, size)
+    return [a, random.randrange(size), 0, 0]
+
+
+class SessionDecks:
+    """Per-session deck state, least recently used sessions evicted first"""
+
+    def __init__(self, sizes: Sequence[int], max_sessions: int = 100000):
+        """`sizes` are the collection sizes; deck k lives at offset 4 * k"""
+        self.sizes = tuple(sizes)
+        self.max_sessions = max_sessions
+        self.lock = threading.Lock()
+        self._sessions: "OrderedDict[str, List[int]]" = OrderedDict()
+
+    def decks(self, session_id: str) -> List[int]:
+        """Flat deck list for a session (call with the lock held)"""
+        decks = self._sessions.get(session_id)
+        if decks is None:
+            decks = self._sessions[session_id] = [value for size in self.sizes for value in new_deck(size)]
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return decks
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+_session_decks = None
+
+
+def get_session_decks() -> SessionDecks:
+    """Process-wide deck store shared by every MotivationService"""
+    global _session_decks
+    if _session_decks is None:
+        _session_decks = SessionDecks([len(QUOTES), len(ENCOURAGEMENTS), len(SUCCESS_TIPS)])
+    return _session_decks
+
+
+_tag_indexes = None
+
+
+def get_tag_indexes() -> Tuple[TagIndex, TagIndex, TagIndex]:
+    """Process-wide (quotes, encouragements, tips) indexes, built on first use"""
+    global _tag_indexes
+    if _tag_indexes is None:
+        _tag_indexes = (TagIndex(QUOTES), TagIndex(ENCOURAGEMENTS), TagIndex(SUCCESS_TIPS))
+    return _tag_indexes
+
 
 class MotivationService:
-    def __init__(self):
-        self.motivational_quotes = [
-            # Fitness and Exercise Motivation
-            "💪 The only bad workout is the one that didn't happen!",
-            "🏃‍♀️ Your body can do it. It's your mind you need to convince.",
-            "⚡ Strength doesn't come from what you can do. It comes from overcoming the things you once thought you couldn't.",
-            "🔥 Don't stop when you're tired. Stop when you're done!",
-            "🌟 The pain you feel today will be the strength you feel tomorrow.",
-            "🎯 Success isn't given. It's earned in the gym, on the field, and in every training session.",
-            "💥 Push yourself because no one else is going to do it for you.",
-            "🏆 Champions train, losers complain.",
-            "✨ The only person you are destined to become is the person you decide to be.",
-            "🚀 Believe in yourself and all that you are. Know that there is something inside you that is greater than any obstacle.",
-            
-            # Health and Wellness Motivation
-            "🌱 Take care of your body. It's the only place you have to live.",
-            "💚 Health is not about the weight you lose, but about the life you gain.",
-            "🧘‍♀️ A healthy outside starts from the inside.",
-            "🌈 You don't have to be perfect, you just have to be better than you were yesterday.",
-            "🦋 Progress, not perfection.",
-            "🌸 Your health is an investment, not an expense.",
-            "💎 You are stronger than you think and more capable than you imagine.",
-            "🌟 Small changes can make a big difference.",
-            "🌊 Consistency is key to achieving your health goals.",
-            "🌞 Every day is a new opportunity to improve your health.",
-            
-            # Diet and Nutrition Motivation
-            "🥗 You are what you eat, so don't be fast, cheap, easy or fake.",
-            "🍎 Eat clean, train hard, stay healthy.",
-            "🥑 Fuel your body with the right foods and watch it transform.",
-            "🌾 Good nutrition is the foundation of a healthy lifestyle.",
-            "🥕 Every meal is a chance to nourish your body.",
-            "🍓 Eat the rainbow - colorful foods are full of nutrients!",
-            "🥪 A balanced diet is a cookie in each hand... just kidding! Balance is key.",
-            "🥤 Hydrate, nourish, and energize your body.",
-            "🍌 Food is fuel, not therapy.",
-            "🥒 Make healthy choices today for a healthier tomorrow.",
-            
-            # Mental Strength and Mindset
-            "🧠 Your mind is your most powerful tool. Use it wisely.",
-            "💭 Positive thoughts lead to positive actions.",
-            "🎯 Focus on progress, not perfection.",
-            "🔄 Fall seven times, stand up eight.",
-            "🌅 Every morning is a fresh start to become the best version of yourself.",
-            "🎪 Life begins at the end of your comfort zone.",
-            "🔋 You have the power to change your life one healthy choice at a time.",
-            "🎭 Be yourself, everyone else is taken.",
-            "🌠 Dream big, work hard, stay focused.",
-            "⭐ You are capable of amazing things!",
-            
-            # Goal Achievement
-            "🎯 Goals are dreams with deadlines.",
-            "📈 Success is the sum of small efforts repeated day in and day out.",
-            "🏅 Winners never quit, and quitters never win.",
-            "🎖️ The difference between ordinary and extraordinary is that little extra.",
-            "🚧 Obstacles are those frightful things you see when you take your eyes off your goals.",
-            "📊 Track your progress, celebrate your wins, learn from your setbacks.",
-            "🔥 Discipline is choosing between what you want now and what you want most.",
-            "⏰ The best time to plant a tree was 20 years ago. The second best time is now.",
-            "🎨 Create the life you want, one healthy choice at a time.",
-            "🏃‍♂️ It's not about being perfect, it's about being consistent.",
-            
-            # Self-Love and Confidence
-            "💖 Love yourself enough to live a healthy lifestyle.",
-            "👑 You are worth the effort it takes to be healthy.",
-            "🌟 Believe in yourself, even when others don't.",
-            "💝 Self-care is not selfish, it's essential.",
-            "🦸‍♀️ You are your own superhero.",
-            "💪 Strong is beautiful, healthy is beautiful, you are beautiful.",
-            "🌈 Embrace your journey, celebrate your progress.",
-            "✨ You are enough, just as you are, and you deserve to be healthy and happy.",
-            "🦋 Transform yourself from the inside out.",
-            "🎯 You have everything within you to succeed."
-        ]
-        
-        self.encouragement_messages = [
-            "🌟 You've got this! Every step forward is progress.",
-            "💪 Keep going! Your future self will thank you.",
-            "🔥 Don't give up now! You're closer than you think.",
-            "⚡ Stay strong! Champions are made in moments of doubt.",
-            "🚀 Push through! Great things never come from comfort zones.",
-            "🏆 Keep fighting! Your dedication will pay off.",
-            "💎 Stay focused! Diamonds are formed under pressure.",
-            "🌅 New day, new opportunities! You can do this.",
-            "🎯 Stay on track! Every healthy choice matters.",
-            "💥 Power through! You're stronger than your excuses."
-        ]
+    def __init__(self, decks: Optional[SessionDecks] = None):
+        # The indexes are shared; only per-session deck state lives in `decks`
+        self.decks = decks if decks is not None else get_session_decks()
+        self.quotes, self.encouragements, self.tips = get_tag_indexes()
         
-        self.success_tips = [
-            "🎯 Set small, achievable goals and celebrate each victory!",
-            "📅 Create a routine and stick to it - consistency is key!",
-            "📝 Track your progress - what gets measured gets managed!",
-            "🤝 Find a workout buddy for accountability and motivation!",
-            "🎵 Create an energizing playlist to pump you up!",
-            "📚 Educate yourself about fitness and nutrition!",
-            "🧘‍♀️ Practice mindfulness and listen to your body!",
-            "💤 Prioritize sleep - recovery is part of the process!",
-            "🥗 Meal prep to set yourself up for success!",
-            "🏅 Reward yourself for reaching milestones (non-food rewards)!"
-        ]
-    
-    def get_random_quote(self) -> str:
-        """Get a random motivational quote"""
-        return random.choice(self.motivational_quotes)
-    
-    def get_encouragement(self) -> str:
+        self.motivational_quotes = self.quotes.texts
+        self.encouragement_messages = self.encouragements.texts
+        self.success_tips = self.tips.texts
+    
+    def _choose(self, index: TagIndex, slot: int, tags: Sequence[str], session_id: Optional[str]) -> str:
+        """Random entry, or the next one from the session's deck for this collection"""
+        if session_id is None:
+            return index.choose(tags)
+        with self.decks.lock:
+            return index.texts[index.deal_id(self.decks.decks(session_id), 4 * slot, tags)]
+    
+    def get_random_quote(self, tags: Sequence[str] = (), session_id: Optional[str] = None) -> str:
+        """Get a motivational quote, matching the tags when possible"""
+        return self._choose(self.quotes, 0, tags, session_id)
+    
+    def get_encouragement(self, tags: Sequence[str] = (), session_id: Optional[str] = None) -> str:
         """Get an encouraging message"""
-        return random.choice(self.encouragement_messages)
+        return self._choose(self.encouragements, 1, tags, session_id)
     
-    def get_success_tip(self) -> str:
+    def get_success_tip(self, tags: Sequence[str] = (), session_id: Optional[str] = None) -> str:
         """Get a success tip"""
-        return random.choice(self.success_tips)
+        return self._choose(self.tips, 2, tags, session_id)
     
-    def get_personalized_motivation(self, user_context: str = "") -> str:
+    def get_personalized_motivation(self, user_context: str = "", tags: Optional[List[str]] = None,
+                                    session_id: Optional[str] = None) -> str:
         """Get personalized motivation based on context"""
-        base_message = self.get_random_quote()
+        if tags is None:
+            tags = context_tags(user_context)
+        base_message = self.get_random_quote(tags, session_id)
         
-        if "tired" in user_context.lower() or "exhausted" in user_context.lower():
-            return f"{base_message}\n\n🌙 Remember: Rest is part of the journey. Listen to your body and take care of yourself!"
-        elif "lazy" in user_context.lower() or "unmotivated" in user_context.lower():
-            return f"{base_message}\n\n⚡ Start small today! Even 5 minutes of movement is better than none. You've got this!"
-        elif "give up" in user_context.lower() or "quit" in user_context.lower():
-            return f"{base_message}\n\n🔥 Don't quit! Remember why you started. Every champion was once a beginner who refused to give up!"
-        elif "discouraged" in user_context.lower() or "sad" in user_context.lower():
-            return f"{base_message}\n\n💖 Be patient with yourself. Progress isn't always linear, but every step counts!"
-        else:
-            return f"{base_message}\n\n{self.get_success_tip()}"
+        for tag in tags:
+            if tag in CONTEXT_NOTES:
+                return f"{base_message}\n\n{CONTEXT_NOTES[tag]}"
+        return f"{base_message}\n\n{self.get_success_tip(tags, session_id)}"
     
-    def format_motivation_response(self, context: str = "") -> str:
-        """Format a complete motivational response"""
+    def format_motivation_response(self, context: str = "", session_id: Optional[str] = None) -> str:
+        """Format a complete motivational response
+        
+        Pass a session id to rotate through the collections without repeats.
+        """
+        tags = context_tags(context) if context else []
         if context:
-            main_message = self.get_personalized_motivation(context)
+            main_message = self.get_personalized_motivation(context, tags, session_id)
         else:
-            main_message = self.get_random_quote()
+            main_message = self.get_random_quote((), session_id)
         
-        encouragement = self.get_encouragement()
-        tip = self.get_success_tip()
+        encouragement = self.get_encouragement(tags, session_id)
+        tip = self.get_success_tip(tags, session_id)
         
         response = f"🌟 **Motivation Boost** 🌟\n\n"
         response += f"{main_message}\n\n"
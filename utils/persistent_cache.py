@@ -0,0 +1,174 @@
+"""
+Disk-backed API cache shared by every process on the host.
+
+Results live in a SQLite database in WAL mode, so the Streamlit app, the HTTP
+server and any workers read and write the same entries concurrently, and the
+cache stays warm across restarts and deploys. Each entry is fresh until
+`fresh_until`; after that and until `stale_until` it is still served, while
+one background refresh (claimed through a lease column, so only one process
+refreshes a given key) fetches a new value. Past `stale_until` a lookup
+fetches synchronously.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Optional
+
+DEFAULT_CACHE_PATH = os.getenv(
+    'API_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'api_cache.sqlite3')
+)
+
+# Seconds a background refresh may hold a key before another process retries
+REFRESH_LEASE = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS api_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    fresh_until REAL NOT NULL,
+    stale_until REAL NOT NULL,
+    refresh_lease REAL NOT NULL DEFAULT 0
+)
+"""
+
+
+class PersistentCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._inherited = []
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread and process; autocommit, waiting on writers instead of failing"""
+        if self._pid != os.getpid():
+            # Forked: connections must not cross a fork, open fresh ones in this process.
+            # Closing (or freeing) an inherited one is just as unsafe, so keep it
+            # referenced and never touch it; call close() before forking to avoid this.
+            self._pid = os.getpid()
+            self._inherited.append(self._local)
+            self._local = threading.local()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection (e.g. in a server's parent before it forks)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get(self, key: str, allow_stale: bool = True) -> Optional[Any]:
+        """Cached value (fresh, or stale if allowed), or None"""
+        row = self._connection().execute(
+            "SELECT value, fresh_until, stale_until FROM api_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now < row[1] or (allow_stale and now < row[2]):
+            return json.loads(row[0])
+        return None
+
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0):
+        """Store a value, fresh for `ttl` seconds and servable stale for `stale_ttl` more"""
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO api_cache (key, value, fresh_until, stale_until, refresh_lease) "
+            "VALUES (?, ?, ?, ?, 0)",
+            (key, json.dumps(value), now + ttl, now + ttl + stale_ttl))
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any], ttl: float, stale_ttl: float = 0,
+                     cacheable: Callable[[Any], bool] = lambda value: True) -> Any:
+        """Cached value for `key`, calling `fetch` on a miss
+
+        Stale entries are returned immediately and refreshed in the
+        background. Exceptions from a synchronous fetch propagate to the
+        caller; values rejected by `cacheable` are returned but not stored.
+        """
+        row = self._connection().execute(
+            "SELECT value, fresh_until, stale_until FROM api_cache WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is not None:
+            if now < row[1]:
+                return json.loads(row[0])
+            if now < row[2]:
+                self._refresh_in_background(key, fetch, ttl, stale_ttl, cacheable)
+                return json.loads(row[0])
+
+        value = fetch()
+        if cacheable(value):
+            self.set(key, value, ttl, stale_ttl)
+        return value
+
+    def _claim_refresh(self, key: str) -> bool:
+        """Take the refresh lease for a key; False if another process holds it"""
+        now = time.time()
+        cursor = self._connection().execute(
+            "UPDATE api_cache SET refresh_lease = ? WHERE key = ? AND refresh_lease < ?",
+            (now + REFRESH_LEASE, key, now))
+        return cursor.rowcount == 1
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Any], ttl: float, stale_ttl: float,
+                               cacheable: Callable[[Any], bool]):
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                if not self._claim_refresh(key):
+                    return
+                value = fetch()
+                if cacheable(value):
+                    self.set(key, value, ttl, stale_ttl)
+            except Exception as e:
+                # Keep serving the stale value; the lease expires and a later lookup retries
+                print(f"Background refresh of {key} failed: {str(e)}")
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"cache-refresh:{key}", daemon=True).start()
+
+    def prune(self) -> int:
+        """Delete entries too old to be served; returns how many were removed"""
+        cursor = self._connection().execute("DELETE FROM api_cache WHERE stale_until < ?", (time.time(),))
+        return cursor.rowcount
+
+
+_persistent_cache = None
+
+
+def get_persistent_cache() -> Optional[PersistentCache]:
+    """Shared cache, or None if no writable location is available
+
+    Falls back to the temp directory (e.g. read-only serverless filesystems).
+    """
+    global _persistent_cache
+    if _persistent_cache is None:
+        _persistent_cache = False
+        for path in (DEFAULT_CACHE_PATH, os.path.join(tempfile.gettempdir(), 'fitness_chatbot_api_cache.sqlite3')):
+            try:
+                _persistent_cache = PersistentCache(path)
+                break
+            except (OSError, sqlite3.Error) as e:
+                print(f"API cache unavailable at {path}: {str(e)}")
+    return _persistent_cache or None
@@ -0,0 +1,127 @@
+"""
+Nearest-neighbour intent lookup over the training phrases.
+
+Phrases are embedded as character n-gram TF-IDF vectors and stored, already
+L2-normalized, in one CSR matrix when the index is built. A lookup is a single
+sparse matrix-vector product followed by a top-k selection, so it stays well
+under a millisecond even with tens of thousands of phrases. The vocabulary is
+capped (max_features) and values are float32 to keep memory bounded.
+"""
+import csv
+import math
+import os
+from collections import Counter
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    from sklearn.feature_extraction.text import TfidfVectorizer
+except ImportError:  # Lightweight deployments without scikit-learn
+    np = None
+    TfidfVectorizer = None
+
+# A phrase match is trusted only this close, and this far ahead of other intents
+MIN_SIMILARITY = 0.6
+MIN_MARGIN = 0.15
+
+DEFAULT_PHRASES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    'data', 'training_data.csv')
+
+
+class PhraseIndex:
+    def __init__(self, phrases: List[str], intents: List[str], ngram_range: Tuple[int, int] = (3, 4),
+                 max_features: int = 50000):
+        if TfidfVectorizer is None:
+            raise ImportError("PhraseIndex requires numpy and scikit-learn")
+
+        vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=ngram_range, lowercase=True,
+                                     sublinear_tf=True, max_features=max_features, dtype=np.float32)
+        # Rows come out of TfidfVectorizer already L2-normalized. Stored
+        # feature-major, a query only touches the postings of its own n-grams.
+        self.matrix_t = vectorizer.fit_transform(phrases).T.tocsr()
+        self.analyzer = vectorizer.build_analyzer()
+        self.vocabulary = vectorizer.vocabulary_
+        self.idf = vectorizer.idf_.astype(np.float32)
+        self.phrases = phrases
+        self.intent_names, codes = np.unique(np.asarray(intents), return_inverse=True)
+        self.intent_codes = codes.astype(np.uint8 if len(self.intent_names) < 256 else np.int32)
+
+    @classmethod
+    def from_csv(cls, path: str = DEFAULT_PHRASES_PATH, **kwargs) -> 'PhraseIndex':
+        """Build an index from a CSV with 'text' and 'intent' columns"""
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = [(row['text'], row['intent']) for row in csv.DictReader(f)]
+        return cls([text for text, _ in rows], [intent for _, intent in rows], **kwargs)
+
+    def _query_vector(self, text: str):
+        """Sublinear TF-IDF vector for one message, normalized like the phrases"""
+        counts = Counter(self.analyzer(text))
+        features = [self.vocabulary.get(gram) for gram in counts]
+        pairs = [(j, (1 + math.log(count)) * self.idf[j])
+                 for j, count in zip(features, counts.values()) if j is not None]
+        if not pairs:
+            return None
+
+        columns = [j for j, _ in pairs]
+        weights = np.array([w for _, w in pairs], dtype=np.float32)
+        weights /= np.linalg.norm(weights)
+        return csr_matrix((weights, ([0] * len(columns), columns)), shape=(1, self.matrix_t.shape[0]))
+
+    def search(self, text: str, k: int = 5) -> List[Tuple[str, str, float]]:
+        """Return the top-k (phrase, intent, cosine similarity) matches"""
+        query = self._query_vector(text)
+        if query is None:
+            return []
+
+        scores = query @ self.matrix_t
+        if not scores.nnz:
+            return []
+
+        rows, values = scores.indices, scores.data
+        if len(values) > k:
+            top = np.argpartition(values, -k)[-k:]
+            rows, values = rows[top], values[top]
+        order = np.argsort(-values)
+
+        return [(self.phrases[rows[i]], str(self.intent_names[self.intent_codes[rows[i]]]), float(values[i]))
+                for i in order]
+
+    def predict_intent(self, text: str, k: int = 5, min_similarity: float = MIN_SIMILARITY,
+                       min_margin: float = MIN_MARGIN) -> Tuple[Optional[str], float]:
+        """Intent of the nearest phrase, with its cosine similarity as the confidence
+
+        Weak matches return (None, 0.0) so callers fall back to their own
+        default: the best phrase must reach `min_similarity` and beat the
+        nearest phrase of any other intent by `min_margin`. Character n-grams
+        let filler words ("what about ...") pull in unrelated phrases at
+        moderate similarity, so both bars are needed.
+        """
+        best = {}
+        for _, intent, similarity in self.search(text, k):
+            best.setdefault(intent, similarity)
+        if not best:
+            return None, 0.0
+
+        ranked = sorted(best.items(), key=lambda item: -item[1])
+        intent, similarity = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if similarity < min_similarity or similarity - runner_up < min_margin:
+            return None, 0.0
+        return intent, similarity
+
+
+_default_index = None
+
+
+def get_phrase_index() -> Optional[PhraseIndex]:
+    """Shared index over the training phrases, built on first use (None if unavailable)"""
+    global _default_index
+    if _default_index is None:
+        _default_index = False
+        if TfidfVectorizer is not None and os.path.exists(DEFAULT_PHRASES_PATH):
+            try:
+                _default_index = PhraseIndex.from_csv()
+            except Exception as e:
+                print(f"Error building phrase index: {e}")
+    return _default_index or None
@@ -0,0 +1,158 @@
+"""
+Speculative prefetch of likely follow-up lookups.
+
+After "show me chest exercises" people tend to ask for triceps or shoulders,
+and after one food a related one. Transition counts between consecutive
+lookups of the same kind are learned per process and topped up with the
+configured FOLLOW_UPS, and after each answer the most likely next keys are
+fetched in the background so the follow-up is a cache hit.
+
+Prefetching only uses spare capacity: keys already cached are skipped, each
+upstream fetch takes a token from a rate limiter, and at most a few fetches
+are queued at once (anything beyond that is dropped, not delayed).
+"""
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+# Configured follow-ups per lookup kind, most likely first; learned counts take precedence
+FOLLOW_UPS = {
+    'exercise': {
+        'chest': ('triceps', 'shoulders'),
+        'triceps': ('chest', 'shoulders'),
+        'shoulders': ('triceps', 'chest'),
+        'biceps': ('triceps', 'lats'),
+        'lats': ('biceps', 'shoulders'),
+        'quadriceps': ('glutes', 'calves'),
+        'glutes': ('quadriceps', 'calves'),
+        'calves': ('quadriceps', 'glutes'),
+        'abdominals': ('lats', 'glutes'),
+    },
+    'nutrition': {
+        'chicken breast': ('rice', 'broccoli'),
+        'chicken': ('rice', 'broccoli'),
+        'rice': ('chicken breast', 'beans'),
+        'eggs': ('bacon', 'toast'),
+        'egg': ('eggs', 'toast'),
+        'oatmeal': ('banana', 'milk'),
+        'banana': ('apple', 'oatmeal'),
+        'apple': ('banana', 'orange'),
+        'salmon': ('rice', 'broccoli'),
+        'pasta': ('chicken breast', 'bread'),
+    },
+}
+
+PREFETCH_FANOUT = 2
+# Upstream fetches per second spent on prefetching, and the burst allowed
+PREFETCH_RATE = float(os.getenv('PREFETCH_RATE', '0.5'))
+PREFETCH_BURST = int(os.getenv('PREFETCH_BURST', '4'))
+PREFETCH_WORKERS = 1
+PREFETCH_MAX_PENDING = 4
+
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take tokens if available right now; never blocks"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < tokens:
+                return False
+            self.tokens -= tokens
+            return True
+
+
+class TransitionStats:
+    """Counts of which lookup followed which, per kind"""
+
+    def __init__(self, follow_ups: Dict[str, Dict[str, Tuple[str, ...]]] = None):
+        self.follow_ups = FOLLOW_UPS if follow_ups is None else follow_ups
+        self.counts: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, previous: str, current: str):
+        if previous != current:
+            with self._lock:
+                self.counts[(kind, previous)][current] += 1
+
+    def likely(self, kind: str, key: str, n: int = PREFETCH_FANOUT) -> List[str]:
+        """Most likely next keys after `key`: learned first, then configured"""
+        with self._lock:
+            learned = [next_key for next_key, _ in self.counts[(kind, key)].most_common(n)] \
+                if (kind, key) in self.counts else []
+        candidates = []
+        for next_key in learned + list(self.follow_ups.get(kind, {}).get(key, ())):
+            if next_key != key and next_key not in candidates:
+                candidates.append(next_key)
+        return candidates[:n]
+
+
+class Prefetcher:
+    def __init__(self, limiter: TokenBucket = None, workers: int = PREFETCH_WORKERS,
+                 max_pending: int = PREFETCH_MAX_PENDING):
+        self.stats = TransitionStats()
+        self.limiter = limiter or TokenBucket(PREFETCH_RATE, PREFETCH_BURST)
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.scheduled = 0
+        self.skipped = 0
+
+    def schedule(self, kind: str, key: str, fetch: Callable[[], object],
+                 is_cached: Callable[[], bool] = lambda: False) -> bool:
+        """Fetch a key in the background if it's worth it; returns whether it was queued"""
+        task = (kind, key)
+        with self._lock:
+            if task in self._pending or len(self._pending) >= self.max_pending:
+                self.skipped += 1
+                return False
+            if is_cached() or not self.limiter.try_acquire():
+                self.skipped += 1
+                return False
+            self._pending.add(task)
+            self.scheduled += 1
+
+        def run():
+            try:
+                fetch()
+            except Exception as e:
+                print(f"Prefetch of {kind} '{key}' failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._pending.discard(task)
+
+        self._executor.submit(run)
+        return True
+
+    def after_lookup(self, kind: str, previous: str, current: str,
+                     fetch: Callable[[str], object], is_cached: Callable[[str], bool]) -> List[str]:
+        """Learn the transition and prefetch the likely next keys; returns those queued"""
+        if previous:
+            self.stats.record(kind, previous, current)
+        return [next_key for next_key in self.stats.likely(kind, current)
+                if self.schedule(kind, next_key, lambda k=next_key: fetch(k), lambda k=next_key: is_cached(k))]
+
+
+_prefetcher = None
+
+
+def get_prefetcher() -> Prefetcher:
+    """Process-wide prefetcher (shared limiter, queue and transition counts)"""
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = Prefetcher()
+    return _prefetcher
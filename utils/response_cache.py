@@ -0,0 +1,114 @@
+"""
+Response-level cache for intents whose answers don't depend on the session.
+
+Entries are keyed by a namespace (which bot and output format produced them)
+and the normalized message, and remember the intent they were answered with;
+each intent has its own TTL. A hit skips intent prediction, extraction, the
+API call and formatting entirely. Callers decide what is cacheable: only
+answers that neither read nor change conversation state should be stored.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Optional, Tuple
+
+# Seconds an answer stays valid, per intent (intents missing here are never cached)
+INTENT_TTLS = {
+    # FitnessChatbot
+    'greeting': 24 * 3600,
+    'unknown': 24 * 3600,
+    'nutrition': 3600,
+    # Vercel bot
+    'nutrition_advice': 3600,
+    'exercise_recommendation': 900,
+}
+
+WHITESPACE_RE = re.compile(r"\s+")
+ERROR_PREFIXES = ("❌", '{"type": "error"')
+
+
+def normalize_message(message: str) -> str:
+    """Case, whitespace and trailing punctuation don't change the answer"""
+    return WHITESPACE_RE.sub(' ', message.lower()).strip().rstrip('?!. ')
+
+
+def is_error_response(response: str) -> bool:
+    """Error answers (upstream failures) are not worth keeping"""
+    return response.startswith(ERROR_PREFIXES)
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 4096, ttls: Optional[Dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.ttls = dict(INTENT_TTLS if ttls is None else ttls)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.hits_by_intent = defaultdict(int)
+        self.stores_by_intent = defaultdict(int)
+
+    def get(self, namespace: str, message: str) -> Optional[str]:
+        """Cached answer for a message, or None"""
+        key = (namespace, normalize_message(message))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.hits_by_intent[entry[1]] += 1
+            return entry[2]
+
+    def put(self, namespace: str, message: str, intent: str, response: str) -> bool:
+        """Store an answer if its intent has a TTL; returns whether it was stored"""
+        ttl = self.ttls.get(intent)
+        if not ttl or is_error_response(response):
+            return False
+        key = (namespace, normalize_message(message))
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, intent, response)
+            self._entries.move_to_end(key)
+            self.stores_by_intent[intent] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit-rate metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'by_intent': {intent: {'hits': self.hits_by_intent[intent], 'stores': stores}
+                              for intent, stores in self.stores_by_intent.items()},
+            }
+
+
+_response_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide cache shared by every chatbot instance"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
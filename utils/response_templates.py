@@ -0,0 +1,256 @@
+"""
+Precompiled response templates.
+
+Static text (headings, per-category BMI descriptions and advice, the nutrition
+tips) is baked into one format string per layout when the template is built,
+usually at import time, and compiled to a %-style string with a fixed field
+order, so a response is a single tuple interpolation. Each
+template renders as markdown (the chat default), plain text (derived from the
+markdown once) or JSON (the fields themselves, without any markup).
+"""
+import json
+import re
+import string
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, List, Tuple
+
+FORMATS = ('markdown', 'plain', 'json')
+
+BOLD_RE = re.compile(r"\*\*(.*?)\*\*")
+ITALIC_LINE_RE = re.compile(r"^\*(.+)\*$", re.MULTILINE)
+
+
+def to_plain(markdown: str) -> str:
+    """Strip the chat's markdown (bold and italic lines) from a string"""
+    return ITALIC_LINE_RE.sub(r"\1", BOLD_RE.sub(r"\1", markdown))
+
+
+def compile_format(template: str) -> Tuple[str, Tuple[str, ...]]:
+    """Turn a str.format template into a %-template plus its field order"""
+    parts = []
+    fields = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        parts.append(literal.replace('%', '%%'))
+        if field is not None:
+            if spec or conversion:
+                raise ValueError("Response templates only support plain {field} placeholders")
+            parts.append('%s')
+            fields.append(field)
+    return ''.join(parts), tuple(fields)
+
+
+def escape(text: str) -> str:
+    """Make static text safe to embed in a format string"""
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+@lru_cache(maxsize=4096)
+def title(value) -> str:
+    """Cached str.title for values that repeat across responses"""
+    return str(value).title()
+
+
+class ResponseTemplate:
+    def __init__(self, markdown: str, static: Dict = None):
+        """`markdown` is a format string; `static` holds the fixed JSON fields"""
+        self.formats = {}
+        for fmt, text in (('markdown', markdown), ('plain', to_plain(markdown))):
+            self.formats[fmt], self.fields = compile_format(text)
+        self.static = static or {}
+        if len(self.fields) > 1:
+            self._values = itemgetter(*self.fields)
+        else:
+            # itemgetter returns a bare value (not a tuple) for a single key
+            self._values = lambda fields: tuple(fields[name] for name in self.fields)
+
+    def render(self, fmt: str = 'markdown', **fields) -> str:
+        if fmt == 'json':
+            return json.dumps({**self.static, **fields})
+        if fmt not in self.formats:
+            raise ValueError(f"Unknown response format: {fmt}")
+        return self.formats[fmt] % self._values(fields)
+
+
+ERROR_TEMPLATE = ResponseTemplate("❌ {error}", {'type': 'error'})
+
+
+def render_error(message: str, fmt: str = 'markdown') -> str:
+    return ERROR_TEMPLATE.render(fmt, error=message)
+
+
+def render_message(text: str, kind: str, fmt: str = 'markdown') -> str:
+    """A free-form chat message (greeting, prompt, tip); JSON carries its plain text under `type`"""
+    if fmt == 'json':
+        return json.dumps({'type': kind, 'text': to_plain(text)})
+    if fmt == 'plain':
+        return to_plain(text)
+    if fmt == 'markdown':
+        return text
+    raise ValueError(f"Unknown response format: {fmt}")
+
+
+def append_note(response: str, note: str, fmt: str = 'markdown', key: str = 'note') -> str:
+    """Add text after a rendered answer
+
+    `note` is markdown, or another answer already rendered in `fmt`. In JSON
+    it becomes the `key` field of the answer: nested when the note is JSON
+    itself, as plain text otherwise.
+    """
+    if fmt != 'json':
+        return response + (to_plain(note) if fmt == 'plain' else note)
+    data = json.loads(response)
+    try:
+        data[key] = json.loads(note)
+    except ValueError:
+        data[key] = to_plain(note).strip()
+    return json.dumps(data)
+
+
+# Nutrition ---------------------------------------------------------------
+
+NUTRITION_TIPS = [
+    "Choose lean protein sources for muscle building",
+    "Include variety in your diet for balanced nutrition",
+    "Stay hydrated and eat whole foods when possible",
+]
+
+PREMIUM_ONLY = 'Only available for premium subscribers.'
+
+
+@lru_cache(maxsize=None)
+def nutrition_template(per_serving: bool, fiber: bool, sugar: bool, saturated: bool) -> ResponseTemplate:
+    """Template for one nutrition layout (which optional lines are present)"""
+    text = "🍎 **Nutrition Information for {name}**\n\n"
+    text += "📊 **Per {serving_size}g serving:**\n" if per_serving else "📊 **Nutritional Information:**\n"
+    text += "• **Calories:** {calories}\n"
+    text += "• **Protein:** {protein}\n"
+    text += "• **Carbohydrates:** {carbohydrates}\n"
+    if fiber:
+        text += "  - Fiber: {fiber}\n"
+    if sugar:
+        text += "  - Sugar: {sugar}\n"
+    text += "• **Fat:** {fat}\n"
+    if saturated:
+        text += "  - Saturated: {saturated}\n"
+    text += "• **Sodium:** {sodium}\n"
+    text += "• **Potassium:** {potassium}\n"
+    text += "• **Cholesterol:** {cholesterol}\n"
+    text += "\n💡 **Nutrition Tips:**\n"
+    text += ''.join(f"• {escape(tip)}\n" for tip in NUTRITION_TIPS)
+    return ResponseTemplate(text, {'type': 'nutrition', 'tips': NUTRITION_TIPS})
+
+
+def _nutrition_value(value, unit: str = "", fallback_info: str = ""):
+    if isinstance(value, str) and "premium subscribers" in value:
+        return "Available ⭐" + (f" ({fallback_info})" if fallback_info else "")
+    return f"{value}{unit}"
+
+
+def render_nutrition(nutrition_data: Dict, fmt: str = 'markdown') -> str:
+    if "error" in nutrition_data:
+        return render_error(nutrition_data['error'], fmt)
+
+    serving_size = nutrition_data.get('serving_size_g', 'N/A')
+    if fmt == 'json':
+        return json.dumps({'type': 'nutrition', 'tips': NUTRITION_TIPS, **nutrition_data})
+
+    get = nutrition_data.get
+    template = nutrition_template(serving_size != PREMIUM_ONLY, get('fiber_g') is not None,
+                                  get('sugar_g') is not None, get('fat_saturated_g') is not None)
+    return template.render(
+        fmt,
+        name=title(nutrition_data['name']),
+        serving_size=serving_size,
+        calories=_nutrition_value(get('calories', 'N/A'), ' kcal', 'varies by preparation'),
+        protein=_nutrition_value(get('protein_g', 'N/A'), 'g', 'typically high in lean meats'),
+        carbohydrates=_nutrition_value(get('carbohydrates_total_g', 'N/A'), 'g'),
+        fiber=_nutrition_value(get('fiber_g'), 'g'),
+        sugar=_nutrition_value(get('sugar_g'), 'g'),
+        fat=_nutrition_value(get('fat_total_g', 'N/A'), 'g'),
+        saturated=_nutrition_value(get('fat_saturated_g'), 'g'),
+        sodium=_nutrition_value(get('sodium_mg', 'N/A'), 'mg'),
+        potassium=_nutrition_value(get('potassium_mg', 'N/A'), 'mg'),
+        cholesterol=_nutrition_value(get('cholesterol_mg', 'N/A'), 'mg'),
+    )
+
+
+# Calorie needs -----------------------------------------------------------
+
+TDEE_ASSUMED_ACTIVITY = ('Assumed little or no exercise - tell me how active you are (e.g. "moderately active") '
+                         'for a better estimate.')
+TDEE_NOTE = "Estimates only. Adjust based on your progress and consult a professional for medical needs."
+
+
+def _tdee_template(activity_assumed: bool) -> ResponseTemplate:
+    text = "🔥 **Daily Calorie Needs**\n\n"
+    text += "• **BMR:** {bmr} kcal (Mifflin-St Jeor)\n"
+    text += "• **Activity:** {activity} ({activity_description})\n"
+    text += "• **Maintenance (TDEE):** {tdee} kcal/day\n"
+    text += "• **Target to {goal} weight:** {target} kcal/day\n\n"
+    text += "**Suggested Macros:**\n"
+    text += "• Protein: {protein} g\n"
+    text += "• Carbs: {carbs} g\n"
+    text += "• Fat: {fat} g\n\n"
+    if activity_assumed:
+        text += f"*{escape(TDEE_ASSUMED_ACTIVITY)}*\n"
+    text += f"*{escape(TDEE_NOTE)}*"
+    return ResponseTemplate(text)
+
+
+TDEE_TEMPLATES = {assumed: _tdee_template(assumed) for assumed in (False, True)}
+
+
+def render_tdee(result: Dict, activity_description: str, activity_assumed: bool, fmt: str = 'markdown') -> str:
+    """Calorie-needs answer from TDEECalculator.calculate output"""
+    if fmt == 'json':
+        return json.dumps({'type': 'tdee', 'formula': 'mifflin', **result, 'activity_assumed': activity_assumed,
+                           'note': TDEE_NOTE})
+    return TDEE_TEMPLATES[activity_assumed].render(
+        fmt,
+        bmr=f"{result['bmr']:.0f}",
+        activity=title(result['activity'].replace('_', ' ')),
+        activity_description=activity_description,
+        tdee=f"{result['tdee']:.0f}",
+        goal=result['goal'],
+        target=f"{result['target']:.0f}",
+        protein=f"{result['protein_g']:.0f}",
+        carbs=f"{result['carbs_g']:.0f}",
+        fat=f"{result['fat_g']:.0f}",
+    )
+
+
+# Exercises ---------------------------------------------------------------
+
+EXERCISE_HEADER = ResponseTemplate("💪 **Recommended Exercises:**\n\n")
+EXERCISE_ITEM = ResponseTemplate(
+    "**{number}. {name}**\n"
+    "• **Type:** {type}\n"
+    "• **Target Muscle:** {muscle}\n"
+    "• **Equipment:** {equipment}\n"
+    "• **Difficulty:** {difficulty}\n"
+    "• **Instructions:** {instructions}\n\n"
+)
+EXERCISE_FIELDS = ('name', 'type', 'muscle', 'equipment', 'difficulty', 'instructions')
+
+
+def render_exercises(exercises: List[Dict], start: int = 1, fmt: str = 'markdown') -> str:
+    if not exercises:
+        return render_error("No exercises found.", fmt)
+    if "error" in exercises[0]:
+        return render_error(exercises[0]['error'], fmt)
+
+    if fmt == 'json':
+        return json.dumps({'type': 'exercises', 'start': start,
+                           'exercises': [{field: exercise.get(field) for field in EXERCISE_FIELDS}
+                                         for exercise in exercises]})
+
+    if fmt not in EXERCISE_ITEM.formats:
+        raise ValueError(f"Unknown response format: {fmt}")
+    # Fields are passed positionally in EXERCISE_ITEM's placeholder order
+    item = EXERCISE_ITEM.formats[fmt]
+    parts = [EXERCISE_HEADER.formats[fmt]]
+    for number, exercise in enumerate(exercises, start):
+        parts.append(item % (number, title(exercise['name']), title(exercise['type']), title(exercise['muscle']),
+                             title(exercise['equipment']), title(exercise['difficulty']), exercise['instructions']))
+    return ''.join(parts)
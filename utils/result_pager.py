@@ -0,0 +1,102 @@
+"""
+Cursor-based pagination over cached result sets.
+
+A full result list is stored once under a short random id; pages are handed
+out with an opaque cursor encoding that id and an offset. Follow-up pages are
+sliced from memory instead of re-fetching or re-filtering. Result sets expire
+after `ttl` seconds and the least recently used ones are evicted past
+`max_entries`.
+"""
+import base64
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class ResultPager:
+    def __init__(self, max_entries: int = 1024, ttl: float = 900):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._results = OrderedDict()  # result id -> (stored_at, results)
+        self._ids_by_key = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def encode_cursor(result_id: str, offset: int) -> str:
+        return base64.urlsafe_b64encode(f"{result_id}:{offset}".encode('ascii')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Optional[Tuple[str, int]]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+            result_id, offset = raw.rsplit(':', 1)
+            return result_id, int(offset)
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+    def _get(self, result_id: str) -> Optional[List]:
+        entry = self._results.get(result_id)
+        if entry is None:
+            return None
+        stored_at, results = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._results[result_id]
+            return None
+        self._results.move_to_end(result_id)
+        return results
+
+    def lookup(self, key: Hashable) -> Optional[str]:
+        """Id of a live result set stored under `key`, if any"""
+        with self._lock:
+            result_id = self._ids_by_key.get(key)
+            if result_id is not None and self._get(result_id) is None:
+                del self._ids_by_key[key]
+                return None
+            return result_id
+
+    def store(self, key: Hashable, results: List) -> str:
+        """Cache a full result list and return its id"""
+        with self._lock:
+            result_id = secrets.token_urlsafe(6)
+            self._results[result_id] = (time.monotonic(), results)
+            self._ids_by_key[key] = result_id
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+            if len(self._ids_by_key) > 2 * self.max_entries:
+                self._ids_by_key = {k: v for k, v in self._ids_by_key.items() if v in self._results}
+            return result_id
+
+    def page(self, result_id: str, offset: int = 0, page_size: int = 5) -> Optional[Dict]:
+        """One page of a stored result set, or None if it has expired"""
+        with self._lock:
+            results = self._get(result_id)
+        if results is None:
+            return None
+
+        end = offset + page_size
+        return {
+            'results': results[offset:end],
+            'offset': offset,
+            'total': len(results),
+            'next_cursor': self.encode_cursor(result_id, end) if end < len(results) else None,
+        }
+
+    def page_from_cursor(self, cursor: str, page_size: int = 5) -> Optional[Dict]:
+        """Resolve a cursor into its page, or None if it is invalid or expired"""
+        decoded = self.decode_cursor(cursor)
+        if decoded is None:
+            return None
+        return self.page(decoded[0], decoded[1], page_size)
+
+
+_default_pager = None
+
+
+def get_result_pager() -> ResultPager:
+    """Process-wide pager shared by every APIService instance"""
+    global _default_pager
+    if _default_pager is None:
+        _default_pager = ResultPager()
+    return _default_pager
@@ -0,0 +1,105 @@
+"""
+Signed, stateless conversation-state tokens.
+
+Serverless invocations can land on any instance, so the pending-slot state
+(e.g. "waiting for height and weight") and a small bounded context travel
+with the client instead: each response carries a token the client echoes on
+its next request. A token is compact JSON plus a truncated HMAC-SHA256, both
+base64url-encoded; tampered, expired or oversized tokens decode to an empty
+state. A state too large for a token loses its optional context first, and
+otherwise gets no token at all. Instances share the key through
+STATE_TOKEN_SECRET.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from typing import Dict, Optional
+
+TOKEN_VERSION = 1
+TOKEN_TTL = 3600
+MAX_TOKEN_LENGTH = 1024
+SIGNATURE_BYTES = 16
+# Context dropped, in this order, from a state too large for a token
+OPTIONAL_KEYS = ('more', 'intent', 'session')
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class StateSigner:
+    def __init__(self, secret: bytes, ttl: float = TOKEN_TTL):
+        self.secret = secret
+        self.ttl = ttl
+
+    def _signature(self, payload: bytes) -> bytes:
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+    def _token(self, state: Dict) -> str:
+        payload = json.dumps({'v': TOKEN_VERSION, 't': int(time.time()), 's': state},
+                             separators=(',', ':')).encode('utf-8')
+        return f"{_b64encode(payload)}.{_b64encode(self._signature(payload))}"
+
+    def encode(self, state: Dict) -> Optional[str]:
+        """Token for a state dict, or None if there is nothing to carry
+
+        Never raises on size: optional context is dropped (OPTIONAL_KEYS
+        order) until the token fits, and None is returned if it still doesn't.
+        """
+        state = dict(state)
+        optional = [key for key in OPTIONAL_KEYS if key in state]
+        while state:
+            token = self._token(state)
+            if len(token) <= MAX_TOKEN_LENGTH:
+                return token
+            if not optional:
+                print(f"Conversation state too large for a token ({len(token)} bytes); dropped")
+                return None
+            del state[optional.pop(0)]
+        return None
+
+    def decode(self, token: Optional[str]) -> Dict:
+        """State carried by a token; empty for missing, invalid or expired tokens"""
+        if not token or not isinstance(token, str) or len(token) > MAX_TOKEN_LENGTH:
+            return {}
+        try:
+            payload_part, signature_part = token.split('.')
+            payload = _b64decode(payload_part)
+            if not hmac.compare_digest(_b64decode(signature_part), self._signature(payload)):
+                return {}
+            data = json.loads(payload)
+        except (ValueError, TypeError):
+            return {}
+        if not isinstance(data, dict) or data.get('v') != TOKEN_VERSION:
+            return {}
+        if not isinstance(data.get('t'), int) or time.time() - data['t'] > self.ttl:
+            return {}
+        state = data.get('s')
+        return state if isinstance(state, dict) else {}
+
+
+_state_signer = None
+
+
+def get_state_signer() -> StateSigner:
+    """Signer keyed by STATE_TOKEN_SECRET
+
+    Without the variable a random per-process key is used, which only works
+    while every request reaches the same process.
+    """
+    global _state_signer
+    if _state_signer is None:
+        secret = os.getenv('STATE_TOKEN_SECRET')
+        if not secret:
+            print("STATE_TOKEN_SECRET not set; conversation state tokens only work on this server (and its workers) until it restarts")
+            secret = secrets.token_hex(32)
+        _state_signer = StateSigner(secret.encode('utf-8'))
+    return _state_signer
@@ -0,0 +1,103 @@
+"""
+Vectorized BMR/TDEE for whole client rosters.
+
+Sex, activity level and goal columns are turned into small integer codes
+once, and every coefficient lookup after that is a NumPy fancy-index into a
+table built from the constants in utils.tdee_calculator, so the batch path
+matches TDEECalculator's formulas without a per-row Python loop. Rows with
+missing or non-positive measurements come back as NaN.
+"""
+from typing import Dict, Sequence, Union
+
+import numpy as np
+
+from .tdee_calculator import (ACTIVITY_MULTIPLIERS, BMR_COEFFICIENTS, GOAL_ADJUSTMENTS, MACRO_CALORIES,
+                              MACRO_SPLITS, MIN_CALORIES)
+
+SEXES = ('male', 'female')
+ACTIVITIES = tuple(ACTIVITY_MULTIPLIERS)
+GOALS = tuple(GOAL_ADJUSTMENTS)
+
+Labels = Union[str, Sequence[str]]
+
+
+class TDEEBatch:
+    """Per-client results as parallel float arrays"""
+    __slots__ = ('bmr', 'tdee', 'target', 'protein_g', 'carbs_g', 'fat_g')
+
+    def __init__(self, bmr, tdee, target, protein_g, carbs_g, fat_g):
+        self.bmr = bmr
+        self.tdee = tdee
+        self.target = target
+        self.protein_g = protein_g
+        self.carbs_g = carbs_g
+        self.fat_g = fat_g
+
+    def __len__(self) -> int:
+        return len(self.bmr)
+
+    def __getitem__(self, index: int) -> Dict[str, float]:
+        return {field: float(getattr(self, field)[index]) for field in self.__slots__}
+
+
+def label_codes(values: Labels, labels: Sequence[str], name: str, size: int) -> Union[int, np.ndarray]:
+    """Index of each value in `labels` (one shared string or one per row)"""
+    if isinstance(values, str):
+        values = values.strip().lower()
+        if values not in labels:
+            raise ValueError(f"Unknown {name}: {values}")
+        return labels.index(values)
+
+    values = np.asarray(values, dtype=str)
+    if values.shape != (size,):
+        raise ValueError(f"Expected {size} {name} values, got {values.shape}")
+    codes = np.full(size, -1, dtype=np.int8)
+    for code, label in enumerate(labels):
+        codes[values == label] = code
+
+    # Normalize case and whitespace only for the rows that didn't match as-is
+    unmatched = np.flatnonzero(codes < 0)
+    if len(unmatched):
+        normalized = np.char.lower(np.char.strip(values[unmatched]))
+        for code, label in enumerate(labels):
+            codes[unmatched[normalized == label]] = code
+        if (codes < 0).any():
+            raise ValueError(f"Unknown {name}: {values[codes.argmin()]}")
+    return codes
+
+
+def calculate_tdee_batch(weights_kg, heights_cm, ages, sexes: Labels, activities: Labels = 'sedentary',
+                         goals: Labels = 'maintain', formula: str = 'mifflin') -> TDEEBatch:
+    """BMR, TDEE, calorie targets and macro grams for arrays of clients"""
+    if formula not in BMR_COEFFICIENTS:
+        raise ValueError(f"Unknown BMR formula: {formula}")
+    weights = np.asarray(weights_kg, dtype=np.float64)
+    heights = np.asarray(heights_cm, dtype=np.float64)
+    ages = np.asarray(ages, dtype=np.float64)
+    if not (weights.shape == heights.shape == ages.shape) or weights.ndim != 1:
+        raise ValueError("Weights, heights and ages must be 1-D arrays of the same length")
+    size = len(weights)
+
+    sex = label_codes(sexes, SEXES, 'sex', size)
+    activity = label_codes(activities, ACTIVITIES, 'activity level', size)
+    goal = label_codes(goals, GOALS, 'goal', size)
+
+    coefficients = np.array([BMR_COEFFICIENTS[formula][s] for s in SEXES])[sex]
+    if coefficients.ndim == 1:
+        coefficients = np.broadcast_to(coefficients, (size, 4))
+    bmr = (coefficients[:, 0] + coefficients[:, 1] * weights + coefficients[:, 2] * heights
+           + coefficients[:, 3] * ages)
+    bmr[~((weights > 0) & (heights > 0) & (ages > 0))] = np.nan
+    bmr = np.round(bmr, 1)
+
+    tdee = np.round(bmr * np.array([ACTIVITY_MULTIPLIERS[a] for a in ACTIVITIES])[activity], 1)
+    floors = np.array([MIN_CALORIES[s] for s in SEXES])[sex]
+    target = tdee + np.array([GOAL_ADJUSTMENTS[g] for g in GOALS])[goal]
+    target = np.round(np.where(np.isnan(target), np.nan, np.maximum(target, floors)), 1)
+
+    splits = np.array([MACRO_SPLITS[g] for g in GOALS])[goal]
+    if splits.ndim == 1:
+        splits = np.broadcast_to(splits, (size, 3))
+    grams = np.round(target[:, None] * splits / np.array(MACRO_CALORIES), 1)
+
+    return TDEEBatch(bmr, tdee, target, grams[:, 0], grams[:, 1], grams[:, 2])
@@ -0,0 +1,112 @@
+from typing import Dict, Optional
+
+from .response_templates import render_error, render_tdee
+
+# BMR = intercept + weight_kg * w + height_cm * h + age * a, per formula and sex
+BMR_COEFFICIENTS = {
+    "mifflin": {
+        "male": (5.0, 10.0, 6.25, -5.0),
+        "female": (-161.0, 10.0, 6.25, -5.0),
+    },
+    # Revised Harris-Benedict (Roza & Shizgal, 1984)
+    "harris_benedict": {
+        "male": (88.362, 13.397, 4.799, -5.677),
+        "female": (447.593, 9.247, 3.098, -4.330),
+    },
+}
+
+ACTIVITY_MULTIPLIERS = {
+    "sedentary": 1.2,
+    "light": 1.375,
+    "moderate": 1.55,
+    "active": 1.725,
+    "very_active": 1.9,
+}
+
+ACTIVITY_DESCRIPTIONS = {
+    "sedentary": "little or no exercise",
+    "light": "light exercise 1-3 days a week",
+    "moderate": "moderate exercise 3-5 days a week",
+    "active": "hard exercise 6-7 days a week",
+    "very_active": "very hard exercise or a physical job",
+}
+
+# Daily calorie change from maintenance for each goal
+GOAL_ADJUSTMENTS = {
+    "lose": -500.0,
+    "maintain": 0.0,
+    "gain": 300.0,
+}
+
+# Share of calories from (protein, carbs, fat) for each goal
+MACRO_SPLITS = {
+    "lose": (0.40, 0.30, 0.30),
+    "maintain": (0.30, 0.40, 0.30),
+    "gain": (0.30, 0.45, 0.25),
+}
+
+# Calories per gram of (protein, carbs, fat)
+MACRO_CALORIES = (4.0, 4.0, 9.0)
+
+# Targets are never set below these floors
+MIN_CALORIES = {"male": 1500.0, "female": 1200.0}
+
+
+class TDEECalculator:
+    def bmr(self, weight_kg: float, height_cm: float, age: float, sex: str, formula: str = "mifflin") -> float:
+        """Basal metabolic rate in kcal/day"""
+        if weight_kg <= 0 or height_cm <= 0 or age <= 0:
+            raise ValueError("Weight, height and age must be positive numbers")
+        if formula not in BMR_COEFFICIENTS:
+            raise ValueError(f"Unknown BMR formula: {formula}")
+        if sex not in BMR_COEFFICIENTS[formula]:
+            raise ValueError("Sex must be 'male' or 'female'")
+
+        intercept, w, h, a = BMR_COEFFICIENTS[formula][sex]
+        return round(intercept + w * weight_kg + h * height_cm + a * age, 1)
+
+    def tdee(self, weight_kg: float, height_cm: float, age: float, sex: str,
+             activity: str = "sedentary", formula: str = "mifflin") -> float:
+        """Total daily energy expenditure in kcal/day"""
+        if activity not in ACTIVITY_MULTIPLIERS:
+            raise ValueError(f"Unknown activity level: {activity}")
+        return round(self.bmr(weight_kg, height_cm, age, sex, formula) * ACTIVITY_MULTIPLIERS[activity], 1)
+
+    def calorie_target(self, tdee: float, sex: str, goal: str = "maintain") -> float:
+        """Daily calorie target for a goal, floored at a safe minimum"""
+        if goal not in GOAL_ADJUSTMENTS:
+            raise ValueError(f"Unknown goal: {goal}")
+        return round(max(tdee + GOAL_ADJUSTMENTS[goal], MIN_CALORIES[sex]), 1)
+
+    def macros(self, calories: float, goal: str = "maintain") -> Dict[str, float]:
+        """Grams of protein, carbs and fat for a calorie target"""
+        protein, carbs, fat = (round(calories * share / kcal, 1)
+                               for share, kcal in zip(MACRO_SPLITS[goal], MACRO_CALORIES))
+        return {"protein_g": protein, "carbs_g": carbs, "fat_g": fat}
+
+    def calculate(self, weight_kg: float, height_cm: float, age: float, sex: str, activity: str = "sedentary",
+                  goal: str = "maintain", formula: str = "mifflin") -> Dict:
+        """BMR, TDEE, calorie target and macros for one person"""
+        bmr = self.bmr(weight_kg, height_cm, age, sex, formula)
+        tdee = self.tdee(weight_kg, height_cm, age, sex, activity, formula)
+        target = self.calorie_target(tdee, sex, goal)
+        return {"bmr": bmr, "tdee": tdee, "target": target, "activity": activity, "goal": goal,
+                **self.macros(target, goal)}
+
+    def calculate_tdee_batch(self, weights_kg, heights_cm, ages, sexes, activities="sedentary",
+                             goals="maintain", formula: str = "mifflin"):
+        """Vectorized BMR/TDEE/targets for arrays of clients (see utils.tdee_batch)
+
+        Needs NumPy, so it is imported on first use only.
+        """
+        from .tdee_batch import calculate_tdee_batch
+        return calculate_tdee_batch(weights_kg, heights_cm, ages, sexes, activities, goals, formula)
+
+    def format_tdee_response(self, weight_kg: float, height_cm: float, age: float, sex: str,
+                             activity: Optional[str] = None, goal: Optional[str] = None, fmt: str = "markdown") -> str:
+        """Format a calorie-needs answer for the chat (fmt: markdown, plain or json)"""
+        try:
+            result = self.calculate(weight_kg, height_cm, age, sex, activity or "sedentary", goal or "maintain")
+        except ValueError as e:
+            return render_error(f"Error calculating calorie needs: {str(e)}", fmt)
+        return render_tdee(result, ACTIVITY_DESCRIPTIONS[result["activity"]], activity is None, fmt)
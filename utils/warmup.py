@@ -0,0 +1,151 @@
+"""
+Start-up cache warm-up.
+
+Chat traffic has a heavy head of repeated foods and muscles, so before a
+server reports ready it can replay the most frequent recorded queries plus
+the apps' example prompts through the normal response path, filling the
+response cache and the persistent API cache. Replay runs on a small thread
+pool; readiness is signalled when every query finishes or the time limit
+passes, whichever comes first.
+
+Queries are recorded (normalized, one per line) to the file named by
+QUERY_LOG_PATH when that variable is set. The log is bounded: past
+QUERY_LOG_MAX_BYTES it is rotated to a single ".1" generation, so at most
+twice that is kept on disk, and overlong messages are not recorded.
+"""
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .example_queries import all_example_queries
+from .response_cache import normalize_message
+
+QUERY_LOG_PATH = os.getenv('QUERY_LOG_PATH', '')
+QUERY_LOG_MAX_BYTES = int(os.getenv('QUERY_LOG_MAX_BYTES', str(1024 * 1024)))
+# Longer messages are one-offs, never worth replaying
+MAX_LOGGED_QUERY_LENGTH = 200
+WARMUP_TOP_N = int(os.getenv('WARMUP_TOP_N', '50'))
+WARMUP_WORKERS = int(os.getenv('WARMUP_WORKERS', '4'))
+WARMUP_TIME_LIMIT = float(os.getenv('WARMUP_TIME_LIMIT', '30'))
+
+
+class QueryLog:
+    def __init__(self, path: str = QUERY_LOG_PATH, max_bytes: int = QUERY_LOG_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def record(self, message: str):
+        """Append a normalized query (no-op without a log path), rotating a full log"""
+        if not self.path:
+            return
+        query = normalize_message(message)
+        if not query or len(query) > MAX_LOGGED_QUERY_LENGTH:
+            return
+        try:
+            with self._lock:
+                with open(self.path, 'a', encoding='utf-8') as log:
+                    log.write(query + '\n')
+                    full = log.tell() >= self.max_bytes
+                if full:
+                    os.replace(self.path, self.path + '.1')
+        except OSError as e:
+            print(f"Could not record query: {str(e)}")
+
+    def top_queries(self, n: int = WARMUP_TOP_N) -> List[str]:
+        """The n most frequent recorded queries, over the current and rotated log"""
+        if not self.path:
+            return []
+        counts = Counter()
+        for path in (self.path + '.1', self.path):
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as log:
+                    counts.update(line.rstrip('\n') for line in log if line.strip())
+        return [query for query, _ in counts.most_common(n)]
+
+
+def warmup_queries(query_log: Optional[QueryLog] = None, top_n: int = WARMUP_TOP_N) -> List[str]:
+    """Top logged queries followed by the example prompts, without duplicates"""
+    queries = (query_log or get_query_log()).top_queries(top_n) + all_example_queries()
+    seen = set()
+    unique = []
+    for query in queries:
+        key = normalize_message(query)
+        if key not in seen:
+            seen.add(key)
+            unique.append(query)
+    return unique
+
+
+class WarmUp:
+    """Replays queries in the background and tracks readiness"""
+
+    def __init__(self, respond: Callable[[str], str], queries: Iterable[str],
+                 workers: int = WARMUP_WORKERS, time_limit: float = WARMUP_TIME_LIMIT):
+        self.respond = respond
+        self.queries = list(queries)
+        self.workers = max(1, workers)
+        self.time_limit = time_limit
+        self.ready = threading.Event()
+        self.completed = 0
+        self.failed = 0
+        self._failed_lock = threading.Lock()
+        self.elapsed = None
+        self.timed_out = False
+
+    def _replay(self, query: str):
+        try:
+            self.respond(query)
+        except Exception as e:
+            with self._failed_lock:
+                self.failed += 1
+            print(f"Warm-up query failed ({query}): {str(e)}")
+
+    def run(self, drain: bool = False):
+        """Replay every query, returning once done or at the time limit
+
+        With `drain`, queries still running at the time limit are waited for
+        too, so no replay thread outlives the call (e.g. before forking).
+        """
+        start = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='warmup')
+        try:
+            futures = [executor.submit(self._replay, query) for query in self.queries]
+            done, pending = wait(futures, timeout=self.time_limit)
+            self.completed = len(done)
+            self.timed_out = bool(pending)
+        finally:
+            # Don't hold up readiness: queued queries are cancelled, running ones finish in the background
+            executor.shutdown(wait=drain, cancel_futures=True)
+            self.elapsed = time.perf_counter() - start
+            self.ready.set()
+        print(f"Warm-up: {self.completed}/{len(self.queries)} queries in {self.elapsed:.1f}s"
+              + (" (time limit reached)" if self.timed_out else ""))
+
+    def start(self) -> 'WarmUp':
+        threading.Thread(target=self.run, name='warmup', daemon=True).start()
+        return self
+
+    def status(self) -> Dict:
+        return {
+            'ready': self.ready.is_set(),
+            'queries': len(self.queries),
+            'completed': self.completed,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'elapsed': round(self.elapsed, 3) if self.elapsed is not None else None,
+        }
+
+
+_query_log = None
+
+
+def get_query_log() -> QueryLog:
+    """Process-wide query log"""
+    global _query_log
+    if _query_log is None:
+        _query_log = QueryLog()
+    return _query_log